@@ -1,234 +1,126 @@
 import os
 import pandas as pd
-import numpy as np
-from datetime import datetime
-def find_date_formats(df, column):
-    """
-    Identifies date formats used in a column of string dates.
-
-    Parameters:
-        df (pd.DataFrame): The DataFrame containing the dates.
-        column (str): The column name to analyze.
+from concurrent.futures import ProcessPoolExecutor
 
-    Returns:
-        dict: A dictionary mapping each unique date string to its matched format.
-    """
-    possible_formats = [
-        "%Y-%m-%d",
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%Y/%m/%d",
-        "%B %d, %Y",
-        "%d-%b-%Y",
-        "%d %B %Y",
-        "%Y.%m.%d",
-        "%Y %m %d",
-        "%m/%d/%y",
-        "%Y-%m-%d %H:%M:%S",
-    ]
-
-    format_matches = {}
-
-    for date_str in df[column].dropna().unique():
-        matched_format = None
-        for fmt in possible_formats:
-            try:
-                _ = datetime.strptime(date_str, fmt)
-                matched_format = fmt
-                break
-            except ValueError:
-                continue
-        format_matches[date_str] = matched_format or "Unrecognized"
-
-    # Print results
-    unique_formats = set(format_matches.values())
-    print("Unique formats found:")
-    for fmt in unique_formats:
-        print(fmt)
-
-    return format_matches
+from ingestao import (
+    listar_arquivos, ler_arquivo, padronizar, processar_arquivo, criar_snapshots, GravadorDataset,
+    ler_manifesto, comparar_manifesto, gravar_manifesto
+)
+from completude import atualizar_cubo
 
+# ========== CONFIGURATION ==========
 raw_data_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\raw_data'
+parciais_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\parciais_ingestao'
+dataset_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dados_horarios'  # particionado Poluente=/Estado=/Ano=
+snapshot_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\snapshots_ingestao'
+quarentena_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\quarentena_ingestao.parquet'
+duplicatas_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\duplicatas_ingestao'  # linhas originais das chaves repetidas (ingestão incremental)
+manifesto_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\manifesto_ingestao.csv'
+cubo_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\cubo_completude'  # horas/dias válidos por estação
+reprocessar_tudo = False  # True ignora o manifesto e recria o dataset a partir de todos os CSVs
+n_workers = os.cpu_count()
+limite_memoria_mb = 512  # teto dos buffers de escrita e dos lotes de estações da compactação
+linhas_por_row_group = 100_000  # row groups menores = filtros por estação mais seletivos
+regra_duplicatas = 'primeira'  # mesma estação/poluente/hora com valores diferentes: 'primeira', 'ultima', 'media' ou 'descartar'
+modo_snapshot = None  # None, 'amostra' ou 'estatisticas' (antes/depois da limpeza de 'Valor')
+# ===================================
+
+
+def ler_padronizados(tarefas, n_workers, modo_snapshot):
+    """
+    Gera (DataFrame padronizado, snapshots) para cada CSV bruto, um arquivo por vez.
 
-# Extrair todos os dados
-data_dict = {}
-
-# Processar apenas diretórios (cada estado)
-for folder in os.listdir(raw_data_path):
-    folder_path = os.path.join(raw_data_path, folder)
-    
-    if not os.path.isdir(folder_path):
-        continue  # Ignorar arquivos, processar apenas pastas
-        
-    state = folder  # Abreviação do estado (nome da pasta)
-    state_data = []
-    
-    for file in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, file)
-        
-        # Ler arquivo CSV
-        df = pd.read_csv(file_path, sep=',', encoding='latin1', dtype=str)
-        
-        # Adicionar coluna de estado imediatamente
-        df['Estado'] = state
-        
-        state_data.append(df)
-
-    state_data = pd.concat(state_data, ignore_index=True)
-    data_dict[state] = state_data
-
-# Concatenar tudo em um único DataFrame
-data = pd.concat(data_dict.values(), ignore_index=True)
-
-# Preencher coluna 'Data' onde for nula com 'ï»¿Data'
-if 'ï»¿Data' in data.columns:
-    data['Data'] = data['Data'].fillna(data['ï»¿Data'])
-    data = data.drop(columns=['ï»¿Data'])
-
-# Unificar PM10 e MP10
-data['Poluente'] = data['Poluente'].replace({
-    'PM10': 'MP10', 
-    'pm10': 'MP10', 
-    'Pm10': 'MP10',
-    'MP2.5': 'MP2.5'
-})
-
-# Padronizar coluna de unidade
-unidades_corretas = {
-    'ug/m3': 'µg/m³',
-    'µg/m3': 'µg/m³',
-    'µg/m³': 'µg/m³',
-    'Âµg/mÂ³': 'µg/m³',
-    'ppm': 'ppm',
-    'ppb': 'ppb'
-}
-data['Unidade'] = data['Unidade'].map(unidades_corretas).fillna(data['Unidade'])
-
-data_before_cleaning = data.copy()
-
-# Converter 'Valor' para numérico
-def clean_numeric(value):
-    if isinstance(value, str):
-        # Remover caracteres não numéricos exceto ponto, vírgula e sinal negativo
-        cleaned = ''.join(c for c in value if c in '0123456789.,-')
-        # Substituir vírgula por ponto
-        cleaned = cleaned.replace(',', '.')
-        # Remover múltiplos pontos (caso haja)
-        if cleaned.count('.') > 1:
-            parts = cleaned.split('.')
-            cleaned = parts[0] + '.' + ''.join(parts[1:])
-        return cleaned
-    return value
-
-data['Valor'] = data['Valor'].apply(clean_numeric)
-data['Valor'] = pd.to_numeric(data['Valor'], errors='coerce')
-
-data_after_cleaning = data.copy()
-
-# Massas molares
-massa_molar = {
-    'NO2': 46.0055,
-    'O3': 48.00,
-    'SO2': 64.066,
-    'CO': 28.01,
-    'NO': 30.01
-}
-PPM_CONVERSION = 24.45  # 25°C e 1 atm
-
-# Inicializar colunas padronizadas
-data['Valor_Padronizado'] = np.nan
-data['Unidade_Padronizada'] = 'µg/m³'
-
-# Unidade para CO deve ser ppm
-co_mask = data['Poluente'] == 'CO'
-data.loc[co_mask, 'Unidade_Padronizada'] = 'ppm'
-
-# Conversão para CO
-co_ppm_mask = co_mask & (data['Unidade'] == 'ppm')
-co_ppb_mask = co_mask & (data['Unidade'] == 'ppb')
-co_ugm3_mask = co_mask & (data['Unidade'] == 'µg/m³')
-
-data.loc[co_ppm_mask, 'Valor_Padronizado'] = data.loc[co_ppm_mask, 'Valor']
-data.loc[co_ppb_mask, 'Valor_Padronizado'] = data.loc[co_ppb_mask, 'Valor'] / 1000
-
-# Converter CO de µg/m³ para ppm
-if co_ugm3_mask.any():
-    data.loc[co_ugm3_mask, 'Valor_Padronizado'] = (
-        data.loc[co_ugm3_mask, 'Valor'] * PPM_CONVERSION / (massa_molar['CO'] * 1000)
+    Com mais de um worker, cada arquivo é uma tarefa independente (estados grandes
+    também são divididos entre os workers) que grava um Parquet parcial.
+    executor.map devolve os resultados na ordem das tarefas, então a mesclagem é
+    determinística; cada parcial é lido e apagado assim que é consumido.
+    """
+    if n_workers == 1:
+        for state, file_path in tarefas:
+            snapshots = criar_snapshots(modo_snapshot)
+            data = padronizar(ler_arquivo(file_path, state), snapshots)
+            yield data, snapshots
+        return
+
+    n = len(tarefas)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        resultados = executor.map(
+            processar_arquivo,
+            [state for state, _ in tarefas],
+            [file_path for _, file_path in tarefas],
+            [parciais_path] * n,
+            range(n),
+            [modo_snapshot] * n,
+            chunksize=4
+        )
+        for partial_path, snapshots in resultados:
+            data = pd.read_parquet(partial_path)
+            os.remove(partial_path)
+            yield data, snapshots
+
+
+def atualizar_completude():
+    """Atualiza o cubo de completude só nas partições que a ingestão regravou."""
+    recalculadas, removidas = atualizar_cubo(dataset_path, cubo_path)
+    print(f"Cubo de completude: {recalculadas} partição(ões) recalculada(s), {removidas} removida(s) -> {cubo_path}")
+
+
+def main():
+    os.makedirs(parciais_path, exist_ok=True)
+
+    tarefas = listar_arquivos(raw_data_path)
+
+    # Sem manifesto (ou sem dataset) a ingestão é completa; com ele, só os
+    # arquivos novos ou alterados são lidos e os removidos saem do dataset
+    manifesto_anterior = ler_manifesto(manifesto_path)
+    recriar = reprocessar_tudo or manifesto_anterior.empty or not os.path.exists(dataset_path)
+    if recriar:
+        manifesto_anterior = manifesto_anterior.iloc[0:0]
+    pendentes, substituir, manifesto = comparar_manifesto(tarefas, manifesto_anterior)
+
+    if not pendentes and not substituir:
+        print(f"Nenhum dos {len(tarefas)} arquivos mudou desde a última ingestão.")
+        gravar_manifesto(manifesto, manifesto_path)
+        atualizar_completude()
+        return
+
+    print(f"Padronizando {len(pendentes)} de {len(tarefas)} arquivos com {n_workers} worker(s) "
+          f"({len(substituir)} arquivo(s) alterado(s) ou removido(s) a substituir)...")
+
+    gravador = GravadorDataset(
+        dataset_path,
+        quarentena_path,
+        limite_memoria_mb=limite_memoria_mb,
+        linhas_por_row_group=linhas_por_row_group,
+        recriar=recriar,
+        substituir=substituir,
+        regra_duplicatas=regra_duplicatas,
+        duplicatas_path=duplicatas_path
     )
+    snapshots = criar_snapshots(modo_snapshot)
+
+    # Ler, padronizar e gravar no dataset particionado, um arquivo por vez
+    for data, snapshots_arquivo in ler_padronizados(pendentes, n_workers, modo_snapshot):
+        gravador.adicionar(data)
+        if snapshots:
+            for etapa, snapshot in snapshots.items():
+                snapshot.combinar(snapshots_arquivo[etapa])
+
+    gravador.fechar()
+    gravador.relatorio()
+
+    # Só depois do dataset consolidado: se a ingestão falhar, a próxima refaz os mesmos arquivos
+    gravar_manifesto(manifesto, manifesto_path)
+    atualizar_completude()
+
+    if snapshots:
+        os.makedirs(snapshot_path, exist_ok=True)
+        for etapa, snapshot in snapshots.items():
+            snapshot.resultado().to_csv(
+                os.path.join(snapshot_path, f'{modo_snapshot}_{etapa}_limpeza.csv'), index=False
+            )
+
 
-# Outros poluentes (todos convertidos para µg/m³)
-other_mask = ~co_mask
-other_ppm_mask = other_mask & (data['Unidade'] == 'ppm')
-other_ppb_mask = other_mask & (data['Unidade'] == 'ppb')
-other_ugm3_mask = other_mask & (data['Unidade'] == 'µg/m³')
-
-# Se unidade já é µg/m³, manter o valor
-data.loc[other_ugm3_mask, 'Valor_Padronizado'] = data.loc[other_ugm3_mask, 'Valor']
-
-# Converter de ppm para µg/m³
-for poluente, mm in massa_molar.items():
-    if poluente == 'CO': 
-        continue
-        
-    mask = other_ppm_mask & (data['Poluente'] == poluente)
-    data.loc[mask, 'Valor_Padronizado'] = (data.loc[mask, 'Valor'] * mm * 1000) / PPM_CONVERSION
-
-# Converter de ppb para µg/m³
-for poluente, mm in massa_molar.items():
-    if poluente == 'CO': 
-        continue
-        
-    mask = other_ppb_mask & (data['Poluente'] == poluente)
-    data.loc[mask, 'Valor_Padronizado'] = (data.loc[mask, 'Valor'] * mm) / PPM_CONVERSION
-
-# Tratar partículas (MP10, MP2.5) - sem conversão necessária
-for particula in ['MP10', 'MP2.5']:
-    part_mask = (data['Poluente'] == particula) & other_mask
-    ugm3_mask = part_mask & (data['Unidade'] == 'µg/m³')
-    mgm3_mask = part_mask & (data['Unidade'] == 'mg/m³')  # Se houver mg/m³
-    
-    data.loc[ugm3_mask, 'Valor_Padronizado'] = data.loc[ugm3_mask, 'Valor']
-    
-    if mgm3_mask.any():
-        data.loc[mgm3_mask, 'Valor_Padronizado'] = data.loc[mgm3_mask, 'Valor'] * 1000
-
-# Verificar nulos e reportar
-print("\nRelatório de valores nulos:")
-print(f"Total de registros: {len(data)}")
-print(f"Valores nulos em 'Valor': {data['Valor'].isna().sum()}")
-print(f"Valores nulos em 'Valor_Padronizado': {data['Valor_Padronizado'].isna().sum()}")
-
-if data['Valor_Padronizado'].isna().sum() > 0:
-    nulos = data[data['Valor_Padronizado'].isna()]
-    print("\nMotivos para valores nulos em Valor_Padronizado:")
-    print(nulos.groupby(['Poluente', 'Unidade']).size().reset_index(name='count'))
-    
-    # Salvar dados problemáticos para análise
-    nulos.to_csv(os.path.join(raw_data_path, 'dados_problematicos.csv'), index=False)
-
-# Salvar dados por poluente
-parquet_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data_poluentes_parquet'
-os.makedirs(parquet_path, exist_ok=True)
-
-co_df = data[data['Poluente'] == 'CO'].copy()
-co_df_only_converted = co_df[co_df['Valor_Padronizado'] > 40]
-
-for poluente in data['Poluente'].unique():
-    pollutant_data = data[data['Poluente'] == poluente].copy()
-    
-    # Remover registros sem valores padronizados
-    initial_count = len(pollutant_data)
-    pollutant_data = pollutant_data.dropna(subset=['Valor_Padronizado'])
-    final_count = len(pollutant_data)
-    
-    print(f"\nPoluente: {poluente}")
-    print(f"  Registros antes: {initial_count}")
-    print(f"  Registros após remoção de nulos: {final_count}")
-    print(f"  Registros perdidos: {initial_count - final_count}")
-    
-    # Salvar
-    pollutant_data.to_parquet(
-        os.path.join(parquet_path, f"{poluente}.parquet"),
-        index=False
-    )
\ No newline at end of file
+# O pool de processos reimporta este script nos workers (spawn no Windows)
+if __name__ == '__main__':
+    main()
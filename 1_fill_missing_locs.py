@@ -1,72 +1,70 @@
 import polars as pl
 import os
 
-data_folder = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data_poluentes_parquet'
-
-poluentes = ['CO', 'MP2.5', 'MP10', 'NO2', 'O3', 'SO2']
-
-estacoes_sem_coord = set()
-
-for poluente in poluentes:
-    print('checando poluente')
-    # Carrega o arquivo parquet
-    data_path = os.path.join(data_folder, f'{poluente}.parquet')
-    data = pl.read_parquet(data_path, columns=['Estacao'])
-
-    # Cria as colunas Latitude e Longitude
-
-    data = data.with_columns([
-        pl.lit(None).alias('Latitude'),
-        pl.lit(None).alias('Longitude')
-    ])
-
-    # Filtra linhas com LATITUDE ou LONGITUDE nulas
-    missing_coords = data.filter(
-        pl.col('Latitude').is_null() | pl.col('Longitude').is_null()
-    )
-
-    # Extrai estações únicas e adiciona ao set
-    estacoes = missing_coords.select('Estacao').unique().to_series().to_list()
-    estacoes_sem_coord.update(estacoes)
-    print('terminou de checar o poluente')
-
-# Converte o set em DataFrame Polars
-df_estacoes_sem_coord = pl.DataFrame({'Estacao': list(estacoes_sem_coord)})
-
-# adicionando as coordenadas faltantes aos dataframes -------------------
-
-# Caminho do arquivo de coordenadas
-coords_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\support_data\Mapa de estações de monitoramento_data.csv'
-coords_df = pl.read_csv(coords_path, separator=';')
-
-# Renomeia a coluna 'Estacao1' para 'Estacao' para facilitar o join
-coords_df = coords_df.rename({'Estacao1': 'Estacao'})
-
-# Mantém só as colunas relevantes
-coords_df = coords_df.select(['Estacao', 'Latitude', 'Longitude'])
-
-# Caminho dos resultados parciais
-path_locs_parciais = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data_poluentes_parquet'
-lista_poluentes = ['O3', 'SO2']
-
+from esquemas import validar_parquet, categorizar
+from estacoes import carregar_dimensao, ler_mapa_estacoes, ler_latlon_2024, resolver_sem_coordenadas
+
+# Dimensão de estações gerada por _add_coords.py (coordenadas do Mapa de estações
+# e, na falta, do levantamento Monitoramento_QAr_BR_latlon_2024)
+dim_estacoes_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dim_estacoes.parquet'
+lat_lon_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\support_data\Mapa de estações de monitoramento_data.csv'
+latlon_2024_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\support_data\Monitoramento_QAr_BR_latlon_2024.csv'
+# Cache das buscas por nome aproximado e relatório das estações não resolvidas
+cache_resolucao_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\cache_resolucao_estacoes.csv'
+relatorio_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\estacoes_nao_resolvidas.csv'
+# Propostas por nome aproximado: preencher Confirmada com 'sim' nas corretas e rodar de novo
+revisao_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\revisao_estacoes_aproximadas.csv'
+
+# Estações sem coordenadas pelo nome exato: busca o nome mais parecido nos dois catálogos
+dim_estacoes, relatorio = resolver_sem_coordenadas(
+    carregar_dimensao(dim_estacoes_path),
+    ler_mapa_estacoes(lat_lon_path),
+    ler_latlon_2024(latlon_2024_path),
+    cache_resolucao_path,
+    revisao_path
+)
+dim_estacoes = categorizar(dim_estacoes)
+dim_estacoes.to_parquet(dim_estacoes_path, index=False)
+
+print(f"{relatorio['Resolvida'].sum()} de {len(relatorio)} estações sem coordenadas resolvidas por nome aproximado confirmado:")
+print(relatorio[relatorio['Resolvida']].to_string(index=False))
+
+pendentes = relatorio[relatorio['Situacao'] == 'pendente']
+print(f"{len(pendentes)} proposta(s) aguardando confirmação em {revisao_path}:")
+print(pendentes.to_string(index=False))
+
+nao_resolvidas = relatorio[~relatorio['Resolvida']]
+nao_resolvidas.to_csv(relatorio_path, index=False)
+print(f'{len(nao_resolvidas)} de {len(dim_estacoes)} estações continuam sem coordenadas -> {relatorio_path}')
+print(nao_resolvidas.to_string(index=False))
+
+# mantendo só as estações com coordenadas -------------------
+
+dim_estacoes = pl.from_pandas(dim_estacoes)
+ids_com_coord = dim_estacoes.filter(
+    pl.col('Latitude').is_not_null() & pl.col('Longitude').is_not_null()
+)['station_id']
+
+# Dados horários com station_id (saída de _add_coords.py)
 path_locs_completas = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\resultados_poluentes_parquet_loc'
+lista_poluentes = ['O3', 'SO2']
 
 for poluente in lista_poluentes:
-    print('fazendo join')
-    path_doc = os.path.join(path_locs_parciais, f'{poluente}.parquet')
-
-    # Carrega os dados
-    df_loc_parcial = pl.read_parquet(path_doc)
+    print('filtrando estações com coordenadas')
 
-    # Faz o join com coordenadas
-    df_loc_parcial = df_loc_parcial.join(coords_df, on='Estacao', how='left')
+    file_path = os.path.join(path_locs_completas, f'{poluente}.parquet')
+    validar_parquet(file_path, 'horario')
 
-    # seleciona apenas linhas onde Latitude e Longitude não são nulas
-    df_loc_parcial = df_loc_parcial.filter(
-        (pl.col("Latitude").is_not_null()) & (pl.col("Longitude").is_not_null())
+    # seleciona apenas linhas de estações com Latitude e Longitude na dimensão
+    df_loc_parcial = (
+        pl.scan_parquet(file_path)
+        .filter(pl.col('station_id').is_in(ids_com_coord.implode()))
+        .collect()
     )
 
-    # (Opcional) Salva o resultado com coordenadas incluídas
-    df_loc_parcial.write_parquet(os.path.join(path_locs_completas, f'{poluente}_result_com_coords.parquet'))
+    # (Opcional) Salva o resultado só com estações que têm coordenadas
+    output_path = os.path.join(path_locs_completas, f'{poluente}_result_com_coords.parquet')
+    df_loc_parcial.write_parquet(output_path)
+    validar_parquet(output_path, 'horario')
 
-    print(f'{poluente}: join com coordenadas completo.')
\ No newline at end of file
+    print(f'{poluente}: filtro por coordenadas completo.')
@@ -1,13 +1,58 @@
 import polars as pl
+import pyarrow.parquet as pq
 import os
 import math
+import heapq
+
+from esquemas import categorizar, validar_parquet
 
 # ========== CONFIGURATION ==========
 input_folder = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\resultados_poluentes_parquet_loc'
 output_folder = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_chunks_com_loc'
-n_splits = 5  # Number of chunks
+linhas_por_chunk = 5_000_000  # Tamanho-alvo de cada chunk; o número de chunks sai do total de linhas
+mb_por_chunk = None  # Alvo alternativo em MB (Parquet descomprimido); com os dois, vale o que der chunks menores
+linhas_por_row_group = 100_000  # row groups ordenados por estação: filtros por station_id pulam os demais
+nome_manifesto = 'manifesto_estacoes.csv'  # station_id -> arquivo do chunk, em cada subpasta
 # ===================================
 
+
+def distribuir_estacoes(linhas_por_estacao, n_chunks):
+    """
+    Distribui as estações entre `n_chunks` por bin packing guloso: da maior
+    para a menor, cada estação vai para o chunk com menos linhas até agora.
+
+    Parameters:
+        linhas_por_estacao (dict): station_id -> número de linhas.
+        n_chunks (int): número de chunks.
+
+    Returns:
+        list: para cada chunk, a lista ordenada de station_id.
+    """
+    chunks = [(0, i, []) for i in range(n_chunks)]
+    heapq.heapify(chunks)
+    for estacao, linhas in sorted(linhas_por_estacao.items(), key=lambda item: (-item[1], item[0])):
+        total, i, estacoes = heapq.heappop(chunks)
+        estacoes.append(estacao)
+        heapq.heappush(chunks, (total + linhas, i, estacoes))
+    return [sorted(estacoes) for _, _, estacoes in sorted(chunks, key=lambda chunk: chunk[1]) if estacoes]
+
+
+def linhas_alvo(file_path):
+    """
+    Linhas por chunk: `linhas_por_chunk` ou, se `mb_por_chunk` estiver
+    definido, as linhas que cabem nele pelo tamanho médio de uma linha nos
+    metadados Parquet (total_byte_size descomprimido), o menor dos dois.
+    """
+    if mb_por_chunk is None:
+        return linhas_por_chunk
+    metadados = pq.read_metadata(file_path)
+    if metadados.num_rows == 0:
+        return linhas_por_chunk
+    total = sum(metadados.row_group(i).total_byte_size for i in range(metadados.num_row_groups))
+    por_tamanho = max(1, int(mb_por_chunk * 1024 ** 2 / (total / metadados.num_rows)))
+    return min(linhas_por_chunk, por_tamanho) if linhas_por_chunk else por_tamanho
+
+
 os.makedirs(output_folder, exist_ok=True)
 
 for file_name in os.listdir(input_folder):
@@ -18,25 +63,44 @@ for file_name in os.listdir(input_folder):
         print(f"\nProcessando {file_name}...")
 
         # Lê o DataFrame completo
-        df = pl.read_parquet(file_path)
+        validar_parquet(file_path, 'horario')
+        df = categorizar(pl.read_parquet(file_path))
 
-        # Obtém todas as estações únicas
-        estacoes = df.select("Estacao").unique().to_series().to_list()
-        estacoes.sort()  # Para garantir consistência
+        # Linhas por estação (station_id da dimensão de estações)
+        linhas_por_estacao = dict(df.group_by("station_id").len().iter_rows())
 
-        # Divide as estações em n_splits grupos quase iguais
-        tamanho_grupo = math.ceil(len(estacoes) / n_splits)
-        estacoes_split = [estacoes[i:i + tamanho_grupo] for i in range(0, len(estacoes), tamanho_grupo)]
+        # Chunks balanceados por número de linhas, não por número de estações:
+        # uma estação grande não deixa um chunk várias vezes maior que os outros
+        n_chunks = max(1, math.ceil(df.height / linhas_alvo(file_path)))
+        estacoes_split = distribuir_estacoes(linhas_por_estacao, n_chunks)
 
-        # Cria subpasta para o arquivo
+        # Cria subpasta para o arquivo; chunks de uma execução anterior saem,
+        # já que o número de chunks muda com o tamanho dos dados
         subfolder = os.path.join(output_folder, base_name)
         os.makedirs(subfolder, exist_ok=True)
+        for antigo in os.listdir(subfolder):
+            if antigo.startswith('part_') and antigo.endswith('.parquet'):
+                os.remove(os.path.join(subfolder, antigo))
 
+        manifesto = []
         for i, grupo_estacoes in enumerate(estacoes_split):
             # Filtra o DataFrame com base nas estações do grupo
-            df_chunk = df.filter(pl.col("Estacao").is_in(grupo_estacoes))
+            # Ordenado como o dataset horário, para que as estatísticas min/max
+            # de cada row group cubram poucas estações
+            df_chunk = (
+                df.filter(pl.col("station_id").is_in(grupo_estacoes))
+                .sort(['station_id', 'Data_Hora'], maintain_order=True)
+            )
 
             output_path = os.path.join(subfolder, f'part_{i+1}.parquet')
-            df_chunk.write_parquet(output_path)
+            df_chunk.write_parquet(output_path, row_group_size=linhas_por_row_group, statistics=True)
+            validar_parquet(output_path, 'horario')
+            manifesto.extend(
+                {'station_id': estacao, 'Arquivo': f'part_{i+1}.parquet', 'Linhas': linhas_por_estacao[estacao]}
+                for estacao in grupo_estacoes
+            )
 
             print(f"  -> Salvo {output_path} ({df_chunk.height} linhas, {len(grupo_estacoes)} estações)")
+
+        # Manifesto station_id -> chunk: leitores abrem só o arquivo da estação
+        pl.DataFrame(manifesto).sort("station_id").write_csv(os.path.join(subfolder, nome_manifesto))
@@ -3,11 +3,20 @@ import pandas as pd
 import pymannkendall as mk
 from tqdm import tqdm
 
+from esquemas import validar_parquet, validar_parquets
+from estacoes import carregar_dimensao, anexar_estacoes
+from completude import dias_validos
+
 # Configurações
 INPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_chunks_com_loc"
+DIM_ESTACOES_PATH = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dim_estacoes.parquet"
+CUBO_PATH = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\cubo_completude"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_testes_mannkendall_ano"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Estado, Estacao e coordenadas (float) de cada station_id
+dim_estacoes = carregar_dimensao(DIM_ESTACOES_PATH)
+
 def calculate_trend(series):
     """Executa o teste de Mann-Kendall e retorna um resumo"""
     if len(series) < 3:
@@ -51,14 +60,15 @@ for poluente_dir in os.listdir(INPUT_DIR):
         print(f"  Nenhum arquivo encontrado para {poluente_dir}")
         continue
     
+    # Falha antes de ler qualquer arquivo se algum não segue o esquema
+    validar_parquets(all_files, 'horario')
+    
     # Carregar e combinar todos os arquivos do poluente
     df_list = []
     for file_path in tqdm(all_files, desc=f"Carregando {poluente_dir}"):
         try:
-            df_chunk = pd.read_parquet(file_path)
-            # Verificar se a coluna Estado existe
-            if 'Estado' not in df_chunk.columns:
-                print(f"  ATENÇÃO: 'Estado' não encontrado em {file_path}")
+            # Só as colunas usadas; atributos da estação vêm da dimensão
+            df_chunk = pd.read_parquet(file_path, columns=['station_id', 'Data_Hora', 'Valor_Padronizado'])
             df_list.append(df_chunk)
         except Exception as e:
             print(f"  Erro ao carregar {file_path}: {str(e)}")
@@ -69,68 +79,49 @@ for poluente_dir in os.listdir(INPUT_DIR):
     
     df = pd.concat(df_list, ignore_index=True)
     
-    # Converter coordenadas para float
-    for coord in ['Latitude', 'Longitude']:
-        if coord in df.columns and df[coord].dtype == 'object':
-            df[coord] = df[coord].str.replace(',', '.').astype(float)
-    
     # Passo 1: Agregar dados diariamente (média diária)
     print(f"Aggregando dados diariamente para {poluente_dir}...")
     
-    # Garantir que temos coluna de data
-    if 'Data_Hora' in df.columns:
-        df['Data'] = pd.to_datetime(df['Data_Hora']).dt.date
-    elif 'Data' in df.columns:
-        df['Data'] = pd.to_datetime(df['Data']).dt.date
-    else:
+    # Data_Hora vem tipada da ingestão (com a hora 24:00 já no dia seguinte)
+    if 'Data_Hora' not in df.columns:
         print(f"  Nenhuma coluna de data encontrada para {poluente_dir}")
         continue
     
-    # Verificar se a coluna Estado está presente
-    if 'Estado' not in df.columns:
-        print(f"  ERRO CRÍTICO: Coluna 'Estado' não encontrada para {poluente_dir}")
-        continue
+    # 1. Criar colunas auxiliares a partir de Data_Hora, sem reconverter datas
+    df['Dia'] = df['Data_Hora'].dt.tz_localize(None).dt.normalize()  # dia local, sem hora
 
-    # 1. Converter Data para datetime e criar colunas auxiliares
-    df['Data'] = pd.to_datetime(df['Data'])
-    df['Ano'] = df['Data'].dt.year
-    df['Mes'] = df['Data'].dt.month
-    df['Dia'] = df['Data'].dt.date  # apenas parte da data, sem hora
+    # 2. Dias válidos (≥ 18 horas) em meses válidos (≥ 20 dias) vêm do cubo de
+    # completude: um join filtra as horas, sem contar horas por dia de novo
+    validos = dias_validos(CUBO_PATH, poluente_dir.replace('_result_com_coords', ''), dim_estacoes)
+    df = df.merge(validos, on=['station_id', 'Dia'], how='inner')
 
-    # 2. Etapa hora → dia: média diária se dia tiver ≥ 18 horas válidas
-    df_valid_hours = (
-        df.groupby(['Estado', 'Estacao', 'Latitude', 'Longitude', 'Dia'])
+    # 3. Etapa hora → dia → mês: média dos dias válidos de cada mês válido
+    df_valid_days = (
+        df.groupby(['station_id', 'Ano', 'Mes', 'Dia'])
         .agg(
             Valor_Medio_Dia=('Valor_Padronizado', 'mean'),
-            n_horas=('Valor_Padronizado', 'count')
+            n_dias_validos=('Dias_Validos', 'first')
         )
         .reset_index()
     )
-
-    # manter apenas dias com ≥ 18 horas válidas
-    df_valid_days = df_valid_hours[df_valid_hours['n_horas'] >= 18].copy()
-    df_valid_days['Ano'] = pd.to_datetime(df_valid_days['Dia']).dt.year
-    df_valid_days['Mes'] = pd.to_datetime(df_valid_days['Dia']).dt.month
-
-    # 3. Etapa dia → mês: média mensal se mês tiver ≥ 20 dias válidos
     monthly_agg = (
         df_valid_days
-        .groupby(['Estado', 'Estacao', 'Latitude', 'Longitude', 'Ano', 'Mes'])
+        .groupby(['station_id', 'Ano', 'Mes'])
         .agg(
             Valor_Padronizado=('Valor_Medio_Dia', 'mean'),
-            n_dias_validos=('Dia', 'nunique')
+            n_dias_validos=('n_dias_validos', 'first')
         )
         .reset_index()
     )
 
-    # manter apenas meses com ≥ 20 dias válidos
-    monthly_agg = monthly_agg[monthly_agg['n_dias_validos'] >= 20].copy()
+    # Atributos da estação só depois da agregação; estações sem coordenadas ficam de fora
+    monthly_agg = anexar_estacoes(monthly_agg, dim_estacoes).dropna(subset=['Latitude', 'Longitude'])
 
     
     # Passo 2: Calcular tendências usando dados diários agregados
     trends = []
     # Agrupar por Estado + Estação (MODIFICADO)
-    grouped = monthly_agg.groupby(['Estado', 'Estacao', 'Latitude', 'Longitude'])
+    grouped = monthly_agg.groupby(['Estado', 'Estacao', 'Latitude', 'Longitude'], observed=True)
     
     print(f"Calculando tendências para {len(grouped)} estações usando dados diários...")
     for (estado, estacao, lat, lon), group in tqdm(grouped, desc=f"Processando {poluente_dir}"):
@@ -163,6 +154,7 @@ for poluente_dir in os.listdir(INPUT_DIR):
     trends_df = pd.DataFrame(trends)
     output_path = os.path.join(OUTPUT_DIR, f"mk_{poluente_dir}.parquet")
     trends_df.to_parquet(output_path)
+    validar_parquet(output_path, 'mk')
     print(f"  Tendências salvas: {output_path}")
     print(f"  Estações processadas: {len(trends_df)}")
     print(f"  Estados representados: {trends_df['Estado'].nunique()}")  # NOVA ESTATÍSTICA
@@ -1,8 +1,11 @@
 import os
 import pandas as pd
 import polars as pl
-import numpy as np
-from datetime import timedelta
+
+from esquemas import categorizar, validar_parquet, validar_parquets
+from estacoes import carregar_dimensao
+from agregacao import CacheAgregacoes, registrar_periodos, regras_periodos, FRACAO_MINIMA_MEDIA_MOVEL
+from excedencias import PADROES, expressao_mascara, tabela_limites
 
 def extrair_datas_unicas(df):
     """Retorna um DataFrame com os valores únicos da coluna 'Data', ordenados."""
@@ -10,181 +13,119 @@ def extrair_datas_unicas(df):
     datas_ordenadas = sorted(datas_unicas)
     return pd.DataFrame(datas_ordenadas, columns=['Data'])
 
-def aggregate_data(df, periodo):
-    # converter para numerico
-    df['Valor_Padronizado'] = pd.to_numeric(df['Valor_Padronizado'], errors='coerce')
-    
-    # MODIFICADO: Incluir 'Estado' em todos os agrupamentos
-    if periodo == '24h':
-        df['Date'] = df['Data_Hora'].dt.date
-        aggregated = df.groupby(['Estado', 'Estacao', 'Date']).agg(  # Adicionado 'Estado'
-            Valor_Padronizado=('Valor_Padronizado', 'max'),
-            Latitude=('Latitude', 'first'),
-            Longitude=('Longitude', 'first')
-        ).reset_index()
-        
-    elif periodo == 'med. arit. anual':
-        df['Year'] = df['Data_Hora'].dt.year
-        aggregated = df.groupby(['Estado', 'Estacao', 'Year']).agg(  # Adicionado 'Estado'
-            Valor_Padronizado=('Valor_Padronizado', 'mean'),
-            Latitude=('Latitude', 'first'),
-            Longitude=('Longitude', 'first')
-        ).reset_index()
-        
-    elif periodo == 'max. med. hor. do dia (1h)':
-        df['Date'] = df['Data_Hora'].dt.date
-        aggregated = df.groupby(['Estado', 'Estacao', 'Date', 'Hora']).agg(  # Adicionado 'Estado'
-            Valor_Padronizado=('Valor_Padronizado', 'mean'),
-            Latitude=('Latitude', 'first'),
-            Longitude=('Longitude', 'first')
-        ).reset_index()
-        aggregated = aggregated.groupby(['Estado', 'Estacao', 'Date']).agg(  # Adicionado 'Estado'
-            Valor_Padronizado=('Valor_Padronizado', 'max'),
-            Latitude=('Latitude', 'first'),
-            Longitude=('Longitude', 'first')
-        ).reset_index()
-        
-    elif periodo == 'max. med. mov. do dia (8h)':
-        df = df.sort_values(['Estado', 'Estacao', 'Data_Hora'])  # Adicionado 'Estado'
-        df['rolling_8h'] = (
-            df.groupby(['Estado', 'Estacao'])['Valor_Padronizado']  # Adicionado 'Estado'
-            .rolling(8, min_periods=1).mean()
-            .reset_index(level=[0,1], drop=True))
-        df['Date'] = df['Data_Hora'].dt.date
-        aggregated = df.groupby(['Estado', 'Estacao', 'Date']).agg(  # Adicionado 'Estado'
-            Valor_Padronizado=('rolling_8h', 'max'),
-            Latitude=('Latitude', 'first'),
-            Longitude=('Longitude', 'first')
-        ).reset_index()
-        
-    elif periodo == 'med. geom. anual':
-        df['Year'] = df['Data_Hora'].dt.year
-        aggregated = df.groupby(['Estado', 'Estacao', 'Year']).agg(  # Adicionado 'Estado'
-            Valor_Padronizado=('Valor_Padronizado', lambda x: np.exp(np.mean(np.log(x)))),
-            Latitude=('Latitude', 'first'),
-            Longitude=('Longitude', 'first')
-        ).reset_index()
-        
-    else:
-        raise ValueError(f"Unsupported period: {periodo}")
-    
-    return aggregated
-
-def corrigir_data_hora(df):
-    df = df.copy()
-
-    # Step 1: Create boolean mask for '24:00:00'
-    mask_24h = df['Hora'] == '24:00:00'
-
-    # Step 2: Prepare corrected date column
-    df['Data_corrigida'] = pd.to_datetime(df['Data'], errors='coerce')
-    df.loc[mask_24h, 'Data_corrigida'] += timedelta(days=1)
-
-    # Step 3: Replace "24:00:00" with "00:00:00"
-    df['Hora_corrigida'] = df['Hora'].where(~mask_24h, '00:00:00')
-
-    # Step 4: Combine and convert
-    df['Data_Hora'] = pd.to_datetime(
-        df['Data_corrigida'].astype(str) + ' ' + df['Hora_corrigida'],
-        errors='coerce'
-    )
-
-    return df
-
 path_dados = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_chunks_com_loc'
 path_data_funcionamento = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data_funcionamento.csv'
 path_limite_conama = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\limites_conama_506.csv'
+path_dim_estacoes = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dim_estacoes.parquet'
+path_violacoes = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo'
+# Fração das horas de uma média móvel (ex.: 8h) que precisam ter valor; 1/8 aceita qualquer janela com um valor.
+# A média de 8h usa as 8 horas de relógio anteriores (não as 8 últimas linhas, como na versão original com
+# rolling(8, min_periods=1)), então as excedências de 8h mudam em séries com falhas. A regra usada vai
+# para as colunas Media_Movel_Horas e Horas_Minimas de limites.csv.
+fracao_minima_media_movel = FRACAO_MINIMA_MEDIA_MOVEL
 
 data_funcionamento = pl.read_csv(path_data_funcionamento, separator=',')
 limite_conama = pl.read_csv(path_limite_conama, separator=';')
+# Períodos novos podem ser declarados na própria tabela de limites (agregacao.py)
+registrar_periodos(limite_conama)
+dim_estacoes = carregar_dimensao(path_dim_estacoes).set_index('station_id')
+
+def lotes_do_poluente(pol_dir, all_files):
+    """
+    Divide os arquivos do poluente em lotes que contêm estações inteiras.
+
+    Com o manifesto de 1_split_parquets.py cada chunk é um lote (toda estação
+    está em um único chunk); sem ele, o lote é o poluente inteiro.
+
+    Returns:
+        list: [(arquivos do lote, rótulo para o log), ...]
+    """
+    manifesto_path = os.path.join(pol_dir, 'manifesto_estacoes.csv')
+    if not os.path.exists(manifesto_path):
+        return [(all_files, 'todos os arquivos')]
+    arquivos = sorted(pl.read_csv(manifesto_path)['Arquivo'].unique().to_list())
+    return [([os.path.join(pol_dir, arquivo)], arquivo) for arquivo in arquivos]
 
 def run_all(poluente, limite_conama, data_funcionamento):
-    # Obter todas as estações únicas para o poluente
     pol_dir = os.path.join(path_dados, poluente)
     all_files = [os.path.join(pol_dir, f) for f in os.listdir(pol_dir) if f.endswith('.parquet')]
+    validar_parquets(all_files, 'horario')
 
     poluente = poluente.split('_')[0]
     if poluente == 'MP2.5':
         poluente = 'MP2,5'
     
-    # MODIFICADO: Incluir 'Estado' na seleção de colunas
-    station_query = pl.scan_parquet(all_files).select(['Estado', 'Estacao']).unique().collect()
-    stations = station_query[['Estado', 'Estacao']].unique().to_dicts()
-    
-    print(f'Encontradas {len(stations)} estações para {poluente}')
+    # Limites do poluente ('-' = sem limite naquela fase)
+    limites_pol = tabela_limites(limite_conama).filter(pl.col('Poluente') == poluente)
     
-    # Preparar DataFrames auxiliares
-    limite_conama_pd = limite_conama.to_pandas()
-    for col in ['PI-1', 'PI-2', 'PI-3', 'PI-4', 'PF']:
-        limite_conama_pd[col] = pd.to_numeric(limite_conama_pd[col], errors='coerce')
+    # Estado, Estacao e coordenadas de cada station_id vêm da dimensão
+    atributos = pl.from_pandas(
+        dim_estacoes[['Estado', 'Estacao', 'Latitude', 'Longitude']]
+        .astype({'Estado': str, 'Estacao': str})
+        .reset_index()
+    )
     
     all_results = []
     
-    # Processar cada estação individualmente
-    for i, station_info in enumerate(stations):
-        estado = station_info['Estado']
-        station = station_info['Estacao']
-        print(f'Processando estação {i+1}/{len(stations)}: {estado} - {station}')
-        
-        # MODIFICADO: Filtrar por estado e estação
-        station_dados = pl.concat([
-            pl.scan_parquet(file)
-            .filter((pl.col('Estado') == estado) & (pl.col('Estacao') == station))
-            .collect()
-            for file in all_files
-        ]).unique()
-        
-        if station_dados.is_empty():
-            print(f"  Sem dados para estação {station} em {estado}")
-            continue
-        
-        # Converter para pandas e processar
-        station_df = station_dados.to_pandas()
-        station_df = corrigir_data_hora(station_df)
+    # Uma leitura por lote, agregando todas as estações do lote de uma vez.
+    # O cache resume o lote por dia uma vez só, deriva os períodos desse
+    # resumo e memoriza cada período para as linhas de limite que o repetem
+    lotes = lotes_do_poluente(pol_dir, all_files)
+    for i, (arquivos, rotulo) in enumerate(lotes):
+        # Linhas repetidas já foram removidas na ingestão (ingestao.deduplicar)
+        lote = (
+            pl.scan_parquet(arquivos)
+            .select(['station_id', 'Data_Hora', 'Valor_Padronizado'])
+            .sort(['station_id', 'Data_Hora'])
+        )
+        print(f'Processando lote {i+1}/{len(lotes)}: {rotulo}')
+        agregacoes = CacheAgregacoes(lote, fracao_minima_media_movel)
         
-        # Verificar se temos o poluente necessário
-        if station_df.empty:
-            print(f"  Sem dados do poluente {poluente} para estação {station} em {estado}")
-            continue
-            
-        # Obter os períodos aplicáveis
-        limites_pol = limite_conama_pd[limite_conama_pd['Sigla'] == poluente]
-        station_results = []
-        
-        for _, row in limites_pol.iterrows():
+        for ordem_limite, row in enumerate(limites_pol.iter_rows(named=True)):
             periodo = row['Periodo']
             try:
-                aggregated = aggregate_data(station_df, periodo)
+                aggregated = agregacoes.agregar(periodo)
             except ValueError as e:
-                print(f"  Skipping {estado} - {station} ({periodo}): {e}")
+                print(f"  Skipping {rotulo} ({periodo}): {e}")
                 continue
             
-            # Adicionar limites e excedências
-            for limit_col in ['PI-1', 'PI-2', 'PI-3', 'PI-4', 'PF']:
-                aggregated[limit_col] = row[limit_col]
-                aggregated[f'exceed_{limit_col}'] = aggregated['Valor_Padronizado'] > aggregated[limit_col]
-            
-            aggregated['Poluente'] = poluente
-            aggregated['Periodo'] = periodo
-            station_results.append(aggregated)
-        
-        if station_results:
-            station_final = pd.concat(station_results, ignore_index=True)
-            all_results.append(station_final)
+            chave = aggregated.columns[1]
+            all_results.append(
+                aggregated.join(atributos, on='station_id', maintain_order='left')
+                .with_columns(
+                    # Excedências como máscara de bits; os limites ficam em limites.csv
+                    expressao_mascara(pl.col('Valor_Padronizado'), row).alias('Excedencias'),
+                    pl.lit(poluente).alias('Poluente'),
+                    pl.lit(periodo).alias('Periodo'),
+                    pl.lit(ordem_limite).alias('ordem_limite')
+                )
+                .select(
+                    ['station_id', 'Estado', 'Estacao', chave, 'Valor_Padronizado', 'Latitude', 'Longitude',
+                     'Excedencias', 'Poluente', 'Periodo', 'ordem_limite']
+                )
+            )
     
     if not all_results:
         print(f"Nenhum resultado para {poluente}")
         return
     
-    final_results = pd.concat(all_results, ignore_index=True)
+    # Ordem de linhas: por station_id e, dentro da estação, pela ordem dos
+    # limites (cada período já sai em ordem cronológica)
+    final_results = (
+        pl.concat(all_results, how='diagonal')
+        .sort(['station_id', 'ordem_limite'], maintain_order=True)
+        .drop(['station_id', 'ordem_limite'])
+    )
+    
+    final_results = categorizar(final_results)
     
     # Salvar resultados
-    output_dir = os.path.join(r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo')
-    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(path_violacoes, exist_ok=True)
     
     # Salvar combinado
-    combined_path = os.path.join(output_dir, f'{poluente}_combinado.parquet')
-    final_results.to_parquet(combined_path)
+    combined_path = os.path.join(path_violacoes, f'{poluente}_combinado.parquet')
+    final_results.write_parquet(combined_path)
+    validar_parquet(combined_path, 'violacoes')
     print(f'Resultado combinado salvo: {combined_path}')
 
 # Obter lista de poluentes (subdiretórios)
@@ -194,4 +135,14 @@ poluentes_de_interesse = [d for d in os.listdir(path_dados)
 for poluente in poluentes_de_interesse:
     print(f"\nIniciando processamento para {poluente}")
     run_all(poluente, limite_conama, data_funcionamento)
-    print(f"Concluído processamento para {poluente}")
\ No newline at end of file
+    print(f"Concluído processamento para {poluente}")
+
+# Tabela de limites por (Poluente, Periodo) que dá sentido aos bits de 'Excedencias',
+# com a regra de agregação de cada período (horas da média móvel e mínimo de horas válidas)
+os.makedirs(path_violacoes, exist_ok=True)
+limites_path = os.path.join(path_violacoes, 'limites.csv')
+regras = regras_periodos(fracao_minima_media_movel)
+tabela_limites(limite_conama).join(regras, on='Periodo', how='left', maintain_order='left').write_csv(limites_path)
+print(f'Limites dos padrões {PADROES} salvos: {limites_path}')
+for periodo, horas, minimo in regras.filter(pl.col('Media_Movel_Horas') > 1).select('Periodo', 'Media_Movel_Horas', 'Horas_Minimas').iter_rows():
+    print(f"  '{periodo}': média das {horas} horas de relógio anteriores, nula com menos de {minimo} horas válidas")
@@ -2,6 +2,9 @@ import os
 import pandas as pd
 import numpy as np
 
+from esquemas import validar_parquet
+from excedencias import PADROES, excede
+
 DATA_DIR = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo'
 OUTPUT_DIR = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_sincronicidade'
 
@@ -78,22 +81,22 @@ for file_name in os.listdir(DATA_DIR):
     
     poluente = file_name.split('.')[0].split('_')[0]
     file_path = os.path.join(DATA_DIR, file_name)
+    validar_parquet(file_path, 'violacoes')
     df = pd.read_parquet(file_path)
 
-    # Conversões de tipo
-    df['Latitude'] = df['Latitude'].str.replace(',', '.').astype(float)
-    df['Longitude'] = df['Longitude'].str.replace(',', '.').astype(float)
+    # Conversões de tipo (Latitude e Longitude já são float pelo esquema 'violacoes')
     df['Date'] = pd.to_datetime(df['Date'])
 
-    for col in df.columns:
-        if col.startswith('exceed_'):
-            df_violation = df[df[col] == True]
-            df_resultado_sincronia = calcular_SC(df_violation)
+    # um bit da máscara 'Excedencias' por padrão
+    for padrao in PADROES:
+        df_violation = df[excede(df['Excedencias'], padrao)]
+        df_resultado_sincronia = calcular_SC(df_violation)
 
-            # save dataframe as parquet on output directory
-            output_file = os.path.join(OUTPUT_DIR, f'sincronicidade_{poluente}_{col.split('_')[1]}.parquet')
-            df_resultado_sincronia.to_parquet(output_file, index=False)
-            print(f'Sincronicidade calculada e salva para {poluente} - {col.split("_")[1]} em {output_file}')
+        # save dataframe as parquet on output directory
+        output_file = os.path.join(OUTPUT_DIR, f'sincronicidade_{poluente}_{padrao}.parquet')
+        df_resultado_sincronia.to_parquet(output_file, index=False)
+        validar_parquet(output_file, 'sincronicidade')
+        print(f'Sincronicidade calculada e salva para {poluente} - {padrao} em {output_file}')
 
 
 
@@ -2,6 +2,8 @@ import os
 import pandas as pd
 import numpy as np
 
+from esquemas import validar_parquet
+
 # Configurações
 INPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_testes_mannkendall_ano"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\graphtable_analise_tendencias_ano"
@@ -25,6 +27,7 @@ for arquivo in arquivos:
         poluente = arquivo.split('_')[1].split('.')[0]
         
         # Carregar dados
+        validar_parquet(os.path.join(INPUT_DIR, arquivo), 'mk')
         df = pd.read_parquet(os.path.join(INPUT_DIR, arquivo))
         
         # Verificar se temos dados
@@ -6,6 +6,8 @@ import matplotlib as mpl
 import numpy as np
 from shapely.geometry import Point
 
+from esquemas import validar_parquet
+
 # Configurações
 INPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_testes_mannkendall"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\plots_tendencia"
@@ -48,6 +50,7 @@ for file_name in os.listdir(INPUT_DIR):
         continue
     
     file_path = os.path.join(INPUT_DIR, file_name)
+    validar_parquet(file_path, 'mk')
     trends_df = pd.read_parquet(file_path)
     poluente = trends_df['Poluente'].iloc[0]
     
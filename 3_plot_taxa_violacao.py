@@ -5,6 +5,9 @@ import geopandas as gpd
 import matplotlib as mpl
 import numpy as np
 
+from esquemas import validar_parquet
+from excedencias import PADROES, contar_excedencias
+
 # Configurações
 DATA_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\plots_taxa_violacao"
@@ -51,6 +54,7 @@ for file_name in os.listdir(DATA_DIR):
         continue
     
     file_path = os.path.join(DATA_DIR, file_name)
+    validar_parquet(file_path, 'violacoes')
     df = pd.read_parquet(file_path)
     
     # Corrigir coordenadas
@@ -60,18 +64,20 @@ for file_name in os.listdir(DATA_DIR):
     
     poluente = df['Poluente'].iloc[0]
     
-    # Identificar todos os padrões disponíveis
-    padroes = [col for col in df.columns if col.startswith('exceed_')]
+    # Padrões da máscara 'Excedencias'; as violações de todos os padrões
+    # por estação saem de um único groupby
+    padroes = PADROES
+    contagens = contar_excedencias(df, ['Estacao', 'Latitude', 'Longitude'])
     
     # Processar cada padrão individualmente
     for padrao in padroes:
         print(f"Processando {poluente} - {padrao}...")
         
         # Agregar violações por estação
-        agg = df.groupby(['Estacao', 'Latitude', 'Longitude']).agg(
-            total_violacoes=(padrao, 'sum'),
-            total_medicoes=(padrao, 'count')
-        ).reset_index()
+        agg = contagens[['Estacao', 'Latitude', 'Longitude']].assign(
+            total_violacoes=contagens[padrao],
+            total_medicoes=contagens['Medicoes']
+        )
         
         # Remover estações sem coordenadas
         agg = agg.dropna(subset=['Latitude', 'Longitude'])
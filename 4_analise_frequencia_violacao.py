@@ -7,6 +7,9 @@ import geopandas as gpd
 import matplotlib as mpl
 from shapely.geometry import Point
 
+from esquemas import validar_parquet
+from excedencias import PADROES, excede, contar_excedencias
+
 # Configurações
 DATA_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\graphtable_frequencia_violacoes"
@@ -37,6 +40,7 @@ for file_name in os.listdir(DATA_DIR):
         continue
     
     file_path = os.path.join(DATA_DIR, file_name)
+    validar_parquet(file_path, 'violacoes')
     df = pd.read_parquet(file_path)
     poluente = df['Poluente'].iloc[0] if 'Poluente' in df.columns else file_name.split('_')[0]
 
@@ -45,8 +49,10 @@ for file_name in os.listdir(DATA_DIR):
             # Converter para string, substituir vírgula por ponto, depois para float
             df[coord_col] = df[coord_col].astype(str).str.replace(',', '.').astype(float)
     
-    # Identificar padrões
-    padroes = [col for col in df.columns if col.startswith('exceed_')]
+    # Padrões da máscara 'Excedencias'; as violações de todos os padrões
+    # por estação saem de um único groupby
+    padroes = PADROES
+    contagens = contar_excedencias(df, ['Estacao', 'Latitude', 'Longitude'])
     
     # Tabela para armazenar resultados
     resultados_gerais = []
@@ -55,7 +61,7 @@ for file_name in os.listdir(DATA_DIR):
     for padrao in padroes:
         # Calcular total de medições e violações
         total_medicoes = len(df)
-        total_violacoes = df[padrao].sum()
+        total_violacoes = excede(df['Excedencias'], padrao).sum()
         taxa = total_violacoes / total_medicoes * 100
         
         # Armazenar resultados gerais
@@ -68,10 +74,10 @@ for file_name in os.listdir(DATA_DIR):
         })
         
         # Calcular por estação
-        agg = df.groupby(['Estacao', 'Latitude', 'Longitude']).agg(
-            total_violacoes=(padrao, 'sum'),
-            total_medicoes=(padrao, 'count')
-        ).reset_index()
+        agg = contagens[['Estacao', 'Latitude', 'Longitude']].assign(
+            total_violacoes=contagens[padrao],
+            total_medicoes=contagens['Medicoes']
+        )
         
         agg['taxa_violacao'] = agg['total_violacoes'] / agg['total_medicoes'] * 100
         agg['Poluente'] = poluente
@@ -5,6 +5,9 @@ import seaborn as sns
 from calendar import month_abbr
 from matplotlib.ticker import MaxNLocator
 
+from esquemas import validar_parquet
+from excedencias import PADROES, contar_excedencias
+
 # Configurações
 DATA_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\graphtable_mensal_violacoes"
@@ -18,6 +21,7 @@ for file_name in os.listdir(DATA_DIR):
         continue
     
     file_path = os.path.join(DATA_DIR, file_name)
+    validar_parquet(file_path, 'violacoes')
     df = pd.read_parquet(file_path)
     poluente = df['Poluente'].iloc[0]
     
@@ -28,17 +32,20 @@ for file_name in os.listdir(DATA_DIR):
     df['Ano'] = df['Date'].dt.year
     df['Mes'] = df['Date'].dt.month
     
-    # Identificar padrões
-    padroes = [col for col in df.columns if col.startswith('exceed_')]
+    # Padrões da máscara 'Excedencias'; as contagens de todos os padrões
+    # saem de um groupby por (Ano, Mes) e de outro por Mes
+    padroes = PADROES
+    contagens_ano_mes = contar_excedencias(df, ['Ano', 'Mes'])
+    contagens_mes = contar_excedencias(df, ['Mes'])
     
     for padrao in padroes:
         nome_padrao = padrao.split('_')[-1]
         
         # Agregar violações por mês/ano
-        agg = df.groupby(['Ano', 'Mes']).agg(
-            total_violacoes=(padrao, 'sum'),
-            total_medicoes=(padrao, 'count')
-        ).reset_index()
+        agg = contagens_ano_mes[['Ano', 'Mes']].assign(
+            total_violacoes=contagens_ano_mes[padrao],
+            total_medicoes=contagens_ano_mes['Medicoes']
+        )
         
         agg['taxa_violacao'] = agg['total_violacoes'] / agg['total_medicoes'] * 100
         
@@ -110,10 +117,10 @@ for file_name in os.listdir(DATA_DIR):
             nome_padrao = padrao.split('_')[-1]
 
             # Agregar por mês
-            agg_padrao = df.groupby('Mes').agg(
-                violacoes=(padrao, 'sum'),
-                total=(padrao, 'count')
-            ).reset_index()
+            agg_padrao = contagens_mes[['Mes']].assign(
+                violacoes=contagens_mes[padrao],
+                total=contagens_mes['Medicoes']
+            )
 
             agg_padrao['nao_violacoes'] = agg_padrao['total'] - agg_padrao['violacoes']
             agg_padrao['percent_viol'] = agg_padrao['violacoes'] / agg_padrao['total'] * 100
@@ -8,11 +8,17 @@ from shapely.geometry import Point, box
 import contextily as ctx
 import matplotlib as mpl
 
+from esquemas import validar_parquet
+from excedencias import PADROES, excede, carregar_limites, anexar_limites
+
 # Configurações
 DATA_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\graphtable_analise_sazonalidade"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Limites de cada (Poluente, Periodo), gravados por 2_verificar_violacoes.py
+limites = carregar_limites(os.path.join(DATA_DIR, 'limites.csv'))
+
 # Dicionário para armazenar dados de MSI por estado (para boxplot combinado)
 msi_data = {}
 
@@ -43,7 +49,10 @@ for file_name in os.listdir(DATA_DIR):
     
     poluente = file_name.split('.')[0].split('_')[0]
     file_path = os.path.join(DATA_DIR, file_name)
+    validar_parquet(file_path, 'violacoes')
     df = pd.read_parquet(file_path)
+    # Colunas de limite (PI-1, ..., PF) para as linhas de referência dos gráficos
+    df = anexar_limites(df, limites)
     
     # CONVERSÃO CRÍTICA: Converter coordenadas para float
     for coord_col in ['Longitude', 'Latitude']:
@@ -65,17 +74,16 @@ for file_name in os.listdir(DATA_DIR):
 
     print(f"Gerando tabela de resumo para {poluente}...")
     
-    # Lista de colunas de violação
-    padroes_exceed = [col for col in df.columns if col.startswith('exceed_')]
-    padroes = [col.split('_')[1] for col in padroes_exceed]
+    # Padrões da máscara 'Excedencias'
+    padroes = PADROES
     
     # Criar tabela resumo
     resumo_data = []
     
     # Para cada padrão de violação
-    for padrao_col, padrao_nome in zip(padroes_exceed, padroes):
+    for padrao_nome in padroes:
         # Filtrar apenas violações deste padrão
-        violacoes = df[df[padrao_col] == 1]
+        violacoes = df[excede(df['Excedencias'], padrao_nome)]
         total_violacoes = len(violacoes)
         
         if total_violacoes > 0:
@@ -234,10 +242,10 @@ for file_name in os.listdir(DATA_DIR):
         df['Mes'] = df['Date'].dt.month
 
         # Calcular média mensal por estação
-        monthly = df.groupby(['Estacao', 'Mes'])['Valor_Padronizado'].mean().reset_index()
+        monthly = df.groupby(['Estacao', 'Mes'], observed=True)['Valor_Padronizado'].mean().reset_index()
 
         # Calcular soma total por estação para normalizar
-        monthly['Total'] = monthly.groupby('Estacao')['Valor_Padronizado'].transform('sum')
+        monthly['Total'] = monthly.groupby('Estacao', observed=True)['Valor_Padronizado'].transform('sum')
         monthly['p_i'] = monthly['Valor_Padronizado'] / monthly['Total']
 
         # Transformar em formato wide (colunas = meses)
@@ -250,7 +258,7 @@ for file_name in os.listdir(DATA_DIR):
         # Armazenar dados para o boxplot combinado
         if 'Estado' in df.columns:
             # Juntar dados de MSI com estados
-            estacoes_info = df.groupby('Estacao').first().reset_index()[['Estacao', 'Estado']]
+            estacoes_info = df.groupby('Estacao', observed=True).first().reset_index()[['Estacao', 'Estado']]
             msi_com_info = msi.merge(estacoes_info, on='Estacao', how='left')
             msi_com_info['Poluente'] = poluente
             
@@ -283,7 +291,7 @@ for file_name in os.listdir(DATA_DIR):
     # 3. Mapa de Índice de Markham por estado (foco nas regiões metropolitanas)
     if 'Estado' in df.columns and 'Latitude' in df.columns and 'Longitude' in df.columns:
         # Juntar dados de MSI com coordenadas das estações
-        estacoes_info = df.groupby('Estacao').first().reset_index()[['Estacao', 'Longitude', 'Latitude', 'Estado']]
+        estacoes_info = df.groupby('Estacao', observed=True).first().reset_index()[['Estacao', 'Longitude', 'Latitude', 'Estado']]
         msi_com_info = msi.merge(estacoes_info, on='Estacao', how='left')
         
         # Converter para GeoDataFrame
@@ -497,7 +505,7 @@ for i, pol in enumerate(poluentes):
     df_pol = msi_data[pol]
     
     # Ordenar estados por mediana do MSI (do maior para o menor)
-    ordem_estados = df_pol.groupby('Estado')['MSI'].median().sort_values(ascending=False).index
+    ordem_estados = df_pol.groupby('Estado', observed=True)['MSI'].median().sort_values(ascending=False).index
     
     # Boxplot por estado
     sns.boxplot(
@@ -8,6 +8,8 @@ import geopandas as gpd
 from shapely.geometry import Point
 import math
 
+from esquemas import validar_parquet
+
 # ========================================================================================
 # CONFIGURAÇÕES INICIAIS
 # ========================================================================================
@@ -31,6 +33,7 @@ for file in os.listdir(SC_DIR):
         parametro = parts[2].split('.')[0]  # remover a extensão
         
         file_path = os.path.join(SC_DIR, file)
+        validar_parquet(file_path, 'sincronicidade')
         df = pd.read_parquet(file_path)
         df['Poluente'] = poluente
         df['Parametro'] = parametro
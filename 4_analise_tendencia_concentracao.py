@@ -9,6 +9,8 @@ import matplotlib as mpl
 from shapely.geometry import Point, box
 import zipfile
 
+from esquemas import validar_parquet
+
 # Configurações
 MK_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_testes_mannkendall"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\graphtable_analise_tendencias_ano"
@@ -69,6 +71,7 @@ for file_name in os.listdir(MK_DIR):
     
     poluente = file_name.split('_')[1].split('.')[0]
     file_path = os.path.join(MK_DIR, file_name)
+    validar_parquet(file_path, 'mk')
     mk_df = pd.read_parquet(file_path)
     
     # Converter coordenadas para float
@@ -526,6 +529,7 @@ for file_name in os.listdir(MK_DIR):
         
         poluente = file_name.split('_')[1].split('.')[0]
         file_path = os.path.join(MK_DIR, file_name)
+        validar_parquet(file_path, 'mk')
         mk_df = pd.read_parquet(file_path)
         
         # Filter significant trends (p < 0.05)
@@ -650,6 +654,7 @@ for file_name in os.listdir(MK_DIR):
     poluente = file_name.split('_')[1].split('.')[0]
     poluentes.append(poluente)
     file_path = os.path.join(MK_DIR, file_name)
+    validar_parquet(file_path, 'mk')
     mk_df = pd.read_parquet(file_path)
     
     # Converter coordenadas se necessário
@@ -8,10 +8,16 @@ from shapely.geometry import Point, box
 import contextily as ctx
 import matplotlib as mpl
 
+from esquemas import categorizar, validar_parquet
+from estacoes import carregar_dimensao, anexar_estacoes
+from completude import carregar_cubo
+
 # Configurações
 path_dados_horarios = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_chunks_com_loc'
 DATA_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo"
 OUTPUT_DIR = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\graphtable_analise_sazonalidade"
+DIM_ESTACOES_PATH = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dim_estacoes.parquet"
+CUBO_PATH = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\cubo_completude"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Dicionário para armazenar dados de MSI por estado (para boxplot combinado)
@@ -37,9 +43,12 @@ print("Municípios carregados:", len(municipios))
 
 # Colunas que você deseja manter
 COLUMNS_TO_KEEP = [
-    'Data', 'Hora', 'Estacao', 'Estado', 'Valor_Padronizado', 'Latitude', 'Longitude'
+    'Data', 'Hora', 'Data_Hora', 'station_id', 'Valor_Padronizado'
 ]
 
+# Estado, Estacao e coordenadas (float) de cada station_id
+dim_estacoes = carregar_dimensao(DIM_ESTACOES_PATH)
+
 # Função para identificar estação do ano
 def get_estacao(mes):
     return {
@@ -68,24 +77,22 @@ for subfolder in os.listdir(path_dados_horarios):
     # Lê e concatena todos os arquivos parquet
     df_list = []
     for file_path in parquet_files:
-        df_chunk = pd.read_parquet(file_path, columns=None)  # leitura leve
-        # Reduz para colunas de interesse (apenas se existirem)
-        cols_presentes = [col for col in COLUMNS_TO_KEEP if col in df_chunk.columns]
-        df_chunk = df_chunk[cols_presentes]
+        # Valida o rodapé do Parquet e lê só as colunas de interesse (apenas se existirem)
+        schema = validar_parquet(file_path, 'horario').schema.to_arrow_schema()
+        cols_presentes = [col for col in COLUMNS_TO_KEEP if col in schema.names]
+        df_chunk = pd.read_parquet(file_path, columns=cols_presentes)
         df_list.append(df_chunk)
 
     if not df_list:
         continue  # Pula se não houver dados
 
-    df = pd.concat(df_list, ignore_index=True)
+    # pd.concat de categorias diferentes volta para object
+    df = categorizar(pd.concat(df_list, ignore_index=True))
 
-    # drop duplicates
-    df = df.drop_duplicates()
+    # sem drop_duplicates: linhas repetidas já foram removidas na ingestão (ingestao.deduplicar)
 
-    # CONVERSÃO CRÍTICA: Coordenadas
-    for coord_col in ['Longitude', 'Latitude']:
-        if coord_col in df.columns:
-            df[coord_col] = df[coord_col].astype(str).str.replace(',', '.').astype(float)
+    # Estado, Estacao e coordenadas (já em float) vêm da dimensão de estações
+    df = anexar_estacoes(df, dim_estacoes)
 
     # Converter data
     if 'Data' in df.columns:
@@ -211,34 +218,35 @@ for subfolder in os.listdir(path_dados_horarios):
         # Garantir que a coluna de data está em formato datetime
         df['Data'] = pd.to_datetime(df['Data'])
 
-        # Extrair mês e ano
-        df['Mes'] = df['Data'].dt.month
+        # Extrair mês (pelo Data_Hora, como o cubo de completude)
+        df['Mes'] = df['Data_Hora'].dt.month
 
         # Filtrar valores válidos
         df = df[df['Valor_Padronizado'].notna()]
         df = df[df['Valor_Padronizado'] >= 0]
 
-        # Contar número de registros por Estacao-Mes
-        contagens = df.groupby(['Estacao', 'Mes'])['Valor_Padronizado'].count().reset_index(name='n_horas')
+        # Horas válidas (não negativas) por estação e mês do ano, somando os anos, vêm do cubo de completude
+        mensal = carregar_cubo(CUBO_PATH, 'mensal', poluente, dim_estacoes)
+        contagens = mensal.groupby(['station_id', 'Mes'])['Horas_Nao_Negativas'].sum().reset_index(name='n_horas')
 
         # Definir mínimo de horas por mês (ajuste conforme necessário, ex: 100)
         contagens_filtradas = contagens[contagens['n_horas'] >= 100]
 
         # Juntar ao dataframe original para filtrar
-        df = df.merge(contagens_filtradas[['Estacao', 'Mes']], on=['Estacao', 'Mes'], how='inner')
+        df = df.merge(contagens_filtradas[['station_id', 'Mes']], on=['station_id', 'Mes'], how='inner')
 
         # Agora calcular a média mensal
-        monthly = df.groupby(['Estacao', 'Mes'])['Valor_Padronizado'].mean().reset_index()
+        monthly = df.groupby(['Estacao', 'Mes'], observed=True)['Valor_Padronizado'].mean().reset_index()
 
         # Verificar quantos meses válidos por estação
-        meses_por_estacao = monthly.groupby('Estacao')['Mes'].nunique()
+        meses_por_estacao = monthly.groupby('Estacao', observed=True)['Mes'].nunique()
         estacoes_com_meses_suficientes = meses_por_estacao[meses_por_estacao >= 6].index
 
         # Filtrar as estações que têm dados em meses suficientes
         monthly = monthly[monthly['Estacao'].isin(estacoes_com_meses_suficientes)]
 
         # Continuar normalmente
-        monthly['Total'] = monthly.groupby('Estacao')['Valor_Padronizado'].transform('sum')
+        monthly['Total'] = monthly.groupby('Estacao', observed=True)['Valor_Padronizado'].transform('sum')
         monthly['p_i'] = monthly['Valor_Padronizado'] / monthly['Total']
 
         wide = monthly.pivot(index='Estacao', columns='Mes', values='p_i').fillna(0)
@@ -249,7 +257,7 @@ for subfolder in os.listdir(path_dados_horarios):
         # Armazenar dados para o boxplot combinado
         if 'Estado' in df.columns:
             # Juntar dados de MSI com estados
-            estacoes_info = df.groupby('Estacao').first().reset_index()[['Estacao', 'Estado']]
+            estacoes_info = df.groupby('Estacao', observed=True).first().reset_index()[['Estacao', 'Estado']]
             msi_com_info = msi.merge(estacoes_info, on='Estacao', how='left')
             msi_com_info['Poluente'] = poluente
             
@@ -282,7 +290,7 @@ for subfolder in os.listdir(path_dados_horarios):
     # 3. Mapa de Índice de Markham por estado (foco nas regiões metropolitanas)
     if 'Estado' in df.columns and 'Latitude' in df.columns and 'Longitude' in df.columns:
         # Juntar dados de MSI com coordenadas das estações
-        estacoes_info = df.groupby('Estacao').first().reset_index()[['Estacao', 'Longitude', 'Latitude', 'Estado']]
+        estacoes_info = df.groupby('Estacao', observed=True).first().reset_index()[['Estacao', 'Longitude', 'Latitude', 'Estado']]
         msi_com_info = msi.merge(estacoes_info, on='Estacao', how='left')
         
         # Converter para GeoDataFrame
@@ -497,7 +505,7 @@ for i, pol in enumerate(poluentes):
     df_pol = msi_data[pol]
     
     # Ordenar estados por ordem alfabetica
-    ordem_estados = df_pol['Estado'].value_counts().index.tolist()
+    ordem_estados = df_pol['Estado'].value_counts().loc[lambda c: c > 0].index.tolist()
     ordem_estados.sort()
     
     # Boxplot por estado sem outliers
@@ -1,32 +1,64 @@
-import pandas as pd
+import polars as pl
 import os
 
-# Carregar dados de localização
-lat_lon_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\support_data\Mapa de estações de monitoramento_data.csv'
-lat_lon_data = pd.read_csv(lat_lon_path, sep=';', encoding='utf-8')
-lat_lon_data = lat_lon_data[['Estacao1', 'Latitude', 'Longitude']]
+from esquemas import categorizar, validar_parquet, validar_parquets
+from estacoes import ler_mapa_estacoes, ler_latlon_2024, carregar_dimensao, atualizar_dimensao, atribuir_station_id
 
-lat_lon_data['Latitude'] = lat_lon_data['Latitude'].str.replace(',', '.').astype(float)
-lat_lon_data['Longitude'] = lat_lon_data['Longitude'].str.replace(',', '.').astype(float)
+# Fontes de localização
+lat_lon_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\support_data\Mapa de estações de monitoramento_data.csv'
+latlon_2024_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\support_data\Monitoramento_QAr_BR_latlon_2024.csv'
 
-# data path
-INPUT_DIR = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data_poluentes_parquet'
+# data path (dataset horário particionado por Poluente=/Estado=/Ano=)
+INPUT_DIR = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dados_horarios'
 OUTPUT_DIR = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\resultados_poluentes_parquet_loc'
+DIM_ESTACOES_PATH = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dim_estacoes.parquet'
+
+# Confere o rodapé de todas as partições antes de ler
+validar_parquets(INPUT_DIR, 'horario_dataset')
+
+# Leitura lazy do dataset: os joins abaixo rodam no engine de streaming, em
+# lotes, então a memória não cresce com o tamanho do poluente
+dataset = pl.scan_parquet(INPUT_DIR, hive_partitioning=True)
+
+# Dimensão de estações: ids estáveis entre execuções, coordenadas já em float
+estacoes = dataset.select(['Estado', 'Estacao']).unique().collect(engine='streaming').to_pandas()
+dimensao = atualizar_dimensao(
+    estacoes,
+    carregar_dimensao(DIM_ESTACOES_PATH),
+    ler_mapa_estacoes(lat_lon_path),
+    ler_latlon_2024(latlon_2024_path)
+)
+dimensao.to_parquet(DIM_ESTACOES_PATH, index=False)
+print(f"Dimensão de estações: {len(dimensao)} estações, "
+      f"{dimensao['Latitude'].isna().sum()} sem coordenadas -> {DIM_ESTACOES_PATH}")
 
-# Processar cada arquivo de poluente
-for file_name in os.listdir(INPUT_DIR):
-    if not file_name.endswith('.parquet'):
+ids_sem_coord = pl.Series(dimensao.loc[dimensao['Latitude'].isna(), 'station_id'].to_numpy())
+
+# Processar cada poluente (cada partição Poluente=<pol>)
+for particao in sorted(os.listdir(INPUT_DIR)):
+    if not particao.startswith('Poluente='):
         continue
-    
-    file_path = os.path.join(INPUT_DIR, file_name)
-    data = pd.read_parquet(file_path)
-
-    data = data.merge(
-        lat_lon_data.rename(columns={'Estacao1': 'Estacao'}),
-        on='Estacao',
-        how='left'
+
+    poluente = particao.split('=', 1)[1]
+    save_path = os.path.join(OUTPUT_DIR, f'{poluente}.parquet')
+
+    # Só o station_id vai para os dados horários; Estado, Estacao e coordenadas ficam na dimensão.
+    # Ano (partição) e Arquivo (origem da linha) só interessam à ingestão
+    dados = atribuir_station_id(
+        dataset.filter(pl.col('Poluente') == poluente).drop(['Ano', 'Arquivo']),
+        dimensao
     )
 
-    save_path = os.path.join(OUTPUT_DIR, str(file_name.split('.')[0]))
+    # Gravação e contagem no mesmo plano: collect_all lê o poluente uma única vez
+    gravacao = categorizar(dados.filter(pl.col('station_id').is_not_null())).sink_parquet(save_path, lazy=True)
+    contagem = dados.select(
+        linhas=pl.len(),
+        fora_da_dimensao=pl.col('station_id').is_null().sum(),
+        sem_coordenadas=pl.col('station_id').is_in(ids_sem_coord.implode()).sum()
+    )
+    _, contagem = pl.collect_all([gravacao, contagem], engine='streaming')
+    contagem = contagem.row(0, named=True)
 
-    data.to_parquet(f'{save_path}.parquet')
\ No newline at end of file
+    validar_parquet(save_path, 'horario')
+    print(f"{poluente}: {contagem['linhas']:,} linhas, {contagem['sem_coordenadas']:,} de estações sem coordenadas, "
+          f"{contagem['fora_da_dimensao']:,} de estações fora da dimensão (descartadas) -> {save_path}")
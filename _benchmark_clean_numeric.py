@@ -0,0 +1,60 @@
+import time
+import numpy as np
+import pandas as pd
+
+from ingestao import clean_numeric, clean_numeric_vetorizado
+
+# ========== CONFIGURATION ==========
+n_linhas = 2_000_000
+seed = 42
+# ===================================
+
+rng = np.random.default_rng(seed)
+
+# Casos conhecidos dos CSVs brutos e casos de borda
+casos = [
+    '12.5', '12,5', ' 7 ', '1.234.567', '1,234.5', '-3.2', '0', '007', '1.', '.5', '-.5',
+    '', '-', '.', ',', 'ND', '<LD', '12,5 µg/m³', '1-2', '--1', '1e5', '3.2.', 'abc', None
+]
+
+# Strings aleatórias com dígitos, separadores e lixo misturados
+alfabeto = list('0123456789.,- aµ<>e/')
+pesos = np.array([8] * 10 + [3, 3, 1, 1, 1, 1, 1, 1, 1, 1], dtype=float)
+tamanhos = rng.integers(0, 9, size=n_linhas)
+sorteio = rng.choice(alfabeto, size=tamanhos.sum(), p=pesos / pesos.sum())
+aleatorios = [''.join(c) for c in np.split(sorteio, np.cumsum(tamanhos)[:-1])]
+
+# Leituras como nos CSVs: maioria já numérica, parte com vírgula decimal ou marcadores
+realistas = pd.Series(np.round(rng.gamma(2.0, 15.0, size=n_linhas), 2)).astype(str)
+com_virgula = rng.random(n_linhas) < 0.2
+realistas[com_virgula] = realistas[com_virgula].str.replace('.', ',')
+realistas[rng.random(n_linhas) < 0.02] = 'ND'
+
+corpora = {
+    'aleatório': pd.Series(casos + aleatorios, dtype=object),
+    'realista': pd.Series(casos + realistas.tolist(), dtype=object),
+}
+
+for nome, valores in corpora.items():
+    # Equivalência com a versão linha a linha
+    inicio = time.perf_counter()
+    referencia = pd.to_numeric(valores.apply(clean_numeric), errors='coerce').astype(float)
+    tempo_referencia = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    vetorizado = clean_numeric_vetorizado(valores)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    divergentes = ~((referencia == vetorizado) | (referencia.isna() & vetorizado.isna()))
+    if divergentes.any():
+        print(pd.DataFrame({
+            'Valor': valores[divergentes],
+            'clean_numeric': referencia[divergentes],
+            'vetorizado': vetorizado[divergentes]
+        }).head(20))
+        raise AssertionError(f"{divergentes.sum()} valores divergentes entre as duas versões ({nome})")
+
+    print(f"\nCorpus {nome}: equivalência verificada em {len(valores)} valores ({referencia.notna().sum()} numéricos)")
+    print(f"  clean_numeric + to_numeric: {len(valores) / tempo_referencia:,.0f} linhas/s ({tempo_referencia:.2f}s)")
+    print(f"  clean_numeric_vetorizado:   {len(valores) / tempo_vetorizado:,.0f} linhas/s ({tempo_vetorizado:.2f}s)")
+    print(f"  Speedup: {tempo_referencia / tempo_vetorizado:.1f}x")
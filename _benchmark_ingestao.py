@@ -0,0 +1,185 @@
+"""
+Benchmark da ingestão (1_extracao_padronizacao.py) sobre dados sintéticos.
+
+Gera uma árvore raw_data com _gerar_dados_sinteticos.py em uma pasta
+temporária e mede, sem depender de rede nem dos dados reais:
+  - tempo e linhas/s de cada estágio (leitura, padronização, gravação e
+    compactação do dataset), com o detalhe dos passos de `padronizar`;
+  - pico de memória (RSS) do processo após cada estágio;
+  - o pipeline completo, chamando o main() do script com n_workers.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import importlib
+from collections import defaultdict
+
+from _gerar_dados_sinteticos import gerar
+from ingestao import (
+    listar_arquivos, ler_arquivo, padronizar, GravadorDataset,
+    parse_datas, montar_data_hora, clean_numeric_vetorizado, converter_unidades
+)
+
+# ========== CONFIGURATION ==========
+n_estados = 3
+estacoes_por_estado = 4
+anos = [2019, 2020]
+seed = 42
+n_workers = os.cpu_count()
+manter_arquivos = False  # True mantém a pasta temporária com os dados gerados
+# ===================================
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo em MB (None se não for possível medir)."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+    except ImportError:
+        pass
+    try:
+        # Windows: PeakWorkingSetSize via psapi, sem dependências extras
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        contadores = PROCESS_MEMORY_COUNTERS()
+        contadores.cb = ctypes.sizeof(contadores)
+        processo = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(processo, ctypes.byref(contadores), contadores.cb)
+        return contadores.PeakWorkingSetSize / 1024 ** 2
+    except (AttributeError, OSError):
+        return None
+
+
+class Cronometro:
+    """Acumula tempo por estágio: `with cronometro('estagio'): ...`."""
+
+    def __init__(self):
+        self.tempos = defaultdict(float)
+        self.picos = {}
+
+    def __call__(self, estagio):
+        self.estagio = estagio
+        return self
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.tempos[self.estagio] += time.perf_counter() - self.inicio
+        self.picos[self.estagio] = pico_rss_mb()
+
+
+def imprimir_estagios(titulo, cronometro, n_linhas):
+    print(f"\n{titulo}")
+    print(f"  {'estágio':<24}{'tempo (s)':>10}{'linhas/s':>14}{'pico RSS (MB)':>16}")
+    for estagio, tempo in cronometro.tempos.items():
+        pico = cronometro.picos[estagio]
+        pico = f'{pico:,.0f}' if pico is not None else '-'
+        print(f"  {estagio:<24}{tempo:>10.2f}{n_linhas / tempo:>14,.0f}{pico:>16}")
+    total = sum(cronometro.tempos.values())
+    print(f"  {'total':<24}{total:>10.2f}{n_linhas / total:>14,.0f}")
+
+
+def medir_estagios(raw_data_path, saida_path):
+    """Ingestão sequencial, estágio por estágio, no próprio processo."""
+    cronometro = Cronometro()
+    gravador = GravadorDataset(
+        os.path.join(saida_path, 'dados_horarios'),
+        os.path.join(saida_path, 'quarentena_ingestao.parquet')
+    )
+    for state, file_path in listar_arquivos(raw_data_path):
+        with cronometro('leitura CSV'):
+            data = ler_arquivo(file_path, state)
+        with cronometro('padronização'):
+            data = padronizar(data)
+        with cronometro('gravação (buffers)'):
+            gravador.adicionar(data)
+    with cronometro('compactação'):
+        gravador.fechar()
+    return cronometro, gravador.total
+
+
+def medir_padronizar(raw_data_path):
+    """Detalhe dos passos de `padronizar`, chamados um a um sobre os mesmos arquivos."""
+    cronometro = Cronometro()
+    n_linhas = 0
+    for state, file_path in listar_arquivos(raw_data_path):
+        data = ler_arquivo(file_path, state)
+        n_linhas += len(data)
+        with cronometro('parse_datas'):
+            datas = parse_datas(data['Data'])
+        with cronometro('montar_data_hora'):
+            montar_data_hora(datas, data['Hora'])
+        with cronometro('clean_numeric'):
+            data['Valor'] = clean_numeric_vetorizado(data['Valor'])
+        with cronometro('converter_unidades'):
+            converter_unidades(data)
+    return cronometro, n_linhas
+
+
+def medir_pipeline(raw_data_path, saida_path):
+    """Roda o main() de 1_extracao_padronizacao.py apontado para a pasta temporária."""
+    script = importlib.import_module('1_extracao_padronizacao')
+    script.raw_data_path = raw_data_path
+    script.parciais_path = os.path.join(saida_path, 'parciais_ingestao')
+    script.dataset_path = os.path.join(saida_path, 'dados_horarios')
+    script.quarentena_path = os.path.join(saida_path, 'quarentena_ingestao.parquet')
+    script.duplicatas_path = os.path.join(saida_path, 'duplicatas_ingestao')
+    script.manifesto_path = os.path.join(saida_path, 'manifesto_ingestao.csv')
+    script.snapshot_path = os.path.join(saida_path, 'snapshots_ingestao')
+    script.cubo_path = os.path.join(saida_path, 'cubo_completude')
+    script.n_workers = n_workers
+    script.reprocessar_tudo = True
+
+    inicio = time.perf_counter()
+    script.main()
+    return time.perf_counter() - inicio
+
+
+def main():
+    pasta = tempfile.mkdtemp(prefix='benchmark_ingestao_')
+    raw_data_path = os.path.join(pasta, 'raw_data')
+    try:
+        inicio = time.perf_counter()
+        n_linhas = gerar(raw_data_path, n_estados, estacoes_por_estado, anos, seed)
+        tamanho = sum(
+            os.path.getsize(os.path.join(raiz, f)) for raiz, _, arquivos in os.walk(raw_data_path) for f in arquivos
+        )
+        print(f"{n_linhas:,} linhas sintéticas ({tamanho / 1024 ** 2:,.0f} MB de CSV) "
+              f"geradas em {time.perf_counter() - inicio:.1f}s: {raw_data_path}")
+
+        cronometro, _ = medir_estagios(raw_data_path, os.path.join(pasta, 'estagios'))
+        imprimir_estagios("Ingestão sequencial por estágio:", cronometro, n_linhas)
+
+        cronometro, _ = medir_padronizar(raw_data_path)
+        imprimir_estagios("Detalhe de padronizar:", cronometro, n_linhas)
+
+        print(f"\nPipeline completo (1_extracao_padronizacao.main, {n_workers} worker(s)):")
+        tempo = medir_pipeline(raw_data_path, os.path.join(pasta, 'pipeline'))
+        pico = pico_rss_mb()
+        print(f"\n  {tempo:.2f}s, {n_linhas / tempo:,.0f} linhas/s"
+              + (f", pico RSS do processo principal {pico:,.0f} MB" if pico is not None else ''))
+    finally:
+        if manter_arquivos:
+            print(f"\nArquivos mantidos em {pasta}")
+        else:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+# O pool de processos do pipeline reimporta este script nos workers (spawn no Windows)
+if __name__ == '__main__':
+    main()
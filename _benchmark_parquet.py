@@ -0,0 +1,105 @@
+"""
+Benchmark de layouts Parquet para o CSV consolidado (_convert_to_parquet.py).
+
+Gera um data.csv sintético em uma pasta temporária e, para cada combinação
+de compressão, row group e dictionary encoding, mede:
+  - tempo de conversão e tamanho do arquivo;
+  - leitura completa (pl.read_parquet);
+  - leitura de uma coluna (Valor_Padronizado), como nas agregações;
+  - scan filtrado por uma estação, como em 2_verificar_violacoes.py.
+"""
+import os
+import time
+import shutil
+import tempfile
+import itertools
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from _convert_to_parquet import converter
+
+# ========== CONFIGURATION ==========
+n_estacoes = 40
+n_horas = 24 * 365
+seed = 42
+codecs = [('zstd', 1), ('zstd', 3), ('zstd', 9), ('snappy', None), ('lz4', None), ('uncompressed', None)]
+linhas_por_row_group = [100_000, 1_000_000]
+dicionario = [True, False]
+repeticoes = 3  # leituras repetidas; vale o menor tempo
+manter_arquivos = False
+# ===================================
+
+
+def gerar_csv(csv_path):
+    """CSV consolidado sintético, ordenado por estação e hora como a saída da ingestão."""
+    rng = np.random.default_rng(seed)
+    horas = pd.date_range('2020-01-01 01:00', periods=n_horas, freq='h')
+    blocos = []
+    for i in range(n_estacoes):
+        valores = np.round(rng.gamma(2.0, 15.0, n_horas), 2)
+        blocos.append(pd.DataFrame({
+            'Data': horas.strftime('%Y-%m-%d'),
+            'Hora': horas.strftime('%H:%M'),
+            'Estacao': f'Estação {i:03d}',
+            'Poluente': ['O3', 'NO2', 'MP10'][i % 3],
+            'Valor': valores,
+            'Unidade': 'µg/m³',
+            'Estado': ['SP', 'RJ', 'MG', 'RS'][i % 4],
+            'Valor_Padronizado': valores,
+            'Unidade_Padronizada': 'µg/m³',
+        }))
+    pd.concat(blocos, ignore_index=True).to_csv(csv_path, index=False)
+    return n_estacoes * n_horas
+
+
+def menor_tempo(funcao):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    pasta = tempfile.mkdtemp(prefix='benchmark_parquet_')
+    try:
+        csv_path = os.path.join(pasta, 'data.csv')
+        n_linhas = gerar_csv(csv_path)
+        print(f"{n_linhas:,} linhas, CSV de {os.path.getsize(csv_path) / 1024 ** 2:,.1f} MB\n")
+
+        resultados = []
+        for (codec, nivel), row_group, dic in itertools.product(codecs, linhas_por_row_group, dicionario):
+            parquet_path = os.path.join(pasta, 'data.parquet')
+            inicio = time.perf_counter()
+            converter(csv_path, parquet_path, codec, nivel, row_group, dic)
+            tempo_conversao = time.perf_counter() - inicio
+
+            resultados.append({
+                'codec': codec if nivel is None else f'{codec}-{nivel}',
+                'row_group': row_group,
+                'dicionario': dic,
+                'MB': os.path.getsize(parquet_path) / 1024 ** 2,
+                'conversao_s': tempo_conversao,
+                'leitura_s': menor_tempo(lambda: pl.read_parquet(parquet_path)),
+                'coluna_s': menor_tempo(lambda: pl.read_parquet(parquet_path, columns=['Valor_Padronizado'])),
+                'estacao_s': menor_tempo(
+                    lambda: pl.scan_parquet(parquet_path).filter(pl.col('Estacao') == 'Estação 007').collect()
+                ),
+            })
+            os.remove(parquet_path)
+
+        tabela = pd.DataFrame(resultados).sort_values(['MB'])
+        tabela['linhas_s_leitura'] = (n_linhas / tabela['leitura_s']).round(0)
+        with pd.option_context('display.width', 200, 'display.float_format', '{:,.3f}'.format):
+            print(tabela.to_string(index=False))
+    finally:
+        if manter_arquivos:
+            print(f"\nArquivos mantidos em {pasta}")
+        else:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
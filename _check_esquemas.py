@@ -0,0 +1,43 @@
+import os
+import time
+
+from esquemas import artefato_do_arquivo, validar_parquet
+
+# Pastas com artefatos do pipeline; cada arquivo é conferido contra o
+# registro de esquemas (esquemas.ESQUEMAS) lendo só o rodapé do Parquet
+pastas = [
+    r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dados_horarios',
+    r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\cubo_completude',
+    r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\resultados_poluentes_parquet_loc',
+    r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_chunks_com_loc',
+    r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_violacoes_completo',
+    r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_testes_mannkendall_ano',
+    r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_sincronicidade',
+]
+
+inicio = time.perf_counter()
+n_arquivos, n_linhas, erros = 0, 0, []
+
+for pasta in pastas:
+    if not os.path.isdir(pasta):
+        print(f'Pasta não encontrada: {pasta}')
+        continue
+    for raiz, _, nomes in os.walk(pasta):
+        for file in sorted(nomes):
+            if not file.endswith('.parquet'):
+                continue
+            path = os.path.join(raiz, file)
+            artefato = artefato_do_arquivo(path)
+            if artefato is None:
+                print(f'Sem esquema registrado: {path}')
+                continue
+            try:
+                n_linhas += validar_parquet(path, artefato).num_rows
+                n_arquivos += 1
+            except ValueError as e:
+                erros.append(str(e))
+
+for erro in erros:
+    print(erro)
+print(f'{n_arquivos} arquivos válidos ({n_linhas:,} linhas), {len(erros)} com problemas, '
+      f'em {time.perf_counter() - inicio:.2f}s')
@@ -0,0 +1,132 @@
+"""
+Confere que a ingestão incremental (manifesto + substituição de arquivos)
+grava exatamente as mesmas linhas que uma ingestão completa, em todas as
+regras de duplicatas.
+
+Roda o main() de 1_extracao_padronizacao.py em pastas temporárias: a cada
+passo os CSVs brutos são alterados, removidos ou criados, e o dataset
+atualizado de forma incremental é comparado com um dataset recriado do
+zero a partir dos mesmos CSVs. O primeiro cenário é o de uma linha repetida
+que perde a deduplicação e precisa voltar quando a vencedora some.
+"""
+import os
+import io
+import shutil
+import tempfile
+import importlib
+import contextlib
+import numpy as np
+import pandas as pd
+
+from ingestao import REGRAS_DUPLICATAS
+
+# ========== CONFIGURATION ==========
+n_passos_aleatorios = 6
+n_arquivos = 5
+seed = 7
+# ===================================
+
+script = importlib.import_module('1_extracao_padronizacao')
+
+
+def gravar_csv(raw_data_path, nome, linhas):
+    """Grava um CSV bruto de SP com linhas (hora, valor) de O3 numa única estação."""
+    pasta = os.path.join(raw_data_path, 'SP')
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, nome)
+    pd.DataFrame({
+        'Data': '2020-01-02',
+        'Hora': [f'{hora:02d}:00:00' for hora, _ in linhas],
+        'Estacao': 'Pinheiros',
+        'Poluente': 'O3',
+        'Valor': [f'{valor}' for _, valor in linhas],
+        'Unidade': 'ug/m3',
+    }).to_csv(caminho, index=False, encoding='latin1')
+    # Garante que o manifesto veja a alteração mesmo na mesma fração de segundo
+    info = os.stat(caminho)
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 1_000_000_000))
+
+
+def ingerir(raw_data_path, saida_path, regra, reprocessar_tudo):
+    """Roda o main() de 1_extracao_padronizacao.py nas pastas de `saida_path` e lê o dataset."""
+    script.raw_data_path = raw_data_path
+    script.parciais_path = os.path.join(saida_path, 'parciais_ingestao')
+    script.dataset_path = os.path.join(saida_path, 'dados_horarios')
+    script.quarentena_path = os.path.join(saida_path, 'quarentena_ingestao.parquet')
+    script.duplicatas_path = os.path.join(saida_path, 'duplicatas_ingestao')
+    script.manifesto_path = os.path.join(saida_path, 'manifesto_ingestao.csv')
+    script.cubo_path = os.path.join(saida_path, 'cubo_completude')
+    script.regra_duplicatas = regra
+    script.reprocessar_tudo = reprocessar_tudo
+    script.n_workers = 1
+    script.modo_snapshot = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        script.main()
+
+    if not os.path.exists(script.dataset_path) or not os.listdir(script.dataset_path):
+        return pd.DataFrame()
+    df = pd.read_parquet(script.dataset_path)
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype(str)
+    return df.sort_values(['Poluente', 'Estado', 'Estacao', 'Data_Hora', 'Arquivo']).reset_index(drop=True)
+
+
+def conferir(raw_data_path, base_path, regra, passo):
+    incremental = ingerir(raw_data_path, os.path.join(base_path, 'incremental'), regra, False)
+    completo = ingerir(raw_data_path, os.path.join(base_path, f'completo_{passo}'), regra, True)
+    pd.testing.assert_frame_equal(incremental, completo, obj=f"regra '{regra}', passo {passo}")
+    return len(completo)
+
+
+def cenario_linha_perdedora(base_path, regra):
+    """A.csv vence a chave 02:00 de B.csv; depois A.csv perde a linha 02:00 e a de B.csv tem de voltar."""
+    raw_data_path = os.path.join(base_path, 'raw_data')
+    gravar_csv(raw_data_path, 'A.csv', [(1, 10), (2, 11)])
+    gravar_csv(raw_data_path, 'B.csv', [(2, 99), (3, 12)])
+    conferir(raw_data_path, base_path, regra, 0)
+    gravar_csv(raw_data_path, 'A.csv', [(1, 10)])
+    n = conferir(raw_data_path, base_path, regra, 1)
+    print(f"  '{regra}': linha perdedora recuperada ({n} linhas)")
+
+
+def cenario_aleatorio(base_path, regra, rng):
+    """Arquivos com horas sobrepostas, alterados, removidos e criados a cada passo."""
+    raw_data_path = os.path.join(base_path, 'raw_data')
+
+    def arquivo_aleatorio(nome):
+        horas = np.sort(rng.choice(np.arange(0, 24), size=rng.integers(1, 12), replace=False))
+        linhas = [(int(hora), float(rng.integers(1, 4))) for hora in horas]  # poucos valores: repetições iguais e conflitantes
+        gravar_csv(raw_data_path, nome, linhas)
+
+    for i in range(n_arquivos):
+        arquivo_aleatorio(f'arq_{i}.csv')
+    conferir(raw_data_path, base_path, regra, 0)
+
+    for passo in range(1, n_passos_aleatorios + 1):
+        existentes = sorted(os.listdir(os.path.join(raw_data_path, 'SP')))
+        acao = rng.choice(['alterar', 'remover', 'criar']) if len(existentes) > 1 else 'criar'
+        if acao == 'alterar':
+            arquivo_aleatorio(rng.choice(existentes))
+        elif acao == 'remover':
+            os.remove(os.path.join(raw_data_path, 'SP', rng.choice(existentes)))
+        else:
+            arquivo_aleatorio(f'arq_{n_arquivos + passo}.csv')
+        conferir(raw_data_path, base_path, regra, passo)
+    print(f"  '{regra}': {n_passos_aleatorios} passos aleatórios iguais à ingestão completa")
+
+
+def main():
+    rng = np.random.default_rng(seed)
+    for regra in REGRAS_DUPLICATAS:
+        for cenario in (cenario_linha_perdedora, lambda base, regra: cenario_aleatorio(base, regra, rng)):
+            base_path = tempfile.mkdtemp(prefix='check_incremental_')
+            try:
+                cenario(base_path, regra)
+            finally:
+                shutil.rmtree(base_path)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
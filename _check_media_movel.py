@@ -0,0 +1,173 @@
+"""
+Confere a média móvel de 8h (agregacao.py) contra uma referência exata em
+séries sintéticas longas, com janelas plantadas cuja média é exatamente
+igual a um limite CONAMA.
+
+A referência soma cada janela da grade horária com math.fsum (soma
+corretamente arredondada). O que se confere é que nenhum dia empatado no
+limite vire excedência em `valor > limite`: uma soma com erro de alguns
+ulps basta para isso.
+"""
+import math
+import time
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from agregacao import aggregate_data, CacheAgregacoes, PERIODOS, FRACAO_MINIMA_MEDIA_MOVEL
+from excedencias import expressao_mascara, excede
+
+# ========== CONFIGURATION ==========
+n_estacoes = 20
+anos = 10
+limite = 100.3             # média plantada nas janelas empatadas
+janelas_plantadas = 40     # por estação
+fracao_falhas = 0.1        # horas removidas fora das janelas plantadas
+seed = 42
+# ===================================
+
+PERIODO = 'max. med. mov. do dia (8h)'
+HORAS = 8
+
+
+def gerar_series(rng):
+    """Séries horárias de todas as estações (pd.DataFrame) com falhas e janelas empatadas no limite."""
+    n_horas = anos * 8760
+    datas = pd.date_range('2010-01-01', periods=n_horas, freq='h', tz='Etc/GMT+3')
+    series = []
+    for estacao in range(n_estacoes):
+        valores = rng.lognormal(3.0, 0.4, n_horas)
+        plantadas = np.zeros(n_horas, dtype=bool)
+        for inicio in rng.choice(n_horas - HORAS, janelas_plantadas, replace=False):
+            if rng.random() < 0.5:
+                janela = np.full(HORAS, limite)
+            else:
+                # pares simétricos em torno do limite: média exata = limite
+                desvios = np.round(rng.uniform(0, 50, HORAS // 2), 1)
+                janela = np.r_[limite + desvios, limite - desvios]
+                rng.shuffle(janela)
+            valores[inicio:inicio + HORAS] = janela
+            plantadas[inicio:inicio + HORAS] = True
+        manter = plantadas | (rng.random(n_horas) >= fracao_falhas)
+        series.append(pd.DataFrame({
+            'station_id': np.int32(estacao),
+            'Data_Hora': datas[manter],
+            'Valor_Padronizado': valores[manter],
+        }))
+    return pd.concat(series, ignore_index=True)
+
+
+def maximos_diarios(df, media_janela):
+    """
+    Máximo diário da média móvel numa grade horária densa por estação,
+    só nos dias com medição.
+
+    Parameters:
+        df (pd.DataFrame): station_id, Data_Hora e Valor_Padronizado
+        media_janela (callable): pd.Series da grade -> pd.Series de médias
+
+    Returns:
+        pd.DataFrame: station_id, Date e Referencia
+    """
+    resultados = []
+    for estacao, serie in df.groupby('station_id'):
+        serie = serie.set_index('Data_Hora')['Valor_Padronizado']
+        grade = serie.reindex(pd.date_range(serie.index.min(), serie.index.max(), freq='h'))
+        maximos = media_janela(grade).groupby(grade.index.date).max()
+        maximos = maximos[maximos.index.isin(set(serie.index.date))]
+        resultados.append(pd.DataFrame({
+            'station_id': estacao,
+            'Date': pd.to_datetime(maximos.index),
+            'Referencia': maximos.to_numpy(),
+        }))
+    return pd.concat(resultados, ignore_index=True)
+
+
+def media_exata(minimo_horas):
+    """Média de cada janela com a soma corretamente arredondada (math.fsum)."""
+    def media_janela(grade):
+        valores = np.r_[np.full(HORAS - 1, np.nan), grade.to_numpy()]
+        medias = np.full(len(grade), np.nan)
+        for i, janela in enumerate(np.lib.stride_tricks.sliding_window_view(valores, HORAS)):
+            validos = janela[~np.isnan(janela)]
+            if len(validos) >= minimo_horas:
+                medias[i] = math.fsum(validos) / len(validos)
+        return pd.Series(medias, index=grade.index)
+    return media_janela
+
+
+def conferir(nome, resultado, referencia):
+    """
+    Compara um máximo diário com a referência exata.
+
+    Parameters:
+        nome (str): rótulo do resultado nas mensagens
+        resultado (pl.DataFrame): station_id, Date e Valor_Padronizado
+        referencia (pd.DataFrame): saída de `maximos_diarios`
+
+    Returns:
+        int: dias em que `valor > limite` dá resposta diferente da referência
+    """
+    resultado = (
+        resultado.with_columns(Excedencias=expressao_mascara(pl.col('Valor_Padronizado'), {'PI-1': limite}))
+        .to_pandas()
+    )
+    resultado['Date'] = pd.to_datetime(resultado['Date'])
+    comparacao = referencia.merge(resultado, on=['station_id', 'Date'], how='outer', indicator=True)
+    assert (comparacao['_merge'] == 'both').all(), f"{nome}: dias diferentes da referência"
+    assert (comparacao['Referencia'].isna() == comparacao['Valor_Padronizado'].isna()).all(), f"{nome}: nulos diferentes"
+
+    diferenca = (comparacao['Referencia'] - comparacao['Valor_Padronizado']).abs().max()
+    excede_referencia = comparacao['Referencia'] > limite
+    excede_resultado = excede(comparacao['Excedencias'].fillna(0), 'PI-1')
+    divergentes = (excede_referencia != excede_resultado).sum()
+    print(f"  {nome}: diferença máxima {diferenca:.3g}, {divergentes} excedências divergentes em valor > {limite}")
+    return divergentes
+
+
+def main():
+    rng = np.random.default_rng(seed)
+    df = gerar_series(rng)
+    minimo_horas = max(1, math.ceil(FRACAO_MINIMA_MEDIA_MOVEL * HORAS))
+    print(f"{n_estacoes} estações x {anos} anos: {len(df):,} horas, "
+          f"{n_estacoes * janelas_plantadas} janelas com média exatamente {limite}")
+
+    inicio = time.perf_counter()
+    referencia = maximos_diarios(df, media_exata(minimo_horas))
+    empatados = (referencia['Referencia'] == limite).sum()
+    print(f"Referência exata (math.fsum) em {time.perf_counter() - inicio:.1f}s: "
+          f"{len(referencia):,} dias, {empatados} com máximo exatamente no limite")
+
+    dados = pl.from_pandas(df).lazy().sort(['station_id', 'Data_Hora'])
+
+    # pandas rolling na mesma grade, só para comparação: ele soma e subtrai os
+    # valores de uma soma corrente e também pode sair um ulp acima num empate
+    pandas_rolling = maximos_diarios(df, lambda grade: grade.rolling(HORAS, min_periods=minimo_horas).mean())
+    conferir('pandas rolling', pl.from_pandas(pandas_rolling.rename(columns={'Referencia': 'Valor_Padronizado'})),
+             referencia)
+
+    inicio = time.perf_counter()
+    divergentes = conferir('aggregate_data', aggregate_data(dados, PERIODO).collect(), referencia)
+    print(f"    {time.perf_counter() - inicio:.2f}s")
+    assert divergentes == 0, "aggregate_data: empates no limite contados como excedência"
+
+    inicio = time.perf_counter()
+    cache = CacheAgregacoes(dados)
+    divergentes = conferir('CacheAgregacoes', cache.agregar(PERIODO), referencia)
+    print(f"    {time.perf_counter() - inicio:.2f}s")
+    assert divergentes == 0, "CacheAgregacoes: empates no limite contados como excedência"
+
+    # O cache tem de dar o mesmo que aggregate_data em todos os períodos
+    for periodo in PERIODOS:
+        esperado = aggregate_data(dados, periodo).collect()
+        obtido = cache.agregar(periodo)
+        assert esperado.columns == obtido.columns, f"{periodo}: colunas diferentes"
+        assert esperado.drop('Valor_Padronizado').equals(obtido.drop('Valor_Padronizado')), f"{periodo}: chaves diferentes"
+        a, b = esperado['Valor_Padronizado'].to_numpy(), obtido['Valor_Padronizado'].to_numpy()
+        assert np.allclose(a, b, rtol=1e-12, atol=0, equal_nan=True), f"{periodo}: valores diferentes"
+        print(f"  cache = aggregate_data em '{periodo}' ({len(esperado):,} linhas)")
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
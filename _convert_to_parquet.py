@@ -1,5 +1,68 @@
+"""
+Converte o CSV consolidado (proccessed_data/data.csv) para Parquet em streaming.
+
+pl.scan_csv com esquema explícito (sem inferência) e sink_parquet: o arquivo
+passa em lotes, sem ser carregado inteiro na memória. Compressão, nível,
+tamanho do row group e quais colunas vão com dictionary encoding são
+configuráveis; _benchmark_parquet.py compara as opções.
+"""
 import polars as pl
 
+from esquemas import COLUNAS_CATEGORICAS
+
+# ========== CONFIGURATION ==========
 path_dados = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data.csv"
+path_saida = r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data.parquet"
+compressao = 'zstd'           # 'zstd', 'snappy', 'lz4', 'gzip' ou 'uncompressed'
+nivel_compressao = 3          # só para zstd (1-22), gzip (0-9) e brotli (0-11); None = padrão
+linhas_por_row_group = 500_000
+dicionario = False            # True grava as colunas de baixa cardinalidade como Categorical
+# ===================================
+
+# Esquema do CSV consolidado: nada é inferido a partir das primeiras linhas
+ESQUEMA_CSV = {
+    'Data': pl.Utf8,
+    'Hora': pl.Utf8,
+    'Estacao': pl.Utf8,
+    'Poluente': pl.Utf8,
+    'Valor': pl.Float64,
+    'Unidade': pl.Utf8,
+    'Estado': pl.Utf8,
+    'Valor_Padronizado': pl.Float64,
+    'Unidade_Padronizada': pl.Utf8,
+}
+
+
+def converter(csv_path, parquet_path, compressao='zstd', nivel_compressao=None,
+              linhas_por_row_group=500_000, dicionario=False):
+    """
+    Converte um CSV no formato ESQUEMA_CSV para Parquet sem materializar o arquivo.
+
+    Parameters:
+        csv_path (str): CSV de entrada (separador ',', cabeçalho na primeira linha).
+        parquet_path (str): Parquet de saída.
+        compressao (str): codec do Parquet.
+        nivel_compressao (int): nível do codec (None = padrão do codec).
+        linhas_por_row_group (int): linhas por row group.
+        dicionario (bool): grava as COLUNAS_CATEGORICAS como Categorical.
+    """
+    dados = (
+        pl.scan_csv(csv_path, separator=',', schema=ESQUEMA_CSV)
+        .with_columns(pl.col('Data').str.to_date('%Y-%m-%d'))
+    )
+    if dicionario:
+        dados = dados.with_columns([
+            pl.col(c).cast(pl.Categorical) for c in COLUNAS_CATEGORICAS if c in ESQUEMA_CSV
+        ])
+    dados.sink_parquet(
+        parquet_path,
+        compression=compressao,
+        compression_level=nivel_compressao,
+        row_group_size=linhas_por_row_group,
+        statistics=True
+    )
+
 
-pl.read_csv(path_dados, separator=",").write_parquet(r"C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data.parquet")
\ No newline at end of file
+if __name__ == '__main__':
+    converter(path_dados, path_saida, compressao, nivel_compressao, linhas_por_row_group, dicionario)
+    print(f"Convertido: {path_saida}")
@@ -0,0 +1,122 @@
+"""
+Gera uma árvore raw_data/<UF>/*.csv sintética, no formato dos CSVs brutos,
+para testar e medir a ingestão sem os dados reais.
+
+Reproduz as particularidades que a padronização precisa tratar: encoding
+latin1, cabeçalho com BOM em parte dos arquivos, vírgula decimal, unidades
+misturadas (ppm, ppb e grafias de µg/m³), apelidos PM10/MP10, marcadores
+de ausência ('ND', vazio), datas em mais de um formato e horas de 01:00 a
+24:00:00 (a meia-noite é o fim do dia anterior).
+"""
+import os
+import numpy as np
+import pandas as pd
+
+from ingestao import massa_molar, PPM_CONVERSION
+
+# ========== CONFIGURATION ==========
+destino = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\z_dados_sinteticos\raw_data'
+n_estados = 3
+estacoes_por_estado = 4
+anos = [2019, 2020]
+seed = 42
+# ===================================
+
+ESTADOS = ['SP', 'RJ', 'MG', 'RS', 'PR', 'BA', 'PE', 'ES', 'GO', 'DF', 'SC', 'CE']
+
+# Poluente -> (nome no CSV, média típica em µg/m³ (CO em ppm), unidades possíveis)
+POLUENTES = {
+    'CO': (['CO'], 0.8, ['ppm', 'ppb']),
+    'NO2': (['NO2'], 35.0, ['µg/m3', 'ppb', 'ug/m3']),
+    'O3': (['O3'], 50.0, ['µg/m³', 'ppb', 'ppm']),
+    'SO2': (['SO2'], 8.0, ['µg/m3', 'ppb']),
+    'MP10': (['MP10', 'PM10', 'pm10', 'Pm10'], 30.0, ['µg/m³', 'ug/m3', 'Âµg/mÂ³']),
+    'MP2.5': (['MP2.5'], 15.0, ['µg/m³', 'µg/m3']),
+}
+
+FRACAO_BOM = 0.25         # arquivos com BOM no cabeçalho
+FRACAO_VIRGULA = 0.2      # valores com vírgula decimal
+FRACAO_AUSENTE = 0.03     # valores 'ND' ou vazios
+FRACAO_DATA_BR = 0.3      # arquivos com datas dd/mm/aaaa
+
+
+def converter_de_padrao(valores, poluente, unidade):
+    """Converte valores da unidade padrão (µg/m³; CO em ppm) para `unidade`."""
+    mm = massa_molar.get(poluente)
+    if poluente == 'CO':
+        return valores * 1000 if unidade == 'ppb' else valores
+    if unidade == 'ppm':
+        return valores * PPM_CONVERSION / (mm * 1000)
+    if unidade == 'ppb':
+        return valores * PPM_CONVERSION / mm
+    return valores
+
+
+def gerar_arquivo(rng, estacao, ano, data_br):
+    """DataFrame de um ano de medições horárias de todos os poluentes de uma estação."""
+    dias = pd.date_range(f'{ano}-01-01', f'{ano}-12-31', freq='D')
+    n_horas = len(dias) * 24
+    datas = np.repeat(dias, 24)
+    horas = np.tile(np.arange(1, 25), len(dias))
+    texto_datas = datas.strftime('%d/%m/%Y' if data_br else '%Y-%m-%d')
+    texto_horas = pd.Series(horas).map('{:02d}:00'.format)
+    texto_horas[horas == 24] = '24:00:00'
+
+    blocos = []
+    for poluente, (nomes, media, unidades) in POLUENTES.items():
+        # Ciclo diário + ruído log-normal em torno da média típica
+        ciclo = 1 + 0.3 * np.sin(2 * np.pi * (horas - 8) / 24)
+        valores = media * ciclo * rng.lognormal(0, 0.5, n_horas)
+
+        unidade = unidades[rng.integers(len(unidades))]
+        valores = converter_de_padrao(valores, poluente, unidade.replace('Âµg/mÂ³', 'µg/m³'))
+        texto = pd.Series(np.round(valores, 3)).astype(str)
+
+        virgula = rng.random(n_horas) < FRACAO_VIRGULA
+        texto[virgula] = texto[virgula].str.replace('.', ',', regex=False)
+        ausente = rng.random(n_horas) < FRACAO_AUSENTE
+        texto[ausente] = np.where(rng.random(ausente.sum()) < 0.5, 'ND', '')
+
+        blocos.append(pd.DataFrame({
+            'Data': texto_datas,
+            'Hora': texto_horas,
+            'Estacao': estacao,
+            'Poluente': rng.choice(nomes, n_horas),
+            'Valor': texto,
+            'Unidade': unidade,
+        }))
+
+    return pd.concat(blocos, ignore_index=True)
+
+
+def gerar(destino, n_estados=3, estacoes_por_estado=4, anos=(2019, 2020), seed=42):
+    """
+    Gera a árvore de CSVs sintéticos em `destino`.
+
+    Returns:
+        int: número total de linhas gravadas.
+    """
+    rng = np.random.default_rng(seed)
+    total = 0
+    for estado in ESTADOS[:n_estados]:
+        pasta = os.path.join(destino, estado)
+        os.makedirs(pasta, exist_ok=True)
+        data_br = rng.random() < FRACAO_DATA_BR
+
+        for i in range(estacoes_por_estado):
+            estacao = f'Estação {estado} {i + 1:02d}'
+            for ano in anos:
+                df = gerar_arquivo(rng, estacao, ano, data_br)
+                caminho = os.path.join(pasta, f'{estacao}_{ano}.csv')
+                with open(caminho, 'w', encoding='latin1', errors='replace', newline='') as f:
+                    # BOM de um arquivo UTF-8, como aparece quando lido em latin1
+                    if rng.random() < FRACAO_BOM:
+                        f.write('ï»¿')
+                    df.to_csv(f, index=False)
+                total += len(df)
+    return total
+
+
+if __name__ == '__main__':
+    n = gerar(destino, n_estados, estacoes_por_estado, anos, seed)
+    print(f"{n:,} linhas geradas em {destino}")
@@ -0,0 +1,344 @@
+"""
+Agregação dos dados horários nos períodos de média da CONAMA 506.
+
+Cada período é uma média móvel opcional sobre a série horária de cada
+estação, seguida de uma redução por janela de calendário (dia ou ano). Os
+períodos da resolução já estão em PERIODOS; outros podem ser declarados no
+próprio limites_conama_506.csv (ver `registrar_periodos`), sem código novo.
+As agregações são expressões lazy do Polars (deslocamentos e
+group_by_dynamic) sobre todas as estações de uma vez, executadas em
+paralelo pelo engine. A média móvel usa uma grade horária densa, então
+falhas na série contam como horas ausentes em vez de serem puladas.
+
+A soma de cada janela móvel junta os `horas` valores deslocados com soma
+compensada (Neumaier), custo O(n·h) por estação (n horas da grade, h horas
+da janela), em vez de uma soma acumulada O(n) com subtração. A soma
+acumulada de todo o histórico perde precisão: uma janela com média
+exatamente igual a um limite sai alguns ulps acima e vira excedência em
+`valor > limite` (ver _check_media_movel.py). Com h = 8 o custo extra é pequeno.
+
+Mudança em relação à versão original de 2_verificar_violacoes.py: a média
+de 8h era `rolling(8, min_periods=1)` sobre as 8 últimas LINHAS da estação,
+aceitando uma janela com um único valor; agora são as 8 horas de relógio
+anteriores, com pelo menos 6 horas válidas (FRACAO_MINIMA_MEDIA_MOVEL), e
+janelas com menos ficam nulas. Em séries com falhas as contagens de
+excedência mudam nos dois sentidos (janelas que atravessavam falhas longas
+deixam de existir; as que antes diluíam um pico com horas de outros dias
+passam a não diluir). As regras usadas em cada período são gravadas em
+z_violacoes_completo/limites.csv (colunas Media_Movel_Horas e Horas_Minimas).
+"""
+import math
+import polars as pl
+
+# Período -> (horas da média móvel ou None, janela de calendário, redução na janela)
+PERIODOS = {
+    '24h': (None, '1d', 'max'),
+    'med. arit. anual': (None, '1y', 'media'),
+    'max. med. hor. do dia (1h)': (1, '1d', 'max'),
+    'max. med. mov. do dia (8h)': (8, '1d', 'max'),
+    'med. geom. anual': (None, '1y', 'media_geometrica'),
+}
+
+# Fração mínima de horas válidas numa janela de média móvel (6 de 8 horas)
+FRACAO_MINIMA_MEDIA_MOVEL = 0.75
+
+
+def horas_minimas(horas, fracao_minima=FRACAO_MINIMA_MEDIA_MOVEL):
+    """Horas válidas necessárias numa média móvel de `horas` horas (pelo menos uma)."""
+    return max(1, math.ceil(fracao_minima * horas))
+
+# Coluna de saída de cada janela: a data do dia ou o ano
+CHAVES_JANELA = {
+    '1d': ('Date', pl.col('Data_Hora').dt.date()),
+    '1y': ('Year', pl.col('Data_Hora').dt.year()),
+}
+
+REDUCOES = {
+    'max': lambda valor: valor.max(),
+    'media': lambda valor: valor.mean(),
+    # o log de valores negativos dá NaN, que fica fora da média (como no pandas)
+    'media_geometrica': lambda valor: valor.log().fill_nan(None).mean().exp(),
+}
+
+# Colunas opcionais de limites_conama_506.csv que declaram um período
+COLUNAS_PERIODO = ['Media_Movel', 'Janela', 'Reducao']
+
+
+def registrar_periodos(limites):
+    """
+    Registra em PERIODOS os períodos declarados na tabela de limites.
+
+    Linhas com Janela preenchida definem (ou redefinem) o seu Periodo:
+    Media_Movel em horas (vazio = sem média móvel), Janela '1d' ou '1y' e
+    Reducao 'max', 'media' ou 'media_geometrica'. Sem essas colunas, valem
+    só os períodos já conhecidos.
+
+    Parameters:
+        limites (pl.DataFrame): tabela lida de limites_conama_506.csv
+
+    Returns:
+        list: períodos registrados a partir da tabela
+    """
+    if 'Janela' not in limites.columns:
+        return []
+
+    faltando = [c for c in COLUNAS_PERIODO if c not in limites.columns]
+    if faltando:
+        raise ValueError(f"limites_conama_506.csv declara Janela mas não tem as colunas {faltando}")
+
+    registrados = []
+    for linha in limites.filter(pl.col('Janela').is_not_null()).iter_rows(named=True):
+        periodo, janela, reducao = linha['Periodo'], linha['Janela'], linha['Reducao']
+        if janela not in CHAVES_JANELA:
+            raise ValueError(f"Período '{periodo}': janela {janela!r} não suportada (use uma de {list(CHAVES_JANELA)})")
+        if reducao not in REDUCOES:
+            raise ValueError(f"Período '{periodo}': redução {reducao!r} não suportada (use uma de {list(REDUCOES)})")
+        media_movel = int(linha['Media_Movel']) if linha['Media_Movel'] is not None else None
+        PERIODOS[periodo] = (media_movel, janela, reducao)
+        registrados.append(periodo)
+    return registrados
+
+
+def regras_periodos(fracao_minima=FRACAO_MINIMA_MEDIA_MOVEL):
+    """
+    Regras de agregação de cada período em PERIODOS, para documentar a saída.
+
+    Parameters:
+        fracao_minima (float): fração mínima de horas válidas na média móvel
+
+    Returns:
+        pl.DataFrame: Periodo, Media_Movel_Horas (nulo = sem média móvel),
+            Horas_Minimas, Janela e Reducao
+    """
+    linhas = [
+        (periodo, media_movel, horas_minimas(media_movel, fracao_minima) if media_movel else None, janela, reducao)
+        for periodo, (media_movel, janela, reducao) in PERIODOS.items()
+    ]
+    return pl.DataFrame(
+        linhas,
+        schema={'Periodo': pl.String, 'Media_Movel_Horas': pl.Int32, 'Horas_Minimas': pl.Int32,
+                'Janela': pl.String, 'Reducao': pl.String},
+        orient='row'
+    )
+
+
+def media_movel_grade(dados, horas, minimo_horas):
+    """
+    Média móvel de `horas` horas de todas as estações sobre uma grade horária densa.
+
+    Cada estação recebe todas as horas entre a primeira e a última medição
+    (horas sem linha entram como ausentes), então a janela cobre sempre as
+    `horas` horas de relógio anteriores, e não as últimas linhas da série
+    como o `rolling(8, min_periods=1)` da versão original; com `minimo_horas`
+    > 1 as contagens de excedência diferem das dessa versão.
+
+    A soma de cada janela junta os `horas` valores deslocados com soma
+    compensada (Neumaier): custo O(n·h) para n horas da grade, e não O(n)
+    como uma soma acumulada. A soma acumulada foi descartada de propósito:
+    sobre todo o histórico ela perde precisão na subtração, e uma média
+    exatamente igual a um limite sairia alguns ulps acima dele, virando
+    excedência em `valor > limite`.
+
+    Parameters:
+        dados (pl.LazyFrame): station_id, Data_Hora e Valor_Padronizado,
+            ordenado por station_id e Data_Hora
+        horas (int): tamanho da janela
+        minimo_horas (int): horas válidas necessárias; janelas com menos ficam nulas
+
+    Returns:
+        pl.LazyFrame: station_id, Data_Hora (todas as horas da grade) e
+            Valor_Padronizado com a média móvel
+    """
+    valor = pl.col('Valor_Padronizado')
+    grade = (
+        dados.group_by('station_id')
+        .agg(pl.datetime_range(pl.col('Data_Hora').min(), pl.col('Data_Hora').max(), '1h').alias('Data_Hora'))
+        .explode('Data_Hora')
+        .sort(['station_id', 'Data_Hora'])
+        .join(dados, on=['station_id', 'Data_Hora'], how='left', maintain_order='left')
+    )
+
+    soma, compensacao, termo = pl.col('soma'), pl.col('compensacao'), pl.col('termo')
+    grade = grade.with_columns(soma=pl.lit(0.0), compensacao=pl.lit(0.0), validas=pl.lit(0, pl.Int32))
+    for k in range(horas):
+        # termo = valor de k horas antes, na mesma estação (ausente = 0, não conta como válida)
+        grade = (
+            grade.with_columns(termo=valor.shift(k).over('station_id'))
+            .with_columns(
+                validas=pl.col('validas') + termo.is_not_null().cast(pl.Int32),
+                termo=termo.fill_null(0.0)
+            )
+            .with_columns(nova_soma=soma + termo)
+            .with_columns(
+                compensacao=compensacao + pl.when(soma.abs() >= termo.abs())
+                .then((soma - pl.col('nova_soma')) + termo)
+                .otherwise((termo - pl.col('nova_soma')) + soma),
+                soma=pl.col('nova_soma')
+            )
+        )
+
+    return (
+        grade.with_columns(soma=soma + compensacao)
+        .select(
+            'station_id', 'Data_Hora',
+            pl.when(pl.col('validas') >= minimo_horas)
+            .then(pl.col('soma') / pl.col('validas'))
+            .alias('Valor_Padronizado')
+        )
+    )
+
+
+def aggregate_data(dados, periodo, fracao_minima=FRACAO_MINIMA_MEDIA_MOVEL):
+    """
+    Agrega os dados horários de todas as estações em `periodo`.
+
+    Parameters:
+        dados (pl.LazyFrame): station_id, Data_Hora e Valor_Padronizado,
+            ordenado por station_id e Data_Hora
+        periodo (str): chave de PERIODOS
+        fracao_minima (float): fração das horas da média móvel que precisam
+            ter valor (arredondada para cima, no mínimo 1 hora)
+
+    Returns:
+        pl.LazyFrame: station_id, Date ou Year e Valor_Padronizado, por
+            estação e em ordem cronológica
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f"Unsupported period: {periodo}")
+    media_movel, janela, reducao = PERIODOS[periodo]
+    chave, expressao_chave = CHAVES_JANELA[janela]
+    valor = pl.col('Valor_Padronizado')
+
+    # A média móvel de 1 hora é o próprio valor horário: não precisa da grade
+    if media_movel == 1:
+        media_movel = None
+
+    serie = dados
+    if media_movel is not None:
+        minimo_horas = horas_minimas(media_movel, fracao_minima)
+        serie = media_movel_grade(dados, media_movel, minimo_horas)
+
+    agregado = (
+        serie.group_by_dynamic('Data_Hora', every=janela, group_by='station_id')
+        .agg(REDUCOES[reducao](valor))
+        .select('station_id', expressao_chave.alias(chave), 'Valor_Padronizado')
+    )
+    if media_movel is not None:
+        # A grade preenche as falhas; só ficam os dias (ou anos) com medição
+        com_dados = dados.select('station_id', expressao_chave.alias(chave)).unique()
+        agregado = agregado.join(com_dados, on=['station_id', chave], how='semi', maintain_order='left')
+    return agregado
+
+
+class CacheAgregacoes:
+    """
+    Agregações de um lote de estações, cada uma calculada uma única vez.
+
+    Os dados horários são lidos uma vez e resumidos por (station_id, dia):
+    máximo, soma e horas válidas, e soma e contagem dos logs positivos. Os
+    períodos diários ('24h', '1h') e anuais saem desse resumo, e o máximo
+    diário de cada média móvel (ex.: 8h) é calculado uma vez e guardado
+    por tamanho de janela. Cada período fica memorizado, então linhas da
+    tabela de limites com o mesmo Periodo reaproveitam o resultado.
+    Combinações que o resumo diário não cobre (média ou média geométrica
+    de uma média móvel) caem em `aggregate_data`.
+
+    Parameters:
+        dados (pl.LazyFrame): station_id, Data_Hora e Valor_Padronizado,
+            ordenado por station_id e Data_Hora
+        fracao_minima (float): repassada às médias móveis
+    """
+
+    def __init__(self, dados, fracao_minima=FRACAO_MINIMA_MEDIA_MOVEL):
+        self.dados = dados
+        self.fracao_minima = fracao_minima
+        self._horario = None
+        self._diario = None
+        self._maximos_moveis = {}
+        self._periodos = {}
+
+    def horario(self):
+        if self._horario is None:
+            self._horario = self.dados.collect()
+        return self._horario
+
+    def diario(self):
+        """Resumo diário do lote (pl.DataFrame por station_id e Date)."""
+        if self._diario is None:
+            valor = pl.col('Valor_Padronizado')
+            log = valor.log().fill_nan(None)
+            self._diario = (
+                self.horario().lazy()
+                .group_by_dynamic('Data_Hora', every='1d', group_by='station_id')
+                .agg(
+                    Maximo=valor.max(),
+                    Soma=valor.sum(),
+                    Validas=valor.count(),
+                    Soma_Log=log.sum(),
+                    Validas_Log=log.count()
+                )
+                .with_columns(pl.col('Data_Hora').dt.date().alias('Date'))
+                .drop('Data_Hora')
+                .collect()
+            )
+        return self._diario
+
+    def maximo_movel(self, horas):
+        """Máximo diário da média móvel de `horas` horas (pl.DataFrame: station_id, Date, Maximo)."""
+        if horas not in self._maximos_moveis:
+            minimo_horas = horas_minimas(horas, self.fracao_minima)
+            self._maximos_moveis[horas] = (
+                media_movel_grade(self.horario().lazy(), horas, minimo_horas)
+                .group_by_dynamic('Data_Hora', every='1d', group_by='station_id')
+                .agg(Maximo=pl.col('Valor_Padronizado').max())
+                .with_columns(pl.col('Data_Hora').dt.date().alias('Date'))
+                .drop('Data_Hora')
+                .join(self.diario().lazy().select('station_id', 'Date'), on=['station_id', 'Date'],
+                      how='semi', maintain_order='left')
+                .collect()
+            )
+        return self._maximos_moveis[horas]
+
+    def agregar(self, periodo):
+        """
+        Mesmo resultado de `aggregate_data(dados, periodo)`, já coletado e memorizado.
+
+        Returns:
+            pl.DataFrame: station_id, Date ou Year e Valor_Padronizado
+        """
+        if periodo not in self._periodos:
+            self._periodos[periodo] = self._calcular(periodo)
+        return self._periodos[periodo]
+
+    def _calcular(self, periodo):
+        if periodo not in PERIODOS:
+            raise ValueError(f"Unsupported period: {periodo}")
+        media_movel, janela, reducao = PERIODOS[periodo]
+        anual = janela == '1y'
+
+        if media_movel is not None and media_movel > 1:
+            if reducao != 'max':
+                return aggregate_data(self.horario().lazy(), periodo, self.fracao_minima).collect()
+            diario = self.maximo_movel(media_movel)
+        else:
+            # a média móvel de 1 hora é o próprio valor horário
+            diario = self.diario()
+
+        # No dia a redução usa o resumo da própria linha; no ano, os totais dos dias
+        total = (lambda coluna: pl.col(coluna).sum()) if anual else pl.col
+        if reducao == 'max':
+            valor = pl.col('Maximo').max() if anual else pl.col('Maximo')
+        elif reducao == 'media':
+            valor = pl.when(total('Validas') > 0).then(total('Soma') / total('Validas'))
+        else:
+            valor = pl.when(total('Validas_Log') > 0).then((total('Soma_Log') / total('Validas_Log')).exp())
+
+        if not anual:
+            return diario.select('station_id', 'Date', valor.alias('Valor_Padronizado'))
+        return (
+            diario.lazy()
+            .group_by_dynamic('Date', every='1y', group_by='station_id')
+            .agg(valor.alias('Valor_Padronizado'))
+            .select('station_id', pl.col('Date').dt.year().alias('Year'), 'Valor_Padronizado')
+            .collect()
+        )
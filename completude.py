@@ -0,0 +1,135 @@
+"""
+Cubo de completude: horas válidas por (estação, poluente, dia) e dias
+válidos por (estação, poluente, mês), materializados a partir do dataset
+horário.
+
+O cubo segue as partições do dataset (Poluente=/Estado=/Ano=) e cada
+partição só é recalculada quando o dados.parquet correspondente é mais novo
+que ela, então a atualização depois de uma ingestão incremental lê apenas
+as partições que a ingestão regravou. As etapas seguintes filtram dias e
+meses válidos juntando o cubo, sem outro groupby sobre os dados horários.
+"""
+import os
+import shutil
+import pandas as pd
+import polars as pl
+
+from esquemas import validar_parquet, validar_parquets
+
+# Regras de validade usadas pelas análises
+HORAS_MINIMAS_DIA = 18   # dia válido: ≥ 18 horas com dado (2_mannkendall.py)
+DIAS_MINIMOS_MES = 20    # mês válido: ≥ 20 dias válidos (2_mannkendall.py)
+
+
+def _cubo_particao(dados_path):
+    """Níveis diário e mensal de uma partição do dataset (pl.DataFrame, pl.DataFrame)."""
+    diario = (
+        pl.scan_parquet(dados_path)
+        .group_by(['Estacao', pl.col('Data_Hora').dt.date().alias('Dia')])
+        .agg(
+            Horas_Validas=pl.col('Valor_Padronizado').is_not_null().sum().cast(pl.Int32),
+            Horas_Nao_Negativas=(pl.col('Valor_Padronizado') >= 0).sum().cast(pl.Int32)
+        )
+        .sort(['Estacao', 'Dia'])
+        .collect()
+    )
+    mensal = (
+        diario
+        .group_by(['Estacao', pl.col('Dia').dt.year().alias('Ano'), pl.col('Dia').dt.month().alias('Mes')])
+        .agg(
+            Dias_Validos=(pl.col('Horas_Validas') >= HORAS_MINIMAS_DIA).sum().cast(pl.Int32),
+            Horas_Validas=pl.col('Horas_Validas').sum(),
+            Horas_Nao_Negativas=pl.col('Horas_Nao_Negativas').sum()
+        )
+        .sort(['Estacao', 'Ano', 'Mes'])
+    )
+    return diario, mensal
+
+
+def atualizar_cubo(dataset_path, cubo_path):
+    """
+    Recalcula as partições do cubo cujo dados.parquet mudou e remove as que
+    não existem mais no dataset.
+
+    Returns:
+        tuple: (partições recalculadas, partições removidas)
+    """
+    particoes = set()
+    recalculadas = 0
+    for pasta, _, nomes in os.walk(dataset_path):
+        if 'dados.parquet' not in nomes:
+            continue
+        relativa = os.path.relpath(pasta, dataset_path)
+        particoes.add(relativa)
+
+        dados_path = os.path.join(pasta, 'dados.parquet')
+        destino = os.path.join(cubo_path, relativa)
+        mensal_path = os.path.join(destino, 'mensal.parquet')
+        if os.path.exists(mensal_path) and os.path.getmtime(mensal_path) >= os.path.getmtime(dados_path):
+            continue
+
+        diario, mensal = _cubo_particao(dados_path)
+        os.makedirs(destino, exist_ok=True)
+        diario.write_parquet(os.path.join(destino, 'diario.parquet'))
+        validar_parquet(os.path.join(destino, 'diario.parquet'), 'completude_diario')
+        # mensal.parquet por último: é a marca de que a partição está atualizada
+        mensal.write_parquet(mensal_path)
+        validar_parquet(mensal_path, 'completude_mensal')
+        recalculadas += 1
+
+    removidas = 0
+    for pasta, _, nomes in list(os.walk(cubo_path)):
+        relativa = os.path.relpath(pasta, cubo_path)
+        if 'mensal.parquet' in nomes and relativa not in particoes:
+            shutil.rmtree(pasta)
+            removidas += 1
+    return recalculadas, removidas
+
+
+def carregar_cubo(cubo_path, nivel, poluente, dimensao):
+    """
+    Lê um nível do cubo ('diario' ou 'mensal') para um poluente, com o
+    station_id da dimensão no lugar de Estado e Estacao.
+
+    Returns:
+        pd.DataFrame: station_id e as colunas do nível.
+    """
+    pasta = os.path.join(cubo_path, f'Poluente={poluente}')
+    arquivos = [
+        os.path.join(raiz, f) for raiz, _, nomes in os.walk(pasta) for f in nomes if f == f'{nivel}.parquet'
+    ]
+    if not arquivos:
+        raise FileNotFoundError(
+            f"Nenhuma partição '{nivel}' do cubo de completude para o poluente {poluente} em {cubo_path}. "
+            f"Rode 1_extracao_padronizacao.py para gerar o cubo."
+        )
+    validar_parquets(arquivos, f'completude_{nivel}')
+
+    cubo = pl.concat([
+        pl.read_parquet(f).with_columns(Estado=pl.lit(os.path.basename(os.path.dirname(os.path.dirname(f))).split('=', 1)[1]))
+        for f in arquivos
+    ]).with_columns(pl.col('Estacao').cast(pl.Utf8))
+
+    chaves = pl.from_pandas(dimensao[['Estado', 'Estacao', 'station_id']].astype({'Estado': str, 'Estacao': str}))
+    cubo = cubo.join(chaves, on=['Estado', 'Estacao'], how='inner').drop(['Estado', 'Estacao'])
+    return cubo.select(['station_id', pl.exclude('station_id')]).to_pandas()
+
+
+def dias_validos(cubo_path, poluente, dimensao):
+    """
+    Dias com ≥ HORAS_MINIMAS_DIA horas em meses com ≥ DIAS_MINIMOS_MES dias válidos.
+
+    Returns:
+        pd.DataFrame: station_id, Dia (datetime64), Ano, Mes, Dias_Validos do mês.
+    """
+    diario = carregar_cubo(cubo_path, 'diario', poluente, dimensao)
+    mensal = carregar_cubo(cubo_path, 'mensal', poluente, dimensao)
+
+    diario = diario[diario['Horas_Validas'] >= HORAS_MINIMAS_DIA].copy()
+    diario['Dia'] = pd.to_datetime(diario['Dia'])
+    diario['Ano'] = diario['Dia'].dt.year.astype('int32')
+    diario['Mes'] = diario['Dia'].dt.month.astype('int8')
+
+    mensal = mensal[mensal['Dias_Validos'] >= DIAS_MINIMOS_MES][['station_id', 'Ano', 'Mes', 'Dias_Validos']]
+    mensal = mensal.astype({'Ano': 'int32', 'Mes': 'int8'})
+    return diario[['station_id', 'Dia', 'Ano', 'Mes']].merge(mensal, on=['station_id', 'Ano', 'Mes'], how='inner')
@@ -0,0 +1,240 @@
+"""
+Esquema compartilhado das colunas de texto de baixa cardinalidade.
+
+Estado, Estacao, Poluente e Unidade se repetem em todas as linhas horárias.
+Gravadas com dictionary encoding no Parquet, elas voltam como 'category' no
+pandas (pd.read_parquet) e como pl.Categorical no Polars, ocupando um inteiro
+por linha em vez de uma string. Os loaders chamam `categorizar` para manter
+esse tipo mesmo depois de concatenações e joins que o perdem.
+
+Ao agrupar por essas colunas no pandas, use observed=True: sem isso o groupby
+cria grupos para todas as categorias, inclusive as que não aparecem no recorte.
+
+ESQUEMAS registra colunas, tipos e nulidade de cada artefato Parquet do
+pipeline; `validar_parquet` confere um arquivo contra o registro lendo só o
+rodapé, e cada etapa chama a validação ao ler e ao gravar.
+"""
+import os
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COLUNAS_CATEGORICAS = ['Estado', 'Estacao', 'Poluente', 'Unidade', 'Unidade_Padronizada', 'Periodo', 'Arquivo']
+
+# Tipo Arrow das colunas categóricas nos Parquets gravados pelo pipeline
+TIPO_CATEGORICO = pa.dictionary(pa.int32(), pa.string())
+
+
+def categorizar(df):
+    """
+    Converte as COLUNAS_CATEGORICAS presentes em `df` para tipo categórico.
+
+    Aceita pd.DataFrame, pl.DataFrame ou pl.LazyFrame e devolve o mesmo tipo.
+    """
+    if isinstance(df, (pl.DataFrame, pl.LazyFrame)):
+        schema = df.collect_schema() if isinstance(df, pl.LazyFrame) else df.schema
+        colunas = [c for c in COLUNAS_CATEGORICAS if c in schema and schema[c] != pl.Categorical]
+        return df.with_columns([pl.col(c).cast(pl.Utf8).cast(pl.Categorical) for c in colunas])
+
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+# ========== REGISTRO DE ESQUEMAS DOS ARTEFATOS ==========
+# Cada artefato Parquet do pipeline: coluna -> (família de tipo, aceita nulos).
+# As famílias aceitam as variações que pandas e Polars gravam para o mesmo dado
+# (string ou large_string, índices de dicionário int8 ou uint32, etc.).
+FAMILIAS_TIPO = {
+    'texto': lambda t: (
+        pa.types.is_string(t) or pa.types.is_large_string(t)
+        or (pa.types.is_dictionary(t) and (pa.types.is_string(t.value_type) or pa.types.is_large_string(t.value_type)))
+    ),
+    'inteiro': pa.types.is_integer,
+    'real': pa.types.is_floating,
+    'numero': lambda t: pa.types.is_integer(t) or pa.types.is_floating(t),
+    'booleano': pa.types.is_boolean,
+    'data': pa.types.is_date,
+    'timestamp': pa.types.is_timestamp,
+    'timestamp_fuso': lambda t: pa.types.is_timestamp(t) and t.tz is not None,
+}
+
+ESQUEMAS = {
+    # proccessed_data/dados_horarios/Poluente=/Estado=/Ano=/dados.parquet (ingestao.py);
+    # Poluente, Estado e Ano estão no caminho, não no arquivo
+    'horario_dataset': {
+        'Data': ('timestamp', False),
+        'Hora': ('texto', False),
+        'Data_Hora': ('timestamp_fuso', False),
+        'Estacao': ('texto', True),
+        'Valor': ('real', False),
+        'Unidade': ('texto', True),
+        'Valor_Padronizado': ('real', False),
+        'Unidade_Padronizada': ('texto', False),
+        'Arquivo': ('texto', False),
+    },
+    # resultados_poluentes_parquet_loc/<pol>.parquet e z_chunks_com_loc/<pol>/part_N.parquet
+    'horario': {
+        'station_id': ('inteiro', False),
+        'Data': ('timestamp', False),
+        'Hora': ('texto', False),
+        'Data_Hora': ('timestamp_fuso', False),
+        'Poluente': ('texto', False),
+        'Valor': ('real', False),
+        'Unidade': ('texto', True),
+        'Valor_Padronizado': ('real', False),
+        'Unidade_Padronizada': ('texto', False),
+    },
+    # proccessed_data/data_funcionamento.parquet (relacao_data_funcionamento.py)
+    'funcionamento': {
+        'Estado': ('texto', False),
+        'Estacao': ('texto', True),
+        'Poluente': ('texto', False),
+        'Data_Hora_Inicio': ('timestamp_fuso', False),
+        'Data_Hora_Fim': ('timestamp_fuso', False),
+        'Horas_Com_Dado': ('inteiro', False),
+    },
+    # proccessed_data/cubo_completude/Poluente=/Estado=/Ano=/{diario,mensal}.parquet (completude.py)
+    'completude_diario': {
+        'Estacao': ('texto', True),
+        'Dia': ('data', False),
+        'Horas_Validas': ('inteiro', False),
+        'Horas_Nao_Negativas': ('inteiro', False),
+    },
+    'completude_mensal': {
+        'Estacao': ('texto', True),
+        'Ano': ('inteiro', False),
+        'Mes': ('inteiro', False),
+        'Dias_Validos': ('inteiro', False),
+        'Horas_Validas': ('inteiro', False),
+        'Horas_Nao_Negativas': ('inteiro', False),
+    },
+    # z_violacoes_completo/<pol>_combinado.parquet (2_verificar_violacoes.py)
+    'violacoes': {
+        'Estado': ('texto', False),
+        'Estacao': ('texto', False),
+        'Valor_Padronizado': ('real', True),
+        'Latitude': ('real', True),
+        'Longitude': ('real', True),
+        'Excedencias': ('inteiro', False),  # máscara de bits dos padrões (excedencias.py)
+        'Poluente': ('texto', False),
+        'Periodo': ('texto', False),
+    },
+    # z_testes_mannkendall*/mk_<pol>.parquet (2_mannkendall.py)
+    'mk': {
+        'Poluente': ('texto', False),
+        'Estado': ('texto', False),
+        'Estacao': ('texto', False),
+        'Latitude': ('real', False),
+        'Longitude': ('real', False),
+        'Tendencia': ('texto', False),
+        'p_valor': ('real', True),
+        'slope': ('real', True),
+        'z': ('real', True),
+        'Tau': ('real', True),
+        'n_dias': ('inteiro', False),
+    },
+    # z_sincronicidade/sincronicidade_<pol>_<padrao>.parquet (3_analise_sincronicidade.py)
+    'sincronicidade': {
+        'Estacao': ('texto', False),
+        'Data': ('timestamp', False),
+        'Latitude': ('real', True),
+        'Longitude': ('real', True),
+        'SC_km': ('numero', True),
+        'Estado': ('texto', True),
+    },
+}
+
+# Colunas que só existem em parte dos arquivos de um artefato
+COLUNAS_OPCIONAIS = {
+    # 'Date' nos períodos diários, 'Year' nos anuais (float quando o concat junta os dois)
+    'violacoes': {'Date': ('data', True), 'Year': ('numero', True)},
+}
+
+
+def artefato_do_arquivo(file_path):
+    """Deduz o artefato do registro pelo nome do arquivo (None se não reconhecido)."""
+    nome = os.path.basename(file_path)
+    if nome == 'dados.parquet':
+        return 'horario_dataset'
+    if nome == 'data_funcionamento.parquet':
+        return 'funcionamento'
+    if nome in ('diario.parquet', 'mensal.parquet'):
+        return f"completude_{nome.split('.')[0]}"
+    if nome.startswith('mk_'):
+        return 'mk'
+    if nome.startswith('sincronicidade_'):
+        return 'sincronicidade'
+    if nome.endswith('_combinado.parquet'):
+        return 'violacoes'
+    if nome.startswith('part_') or os.path.basename(os.path.dirname(file_path)) == 'resultados_poluentes_parquet_loc':
+        return 'horario'
+    return None
+
+
+def validar_parquet(file_path, artefato):
+    """
+    Confere colunas obrigatórias, tipos e nulos de um Parquet contra
+    ESQUEMAS[artefato] lendo só o rodapé (schema e estatísticas dos row
+    groups), sem carregar dados.
+
+    Parameters:
+        file_path (str): arquivo Parquet.
+        artefato (str): chave de ESQUEMAS.
+
+    Returns:
+        pq.FileMetaData: metadados do arquivo (num_rows, row groups).
+
+    Raises:
+        ValueError: com todos os problemas encontrados no arquivo.
+    """
+    metadados = pq.read_metadata(file_path)
+    schema = metadados.schema.to_arrow_schema()
+
+    # Nulos por coluna somados das estatísticas dos row groups (None se algum não tem)
+    nulos = {}
+    for i in range(metadados.num_row_groups):
+        row_group = metadados.row_group(i)
+        for j in range(row_group.num_columns):
+            coluna = row_group.column(j)
+            estatisticas = coluna.statistics
+            if estatisticas is None or not estatisticas.has_null_count:
+                nulos[coluna.path_in_schema] = None
+            elif nulos.get(coluna.path_in_schema, 0) is not None:
+                nulos[coluna.path_in_schema] = nulos.get(coluna.path_in_schema, 0) + estatisticas.null_count
+
+    problemas = []
+    esperado = {**ESQUEMAS[artefato], **COLUNAS_OPCIONAIS.get(artefato, {})}
+    for col, (familia, aceita_nulos) in esperado.items():
+        if col not in schema.names:
+            if col in ESQUEMAS[artefato]:
+                problemas.append(f"coluna obrigatória ausente: {col}")
+            continue
+        tipo = schema.field(col).type
+        if not FAMILIAS_TIPO[familia](tipo):
+            problemas.append(f"{col}: tipo {tipo}, esperado {familia}")
+        if not aceita_nulos and nulos.get(col):
+            problemas.append(f"{col}: {nulos[col]} nulos em coluna que não aceita nulos")
+
+    if problemas:
+        raise ValueError(f"{file_path} não segue o esquema '{artefato}':\n  " + "\n  ".join(problemas))
+    return metadados
+
+
+def validar_parquets(caminho, artefato):
+    """
+    Valida com `validar_parquet` um arquivo, uma lista de arquivos ou todos os
+    .parquet de uma pasta (recursivamente).
+
+    Returns:
+        int: total de linhas nos arquivos validados.
+    """
+    if isinstance(caminho, str) and os.path.isdir(caminho):
+        caminho = [
+            os.path.join(raiz, f) for raiz, _, nomes in os.walk(caminho) for f in sorted(nomes) if f.endswith('.parquet')
+        ]
+    elif isinstance(caminho, str):
+        caminho = [caminho]
+    return sum(validar_parquet(f, artefato).num_rows for f in caminho)
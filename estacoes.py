@@ -0,0 +1,395 @@
+"""
+Dimensão de estações: uma linha por (Estado, Estacao) com um station_id int32
+e as coordenadas já em float.
+
+Os dados horários guardam só o station_id (ver _add_coords.py); quem precisa
+de Estado, Estacao, Latitude ou Longitude junta a dimensão com
+`anexar_estacoes`, em vez de repetir essas colunas e reconverter coordenadas
+com vírgula decimal em milhões de linhas.
+
+Os ids são estáveis: a dimensão é gravada em Parquet e, ao ser atualizada,
+as estações já conhecidas mantêm o id e as novas recebem os seguintes.
+
+Estações cujo nome não bate exatamente com os catálogos de coordenadas
+recebem uma proposta de `resolver_sem_coordenadas` (1_fill_missing_locs.py),
+que compara nomes normalizados por trigramas através de um índice invertido.
+Nomes parecidos muitas vezes são estações diferentes da mesma rede ('MG 01' e
+'MG 03', 'Bom Retiro' e 'Retiro'), então a proposta só entra na dimensão
+depois de confirmada no CSV de revisão.
+"""
+import os
+import re
+import hashlib
+import unicodedata
+from collections import Counter, defaultdict
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from esquemas import categorizar
+
+COLUNAS_DIMENSAO = ['station_id', 'Estado', 'Estacao', 'Latitude', 'Longitude', 'Fonte_Coordenada']
+
+# Prefixos de rede/órgão que os catálogos usam e os CSVs brutos nem sempre
+# (aplicados ao nome já sem acentos e em minúsculas)
+PREFIXOS_ESTACAO = [
+    r'^(sema[ _])?dcam[ _]',              # SEMA_DCAM_49, DCAM 49
+    r'^sema[ _]',                         # SEMA_03
+    r'^mpac[ _]',                         # MPAC_ABR_02_SEMSA
+    r'^s - (manual - )?([a-z]{1,3} - )?',  # S - VR - Aeroclube, S - Manual - Maracana Antiga
+    r'^[a-z]{2}-',                        # RJ-Jacarepagua, DC-Campos Eliseos
+    r'^estacao ',                         # Estacao  Suape
+]
+
+# Similaridade mínima (coeficiente de Dice entre trigramas) para propor um candidato.
+# No latlon_2024, buscando cada estação sem ela no catálogo, 0.6 achava outra estação
+# do estado para 100 de 606 nomes; com 0.8 e as regras abaixo ainda sobram 14
+# (p. ex. 'Areias' e 'Areias II'), por isso as propostas passam por confirmação
+SCORE_MINIMO = 0.8
+# Diferença mínima entre o melhor candidato e a segunda estação mais parecida
+MARGEM_MINIMA = 0.1
+# Números (e numerais romanos) do nome precisam ser os mesmos: 'Estação MG 03' não é 'Estação MG 01'
+PADRAO_NUMERO = r'\d+|\b(?:i{1,3}|iv|vi{0,3}|ix|x)\b'
+
+
+def ler_mapa_estacoes(mapa_path):
+    """
+    Lê o 'Mapa de estações de monitoramento' (sep ';', vírgula decimal).
+
+    Returns:
+        pd.DataFrame: Estacao, Latitude, Longitude (float), uma linha por nome.
+    """
+    mapa = pd.read_csv(mapa_path, sep=';', encoding='utf-8', dtype=str)
+    mapa = mapa[['Estacao1', 'Latitude', 'Longitude']].rename(columns={'Estacao1': 'Estacao'})
+    for col in ['Latitude', 'Longitude']:
+        mapa[col] = pd.to_numeric(mapa[col].str.replace(',', '.'), errors='coerce')
+    mapa['Estacao'] = mapa['Estacao'].str.strip()
+    return mapa.dropna(subset=['Latitude', 'Longitude']).drop_duplicates('Estacao')
+
+
+def ler_latlon_2024(latlon_path):
+    """
+    Lê support_data/Monitoramento_QAr_BR_latlon_2024.csv (uma linha por
+    estação e poluente monitorado).
+
+    Returns:
+        pd.DataFrame: Estado, Estacao, Latitude, Longitude, uma linha por estação.
+    """
+    latlon = pd.read_csv(latlon_path, usecols=['ESTADO', 'ESTAÇÃO', 'LATITUDE', 'LONGITUDE'])
+    latlon = latlon.rename(columns={
+        'ESTADO': 'Estado', 'ESTAÇÃO': 'Estacao', 'LATITUDE': 'Latitude', 'LONGITUDE': 'Longitude'
+    })
+    latlon['Estacao'] = latlon['Estacao'].str.strip()
+    return latlon.dropna(subset=['Latitude', 'Longitude']).drop_duplicates(['Estado', 'Estacao'])
+
+
+def atualizar_dimensao(estacoes, dimensao_anterior, mapa, latlon):
+    """
+    Monta a dimensão para as estações presentes nos dados.
+
+    Parameters:
+        estacoes (pd.DataFrame): pares (Estado, Estacao) distintos dos dados horários.
+        dimensao_anterior (pd.DataFrame): dimensão gravada antes (pode estar vazia);
+            seus ids são preservados.
+        mapa (pd.DataFrame): saída de `ler_mapa_estacoes` (tem prioridade, por nome).
+        latlon (pd.DataFrame): saída de `ler_latlon_2024` (por Estado e nome).
+
+    Returns:
+        pd.DataFrame: COLUNAS_DIMENSAO, ordenada por station_id.
+    """
+    chaves = ['Estado', 'Estacao']
+    dimensao = pd.concat([
+        dimensao_anterior[chaves + ['station_id']].astype({'Estado': str, 'Estacao': str}),
+        estacoes[chaves].astype(str)
+    ]).drop_duplicates(chaves, keep='first').reset_index(drop=True)
+
+    # Estações novas recebem ids depois do maior id já usado
+    novas = dimensao['station_id'].isna()
+    proximo = int(dimensao['station_id'].max()) + 1 if (~novas).any() else 0
+    dimensao.loc[novas, 'station_id'] = np.arange(proximo, proximo + novas.sum())
+    dimensao['station_id'] = dimensao['station_id'].astype('int32')
+
+    # Coordenadas: Mapa de estações (por nome) e, na falta, o levantamento de 2024 (por estado e nome)
+    dimensao = dimensao.merge(mapa, on='Estacao', how='left')
+    dimensao['Fonte_Coordenada'] = np.where(dimensao['Latitude'].notna(), 'mapa', None)
+    dimensao = dimensao.merge(latlon, on=chaves, how='left', suffixes=('', '_2024'))
+    sem_coord = dimensao['Latitude'].isna() & dimensao['Latitude_2024'].notna()
+    dimensao.loc[sem_coord, 'Fonte_Coordenada'] = 'latlon_2024'
+    for col in ['Latitude', 'Longitude']:
+        dimensao[col] = dimensao[col].fillna(dimensao[f'{col}_2024'])
+
+    # Coordenadas já resolvidas antes (p. ex. por nome aproximado) ficam quando as fontes não trazem nenhuma
+    anteriores = dimensao_anterior[['station_id', 'Latitude', 'Longitude', 'Fonte_Coordenada']]
+    dimensao = dimensao.merge(anteriores, on='station_id', how='left', suffixes=('', '_anterior'))
+    sem_coord = dimensao['Latitude'].isna() & dimensao['Latitude_anterior'].notna()
+    for col in ['Latitude', 'Longitude', 'Fonte_Coordenada']:
+        dimensao.loc[sem_coord, col] = dimensao.loc[sem_coord, f'{col}_anterior']
+
+    dimensao = dimensao[COLUNAS_DIMENSAO].sort_values('station_id').reset_index(drop=True)
+    return categorizar(dimensao)
+
+
+def carregar_dimensao(dimensao_path):
+    """Lê a dimensão gravada (vazia, com as colunas certas, se ainda não existe)."""
+    if not os.path.exists(dimensao_path):
+        return pd.DataFrame({
+            'station_id': pd.Series(dtype='int32'),
+            'Estado': pd.Series(dtype=str),
+            'Estacao': pd.Series(dtype=str),
+            'Latitude': pd.Series(dtype=float),
+            'Longitude': pd.Series(dtype=float),
+            'Fonte_Coordenada': pd.Series(dtype=str),
+        })
+    return pd.read_parquet(dimensao_path)
+
+
+def atribuir_station_id(dados, dimensao):
+    """
+    Troca Estado e Estacao de `dados` (pl.LazyFrame) pelo station_id da dimensão.
+
+    É um join lazy contra a dimensão (poucas centenas de linhas), que o
+    engine de streaming executa em lotes sem materializar `dados`. Estações
+    ausentes da dimensão ficam com station_id nulo, para quem chama contar
+    e descartar essas linhas.
+    """
+    chaves = pl.from_pandas(dimensao[['Estado', 'Estacao', 'station_id']].astype({'Estado': str, 'Estacao': str}))
+    return (
+        dados
+        .with_columns(pl.col('Estado').cast(pl.Utf8), pl.col('Estacao').cast(pl.Utf8))
+        .join(chaves.lazy(), on=['Estado', 'Estacao'], how='left', maintain_order='left')
+        .drop(['Estado', 'Estacao'])
+        .select(['station_id', pl.exclude('station_id')])
+    )
+
+
+def anexar_estacoes(df, dimensao, colunas=('Estado', 'Estacao', 'Latitude', 'Longitude')):
+    """
+    Acrescenta a `df` as `colunas` da dimensão, pelo station_id.
+
+    Aceita pd.DataFrame, pl.DataFrame ou pl.LazyFrame e devolve o mesmo tipo.
+    """
+    colunas = ['station_id'] + list(colunas)
+    if isinstance(df, (pl.DataFrame, pl.LazyFrame)):
+        dimensao_pl = categorizar(pl.from_pandas(dimensao[colunas]))
+        if isinstance(df, pl.LazyFrame):
+            dimensao_pl = dimensao_pl.lazy()
+        return df.join(dimensao_pl, on='station_id', how='left')
+    return df.merge(dimensao[colunas], on='station_id', how='left')
+
+
+def normalizar_nome(nome):
+    """
+    Forma comparável de um nome de estação: sem acentos, minúsculas, sem os
+    PREFIXOS_ESTACAO e com pontuação trocada por espaço
+    ('S - VR - Brasilândia (PH01)' -> 'brasilandia ph01').
+    """
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode().lower().strip()
+    nome = re.sub(r'\s+', ' ', nome)
+    for prefixo in PREFIXOS_ESTACAO:
+        nome = re.sub(prefixo, '', nome)
+    nome = re.sub(r'[^a-z0-9]+', ' ', nome)
+    return nome.strip()
+
+
+def numeros(nome_normalizado):
+    """Números e numerais romanos de um nome normalizado, em ordem (tuple)."""
+    return tuple(sorted(str(int(n)) if n.isdigit() else n for n in re.findall(PADRAO_NUMERO, nome_normalizado)))
+
+
+def trigramas(nome_normalizado):
+    """Conjunto de trigramas de um nome normalizado, com bordas marcadas por espaço."""
+    texto = f'  {nome_normalizado} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido trigrama -> posições do catálogo.
+
+    Só os nomes que compartilham algum trigrama com a consulta são pontuados,
+    em vez de comparar cada nome com o catálogo inteiro. Candidatos com
+    números diferentes dos da consulta são ignorados.
+    """
+
+    def __init__(self, catalogo):
+        """
+        Parameters:
+            catalogo (pd.DataFrame): Estacao, Estado (nulo quando a fonte não
+                informa), Latitude, Longitude e Fonte.
+        """
+        self.catalogo = catalogo.reset_index(drop=True)
+        self.estados = self.catalogo['Estado'].tolist()
+        self.nomes = [normalizar_nome(n) for n in self.catalogo['Estacao']]
+        self.numeros = [numeros(n) for n in self.nomes]
+        self.coordenadas = list(zip(self.catalogo['Latitude'].round(3), self.catalogo['Longitude'].round(3)))
+        self.gramas = [trigramas(n) for n in self.nomes]
+        self.postings = defaultdict(list)
+        for posicao, gramas in enumerate(self.gramas):
+            for grama in gramas:
+                self.postings[grama].append(posicao)
+
+    def melhor_candidato(self, nome, estado=None):
+        """
+        Candidato mais parecido com `nome` no mesmo estado (ou sem estado no catálogo).
+
+        O segundo score é o da estação seguinte mais parecida, sem contar as
+        entradas que são a mesma estação do melhor candidato (mesmo nome
+        normalizado ou mesmas coordenadas, p. ex. nos dois catálogos).
+
+        Returns:
+            tuple: (posição no catálogo ou None, score de Dice entre 0 e 1,
+                segundo score).
+        """
+        normalizado = normalizar_nome(nome)
+        gramas, numeros_nome = trigramas(normalizado), numeros(normalizado)
+        comuns = Counter(p for grama in gramas for p in self.postings.get(grama, ()))
+        pontuados = []
+        for posicao, n_comuns in comuns.items():
+            estado_candidato = self.estados[posicao]
+            if estado is not None and pd.notna(estado_candidato) and estado_candidato != estado:
+                continue
+            if self.numeros[posicao] != numeros_nome:
+                continue
+            pontuados.append((2 * n_comuns / (len(gramas) + len(self.gramas[posicao])), posicao))
+        if not pontuados:
+            return None, 0.0, 0.0
+
+        pontuados.sort(key=lambda item: (-item[0], item[1]))
+        melhor_score, melhor = pontuados[0]
+        segundo_score = next((
+            score for score, posicao in pontuados[1:]
+            if self.nomes[posicao] != self.nomes[melhor] and self.coordenadas[posicao] != self.coordenadas[melhor]
+        ), 0.0)
+        return melhor, melhor_score, segundo_score
+
+
+def montar_catalogo(mapa, latlon):
+    """Une os dois catálogos de coordenadas (saídas de `ler_mapa_estacoes` e `ler_latlon_2024`)."""
+    return pd.concat([
+        mapa.assign(Estado=None, Fonte='mapa'),
+        latlon.assign(Fonte='latlon_2024'),
+    ], ignore_index=True)[['Estado', 'Estacao', 'Latitude', 'Longitude', 'Fonte']]
+
+
+def versao_catalogo(catalogo):
+    """Hash curto do catálogo: o cache de resoluções vale só para o mesmo catálogo e normalização."""
+    conteudo = catalogo.astype(str).to_csv(index=False) + '|'.join(PREFIXOS_ESTACAO + [PADRAO_NUMERO])
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:12]
+
+
+def ler_revisao(revisao_path):
+    """
+    Lê o CSV de revisão das propostas por nome aproximado (vazio se ainda não existe).
+
+    A coluna Confirmada é preenchida à mão: 'sim' (ou True/1) aceita a
+    proposta; qualquer outro valor a deixa pendente.
+    """
+    colunas = ['Estado', 'Estacao', 'Candidato', 'Fonte', 'Score', 'Segundo_Score', 'Latitude', 'Longitude', 'Confirmada']
+    if not os.path.exists(revisao_path):
+        return pd.DataFrame(columns=colunas)
+    revisao = pd.read_csv(revisao_path, dtype={'Estado': str, 'Estacao': str, 'Candidato': str, 'Confirmada': str})
+    revisao['Confirmada'] = revisao['Confirmada'].fillna('').str.strip().str.lower().isin(['sim', 'true', '1'])
+    return revisao[colunas]
+
+
+def resolver_sem_coordenadas(dimensao, mapa, latlon, cache_path, revisao_path,
+                             score_minimo=SCORE_MINIMO, margem_minima=MARGEM_MINIMA):
+    """
+    Procura coordenadas por nome aproximado para as estações da dimensão sem Latitude.
+
+    O candidato vira proposta quando tem score ≥ `score_minimo` e fica pelo
+    menos `margem_minima` acima da segunda estação mais parecida. As
+    propostas vão para o CSV de revisão `revisao_path` e só as confirmadas lá
+    (coluna Confirmada) entram na dimensão; a confirmação vale enquanto o
+    candidato proposto for o mesmo.
+
+    As buscas ficam em `cache_path` (CSV), junto com a versão do catálogo;
+    numa nova execução com o mesmo catálogo só as estações ainda não vistas
+    passam pelo índice.
+
+    Parameters:
+        dimensao (pd.DataFrame): dimensão de estações (COLUNAS_DIMENSAO).
+        mapa, latlon (pd.DataFrame): catálogos de coordenadas.
+        cache_path (str): CSV de cache das buscas.
+        revisao_path (str): CSV de revisão das propostas.
+        score_minimo (float): score mínimo para propor o candidato.
+        margem_minima (float): diferença mínima para a segunda estação.
+
+    Returns:
+        tuple: (dimensão com as coordenadas confirmadas, Fonte_Coordenada
+            '<fonte>_aproximado'; DataFrame com Estado, Estacao, Candidato,
+            Fonte, Score, Segundo_Score, Situacao ('confirmada', 'pendente',
+            'ambigua', 'score_baixo' ou 'sem_candidato') e Resolvida de cada
+            estação consultada)
+    """
+    catalogo = montar_catalogo(mapa, latlon)
+    versao = versao_catalogo(catalogo)
+
+    cache = pd.DataFrame(columns=[
+        'Estado', 'Estacao', 'Candidato', 'Fonte', 'Score', 'Segundo_Score', 'Latitude', 'Longitude', 'Versao'
+    ])
+    if os.path.exists(cache_path):
+        cache = pd.read_csv(cache_path, dtype={'Estado': str, 'Estacao': str})
+        cache = cache[cache['Versao'] == versao]
+
+    dimensao = dimensao.copy()
+    sem_coord = dimensao[dimensao['Latitude'].isna()][['Estado', 'Estacao']].astype(str)
+    chaves_cache = set(zip(cache['Estado'], cache['Estacao']))
+    novas = sem_coord[[chave not in chaves_cache for chave in zip(sem_coord['Estado'], sem_coord['Estacao'])]]
+
+    if not novas.empty:
+        indice = IndiceTrigramas(catalogo)
+        resolucoes = []
+        for estado, estacao in zip(novas['Estado'], novas['Estacao']):
+            posicao, score, segundo_score = indice.melhor_candidato(estacao, estado)
+            candidato = catalogo.iloc[posicao] if posicao is not None else {}
+            resolucoes.append({
+                'Estado': estado, 'Estacao': estacao,
+                'Candidato': candidato.get('Estacao'), 'Fonte': candidato.get('Fonte'),
+                'Score': round(score, 4), 'Segundo_Score': round(segundo_score, 4),
+                'Latitude': candidato.get('Latitude'), 'Longitude': candidato.get('Longitude'), 'Versao': versao,
+            })
+        cache = pd.concat([cache, pd.DataFrame(resolucoes)], ignore_index=True).astype(
+            {'Score': float, 'Segundo_Score': float, 'Latitude': float, 'Longitude': float}
+        )
+        cache.to_csv(cache_path, index=False)
+
+    relatorio = sem_coord.merge(cache, on=['Estado', 'Estacao'], how='left')
+    relatorio['Situacao'] = np.select(
+        [
+            relatorio['Candidato'].isna(),
+            relatorio['Score'] < score_minimo,
+            relatorio['Score'] - relatorio['Segundo_Score'] < margem_minima,
+        ],
+        ['sem_candidato', 'score_baixo', 'ambigua'],
+        default='pendente'
+    )
+
+    # A confirmação feita no CSV de revisão vale enquanto o candidato proposto for o mesmo
+    chaves_estacao = ['Estado', 'Estacao']
+    anterior = ler_revisao(revisao_path)
+    relatorio = relatorio.merge(
+        anterior[chaves_estacao + ['Candidato', 'Fonte', 'Confirmada']],
+        on=chaves_estacao + ['Candidato', 'Fonte'], how='left'
+    )
+    relatorio['Resolvida'] = (relatorio['Situacao'] == 'pendente') & relatorio['Confirmada'].eq(True)
+    relatorio.loc[relatorio['Resolvida'], 'Situacao'] = 'confirmada'
+
+    # Revisão: as propostas de agora e, como registro, as confirmações de estações que já têm coordenadas
+    propostas = relatorio[relatorio['Situacao'].isin(['pendente', 'confirmada'])]
+    propostas = propostas.assign(Confirmada=propostas['Resolvida'])
+    consultadas = pd.MultiIndex.from_frame(relatorio[chaves_estacao])
+    registro = anterior[anterior['Confirmada'] & ~pd.MultiIndex.from_frame(anterior[chaves_estacao]).isin(consultadas)]
+    revisao = pd.concat([registro, propostas[anterior.columns]], ignore_index=True)
+    revisao.assign(Confirmada=np.where(revisao['Confirmada'], 'sim', '')).to_csv(revisao_path, index=False)
+
+    confirmadas = propostas[propostas['Confirmada']]
+    aceitas = confirmadas.set_index(['Estado', 'Estacao'])
+    chaves = pd.MultiIndex.from_frame(dimensao[['Estado', 'Estacao']].astype(str))
+    posicoes = aceitas.index.get_indexer(chaves)
+    preencher = posicoes >= 0
+    dimensao.loc[preencher, 'Latitude'] = aceitas['Latitude'].to_numpy()[posicoes[preencher]]
+    dimensao.loc[preencher, 'Longitude'] = aceitas['Longitude'].to_numpy()[posicoes[preencher]]
+    dimensao.loc[preencher, 'Fonte_Coordenada'] = (aceitas['Fonte'].to_numpy()[posicoes[preencher]] + '_aproximado')
+
+    return dimensao, relatorio[['Estado', 'Estacao', 'Candidato', 'Fonte', 'Score', 'Segundo_Score', 'Situacao', 'Resolvida']]
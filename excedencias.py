@@ -0,0 +1,112 @@
+"""
+Excedências dos padrões CONAMA 506 guardadas como máscara de bits.
+
+Cada linha de z_violacoes_completo traz uma coluna uint8 'Excedencias' em
+que o bit i indica que o valor agregado passou do padrão PADROES[i]. Os
+limites de cada (Poluente, Periodo) ficam numa tabela pequena ao lado dos
+arquivos (limites.csv), em vez de repetidos em todas as linhas. As funções
+abaixo montam a máscara (2_verificar_violacoes.py) e, para quem lê, testam,
+expandem e contam os bits de forma vetorizada.
+"""
+import numpy as np
+import pandas as pd
+import polars as pl
+
+# Padrões na ordem dos bits: bit 0 = PI-1, ..., bit 4 = PF
+PADROES = ['PI-1', 'PI-2', 'PI-3', 'PI-4', 'PF']
+BITS = {padrao: np.uint8(1 << i) for i, padrao in enumerate(PADROES)}
+
+# Número de bits ligados de cada valor de um uint8
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def expressao_mascara(valor, limites):
+    """
+    Expressão Polars da máscara de excedências de `valor`.
+
+    Parameters:
+        valor (pl.Expr): valor agregado
+        limites (dict): padrão -> limite (None = padrão sem limite no período)
+
+    Returns:
+        pl.Expr: uint8; valor nulo ou padrão sem limite não liga o bit
+    """
+    bits = [
+        pl.when(valor > limites[padrao]).then(int(BITS[padrao])).otherwise(0)
+        for padrao in PADROES if limites.get(padrao) is not None
+    ]
+    if not bits:
+        return pl.lit(0, pl.UInt8)
+    return pl.sum_horizontal(bits).cast(pl.UInt8)
+
+
+def excede(mascara, padrao):
+    """Array booleano: linhas cuja máscara tem o bit de `padrao`."""
+    return (np.asarray(mascara, dtype=np.uint8) & BITS[padrao]) != 0
+
+
+def popcount(mascara):
+    """Array uint8 com o número de padrões excedidos em cada linha."""
+    return _POPCOUNT[np.asarray(mascara, dtype=np.uint8)]
+
+
+def expandir(mascara, index=None):
+    """
+    Uma coluna booleana por padrão (exceed_PI-1, ..., exceed_PF), como nas
+    versões antigas dos arquivos de violações.
+
+    Returns:
+        pd.DataFrame
+    """
+    mascara = np.asarray(mascara, dtype=np.uint8)
+    return pd.DataFrame({f'exceed_{padrao}': excede(mascara, padrao) for padrao in PADROES}, index=index)
+
+
+def contar_excedencias(df, chaves):
+    """
+    Excedências de cada padrão e total de linhas por grupo, num único groupby.
+
+    Parameters:
+        df (pd.DataFrame): com a coluna 'Excedencias' e as `chaves`
+        chaves (list): colunas de agrupamento
+
+    Returns:
+        pd.DataFrame: `chaves`, uma coluna por padrão (nº de linhas que o
+            excedem) e 'Medicoes' (nº de linhas do grupo)
+    """
+    mascara = df['Excedencias'].to_numpy(dtype=np.uint8)
+    bits = (mascara[:, None] & np.array([BITS[p] for p in PADROES], dtype=np.uint8)) != 0
+    contagens = pd.DataFrame(bits.astype(np.int64), columns=PADROES, index=df.index)
+    contagens['Medicoes'] = 1
+    contagens[chaves] = df[chaves]
+    return contagens.groupby(chaves, observed=True)[PADROES + ['Medicoes']].sum().reset_index()
+
+
+def tabela_limites(limite_conama):
+    """
+    Tabela de limites por (Poluente, Periodo) a partir de limites_conama_506.csv.
+
+    Parameters:
+        limite_conama (pl.DataFrame): Sigla, Periodo e os PADROES ('-' = sem limite)
+
+    Returns:
+        pl.DataFrame: Poluente, Periodo e um limite float por padrão
+    """
+    return limite_conama.select(
+        pl.col('Sigla').alias('Poluente'),
+        'Periodo',
+        *[pl.col(padrao).cast(pl.Float64, strict=False) for padrao in PADROES]
+    )
+
+
+def carregar_limites(limites_path):
+    """Lê a tabela de limites gravada ao lado dos arquivos de violações (pd.DataFrame)."""
+    return pd.read_csv(limites_path, dtype={'Poluente': str, 'Periodo': str})
+
+
+def anexar_limites(df, limites):
+    """Traz as colunas de limite (PI-1, ..., PF) de cada linha pela chave (Poluente, Periodo)."""
+    chaves = df[['Poluente', 'Periodo']].astype(str)
+    limites = limites.set_index(['Poluente', 'Periodo'])[PADROES]
+    valores = limites.reindex(pd.MultiIndex.from_frame(chaves)).to_numpy()
+    return df.assign(**{padrao: valores[:, i] for i, padrao in enumerate(PADROES)})
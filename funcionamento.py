@@ -0,0 +1,102 @@
+"""
+Períodos de funcionamento: primeira e última hora com dado de cada
+(Estado, Estacao, Poluente) no dataset horário.
+
+A tabela é calculada por relacao_data_funcionamento.py com um scan lazy do
+dataset (só as colunas de chave e Data_Hora) e gravada em Parquet. Quem
+precisa saber quais estações funcionavam numa janela, ou quantas horas de
+dado eram esperadas nela, consulta o `IndicePeriodos` em vez de reler os
+dados horários.
+"""
+import pandas as pd
+import polars as pl
+
+from esquemas import categorizar, validar_parquet, validar_parquets
+from ingestao import FUSO_HORARIO
+
+CHAVES_PERIODO = ['Estado', 'Estacao', 'Poluente']
+
+
+def calcular_periodos(dataset_path):
+    """
+    Início, fim e horas com dado por (Estado, Estacao, Poluente).
+
+    Parameters:
+        dataset_path (str): dataset horário particionado (Poluente=/Estado=/Ano=).
+
+    Returns:
+        pd.DataFrame: CHAVES_PERIODO, Data_Hora_Inicio, Data_Hora_Fim, Horas_Com_Dado.
+    """
+    validar_parquets(dataset_path, 'horario_dataset')
+    periodos = (
+        pl.scan_parquet(dataset_path, hive_partitioning=True)
+        .select(CHAVES_PERIODO + ['Data_Hora'])
+        .group_by(CHAVES_PERIODO)
+        .agg(
+            Data_Hora_Inicio=pl.col('Data_Hora').min(),
+            Data_Hora_Fim=pl.col('Data_Hora').max(),
+            Horas_Com_Dado=pl.col('Data_Hora').n_unique().cast(pl.Int64)
+        )
+        .sort(CHAVES_PERIODO)
+        .collect(engine='streaming')
+    )
+    return categorizar(periodos.to_pandas())
+
+
+def carregar_periodos(periodos_path):
+    """Lê a tabela de períodos gravada por relacao_data_funcionamento.py."""
+    validar_parquet(periodos_path, 'funcionamento')
+    return pd.read_parquet(periodos_path)
+
+
+def _como_timestamp(instante):
+    """Timestamp no fuso do dataset (instantes sem fuso são interpretados nele)."""
+    instante = pd.Timestamp(instante)
+    return instante.tz_localize(FUSO_HORARIO) if instante.tz is None else instante.tz_convert(FUSO_HORARIO)
+
+
+class IndicePeriodos:
+    """
+    Índice de intervalos [Data_Hora_Inicio, Data_Hora_Fim] das estações.
+
+    As consultas por janela são vetorizadas sobre um pd.IntervalIndex, sem
+    percorrer a tabela linha a linha.
+    """
+
+    def __init__(self, periodos):
+        """
+        Parameters:
+            periodos (pd.DataFrame): saída de `calcular_periodos` / `carregar_periodos`.
+        """
+        self.periodos = periodos.reset_index(drop=True)
+        self.intervalos = pd.IntervalIndex.from_arrays(
+            self.periodos['Data_Hora_Inicio'], self.periodos['Data_Hora_Fim'], closed='both'
+        )
+
+    def ativas(self, inicio, fim, poluente=None):
+        """
+        Estações com período de funcionamento que cruza a janela [inicio, fim].
+
+        Returns:
+            pd.DataFrame: linhas da tabela de períodos.
+        """
+        janela = pd.Interval(_como_timestamp(inicio), _como_timestamp(fim), closed='both')
+        mascara = self.intervalos.overlaps(janela)
+        if poluente is not None:
+            mascara &= (self.periodos['Poluente'] == poluente).to_numpy()
+        return self.periodos[mascara]
+
+    def horas_esperadas(self, inicio, fim, poluente=None):
+        """
+        Horas em que cada estação ativa deveria ter dado dentro de [inicio, fim]:
+        a interseção da janela com o período de funcionamento, em horas cheias.
+
+        Returns:
+            pd.DataFrame: `ativas(...)` com a coluna Horas_Esperadas.
+        """
+        inicio, fim = _como_timestamp(inicio), _como_timestamp(fim)
+        ativas = self.ativas(inicio, fim, poluente).copy()
+        comeco = ativas['Data_Hora_Inicio'].clip(lower=inicio)
+        final = ativas['Data_Hora_Fim'].clip(upper=fim)
+        ativas['Horas_Esperadas'] = ((final - comeco) // pd.Timedelta(hours=1) + 1).astype('int64')
+        return ativas
@@ -0,0 +1,1002 @@
+"""
+Leitura e padronização dos CSVs brutos (raw_data/<UF>/*.csv).
+
+As funções ficam em um módulo separado de 1_extracao_padronizacao.py para que
+os workers do pool de processos consigam importá-las.
+"""
+import os
+import shutil
+import hashlib
+import unicodedata
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from esquemas import TIPO_CATEGORICO, validar_parquet
+
+# Massas molares
+massa_molar = {
+    'NO2': 46.0055,
+    'O3': 48.00,
+    'SO2': 64.066,
+    'CO': 28.01,
+    'NO': 30.01
+}
+PPM_CONVERSION = 24.45  # 25°C e 1 atm
+
+# Esquema fixo do dataset horário (todos os lotes e fragmentos usam o mesmo esquema).
+# Colunas de baixa cardinalidade vão com dictionary encoding (ver esquemas.py)
+# As medições vêm em hora local padrão, sem horário de verão: Data_Hora é
+# gravada com fuso fixo UTC−3 (Etc/GMT+3 tem o sinal invertido por convenção POSIX)
+FUSO_HORARIO = 'Etc/GMT+3'
+
+SCHEMA_SAIDA = pa.schema([
+    ('Data', pa.timestamp('ns')),
+    ('Hora', pa.string()),
+    ('Data_Hora', pa.timestamp('ns', tz=FUSO_HORARIO)),
+    ('Estacao', TIPO_CATEGORICO),
+    ('Poluente', TIPO_CATEGORICO),
+    ('Valor', pa.float64()),
+    ('Unidade', TIPO_CATEGORICO),
+    ('Estado', TIPO_CATEGORICO),
+    ('Valor_Padronizado', pa.float64()),
+    ('Unidade_Padronizada', TIPO_CATEGORICO),
+    ('Arquivo', TIPO_CATEGORICO),
+])
+
+# Esquema da quarentena: só o necessário para localizar e diagnosticar cada linha rejeitada
+SCHEMA_QUARENTENA = pa.schema([
+    ('Arquivo', TIPO_CATEGORICO),
+    ('Linha', pa.int64()),
+    ('Motivo', TIPO_CATEGORICO),
+    ('Data', pa.timestamp('ns')),
+    ('Hora', pa.string()),
+    ('Estacao', TIPO_CATEGORICO),
+    ('Poluente', TIPO_CATEGORICO),
+    ('Valor', pa.float64()),
+    ('Unidade', TIPO_CATEGORICO),
+])
+
+# Layout do dataset horário: partições hive e ordem das linhas dentro de cada arquivo
+COLUNAS_PARTICAO = ['Poluente', 'Estado', 'Ano']
+ORDEM_LINHAS = ['Estacao', 'Data_Hora']
+
+
+def ordenar_tabela(tabela, colunas):
+    """
+    Ordena uma tabela Arrow pelas colunas dadas.
+
+    O kernel de ordenação do Arrow não aceita colunas dictionary, então as
+    chaves categóricas são decodificadas só para calcular os índices.
+    """
+    chaves = pa.table({
+        col: pc.dictionary_decode(tabela[col]) if pa.types.is_dictionary(tabela[col].type) else tabela[col]
+        for col in colunas
+    })
+    indices = pc.sort_indices(chaves, sort_keys=[(col, 'ascending') for col in colunas])
+    return tabela.take(indices)
+
+
+# Como resolver linhas com a mesma chave (Estacao, Data_Hora) numa partição
+# (Poluente e Estado já são fixos nela) e Valor_Padronizado diferente
+REGRAS_DUPLICATAS = ('primeira', 'ultima', 'media', 'descartar')
+
+
+def deduplicar(tabela, regra='primeira'):
+    """
+    Remove as linhas repetidas de (Estacao, Data_Hora) de uma partição
+    ordenada por Estacao, Data_Hora e Arquivo.
+
+    A chave é compacta (código inteiro da estação e o instante em int64) e,
+    com a tabela ordenada, as repetições ficam vizinhas: basta comparar cada
+    linha com a anterior, sem hash sobre todas as colunas. Repetições com o
+    mesmo Valor_Padronizado viram uma linha só; as conflitantes seguem `regra`:
+      'primeira' / 'ultima': a linha do primeiro / último arquivo (ordem de Arquivo);
+      'media': a primeira linha, com Valor_Padronizado igual à média do grupo;
+      'descartar': nenhuma linha do grupo fica.
+
+    Returns:
+        tuple: (tabela sem repetições, pd.Series com as linhas removidas por
+            Arquivo, número de chaves com valores conflitantes, tabela com
+            todas as linhas originais das chaves repetidas)
+    """
+    n = tabela.num_rows
+    if n < 2:
+        return tabela, pd.Series(dtype='int64'), 0, tabela.slice(0, 0)
+
+    estacao = tabela['Estacao']
+    if pa.types.is_dictionary(estacao.type):
+        estacao = pc.dictionary_decode(estacao)
+    codigos = pc.dictionary_encode(estacao.combine_chunks()).indices.to_numpy(zero_copy_only=False)
+    instantes = tabela['Data_Hora'].combine_chunks().cast(pa.int64()).to_numpy(zero_copy_only=False)
+
+    nova = np.empty(n, dtype=bool)
+    nova[0] = True
+    nova[1:] = (codigos[1:] != codigos[:-1]) | (instantes[1:] != instantes[:-1])
+    if nova.all():
+        return tabela, pd.Series(dtype='int64'), 0, tabela.slice(0, 0)
+
+    inicios = np.flatnonzero(nova)
+    grupo = np.cumsum(nova) - 1
+    # Linhas originais das chaves repetidas (antes de 'media' mudar o valor)
+    repetidas = tabela.filter(pa.array((np.bincount(grupo) > 1)[grupo]))
+    valores = tabela['Valor_Padronizado'].combine_chunks().to_numpy(zero_copy_only=False)
+    conflito = np.maximum.reduceat(valores, inicios) != np.minimum.reduceat(valores, inicios)
+
+    if regra == 'primeira':
+        manter = nova
+    elif regra == 'ultima':
+        ultima = np.append(nova[1:], True)
+        manter = np.where(conflito[grupo], ultima, nova)
+    elif regra == 'media':
+        manter = nova
+        medias = np.bincount(grupo, weights=valores) / np.bincount(grupo)
+        valores = valores.copy()
+        valores[nova] = medias
+        posicao = tabela.schema.get_field_index('Valor_Padronizado')
+        tabela = tabela.set_column(posicao, tabela.schema.field(posicao), pa.array(valores, pa.float64()))
+    elif regra == 'descartar':
+        manter = nova & ~conflito[grupo]
+    else:
+        raise ValueError(f"Regra de duplicatas desconhecida: {regra!r} (use uma de {REGRAS_DUPLICATAS})")
+
+    arquivos = tabela['Arquivo']
+    if pa.types.is_dictionary(arquivos.type):
+        arquivos = pc.dictionary_decode(arquivos)
+    removidas = pd.Series(arquivos.combine_chunks().filter(pa.array(~manter)).to_numpy(zero_copy_only=False))
+    return tabela.filter(pa.array(manter)), removidas.value_counts(), int(conflito.sum()), repetidas
+
+
+def _chaves_em(tabela, outra):
+    """Array booleano: linhas de `tabela` cuja chave (Estacao, Data_Hora) aparece em `outra`."""
+    def chaves(t):
+        estacao = t['Estacao']
+        if pa.types.is_dictionary(estacao.type):
+            estacao = pc.dictionary_decode(estacao)
+        return pd.MultiIndex.from_arrays([
+            estacao.to_numpy(),
+            t['Data_Hora'].combine_chunks().cast(pa.int64()).to_numpy(zero_copy_only=False),
+        ])
+
+    if outra.num_rows == 0:
+        return np.zeros(tabela.num_rows, dtype=bool)
+    return chaves(tabela).isin(chaves(outra))
+
+
+# Unidade padrão de cada poluente; os demais são padronizados em µg/m³
+UNIDADE_PADRAO = {'CO': 'ppm'}
+
+
+def montar_fatores_conversao():
+    """
+    Monta a tabela de fatores (Poluente, Unidade) -> (Unidade_Padronizada, Fator).
+
+    Para incluir uma unidade nova, basta acrescentar a linha correspondente
+    (e o alias em `unidades_corretas`, se necessário). Poluente '*' vale para
+    poluentes que não aparecem na tabela.
+    """
+    linhas = []
+    for poluente, mm in massa_molar.items():
+        if poluente == 'CO':
+            # CO é padronizado em ppm
+            linhas += [
+                (poluente, 'ppm', 'ppm', 1.0),
+                (poluente, 'ppb', 'ppm', 1 / 1000),
+                (poluente, 'µg/m³', 'ppm', PPM_CONVERSION / (mm * 1000)),
+                (poluente, 'mg/m³', 'ppm', PPM_CONVERSION / mm),
+            ]
+        else:
+            linhas += [
+                (poluente, 'ppm', 'µg/m³', mm * 1000 / PPM_CONVERSION),
+                (poluente, 'ppb', 'µg/m³', mm / PPM_CONVERSION),
+                (poluente, 'µg/m³', 'µg/m³', 1.0),
+                (poluente, 'mg/m³', 'µg/m³', 1000.0),
+            ]
+
+    # Partículas e demais poluentes: apenas unidades de massa
+    for poluente in ['MP10', 'MP2.5', '*']:
+        linhas += [
+            (poluente, 'µg/m³', 'µg/m³', 1.0),
+            (poluente, 'mg/m³', 'µg/m³', 1000.0),
+        ]
+
+    return pd.DataFrame(linhas, columns=['Poluente', 'Unidade', 'Unidade_Padronizada', 'Fator'])
+
+
+FATORES_CONVERSAO = montar_fatores_conversao()
+
+unidades_corretas = {
+    'ug/m3': 'µg/m³',
+    'µg/m3': 'µg/m³',
+    'µg/m³': 'µg/m³',
+    'Âµg/mÂ³': 'µg/m³',
+    'mg/m3': 'mg/m³',
+    'mg/m³': 'mg/m³',
+    'ppm': 'ppm',
+    'ppb': 'ppb'
+}
+
+
+def listar_arquivos(raw_data_path):
+    """
+    Lista os CSVs brutos de cada estado em ordem determinística.
+
+    Returns:
+        list[tuple[str, str]]: pares (estado, caminho do arquivo), ordenados por
+        pasta e nome de arquivo, para que a mesclagem não dependa da ordem em
+        que os workers terminam.
+    """
+    tarefas = []
+    for folder in sorted(os.listdir(raw_data_path)):
+        folder_path = os.path.join(raw_data_path, folder)
+
+        if not os.path.isdir(folder_path):
+            continue  # Ignorar arquivos, processar apenas pastas
+
+        for file in sorted(os.listdir(folder_path)):
+            tarefas.append((folder, os.path.join(folder_path, file)))
+    return tarefas
+
+
+def id_arquivo(state, file_path):
+    """Identificador estável de um CSV bruto: '<UF>/<nome do arquivo>'."""
+    return f'{state}/{os.path.basename(file_path)}'
+
+
+COLUNAS_MANIFESTO = ['Arquivo', 'Tamanho', 'Modificado', 'Hash']
+
+
+def hash_arquivo(file_path, tamanho_bloco=1024 ** 2):
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def ler_manifesto(manifesto_path):
+    """Lê o manifesto da última ingestão (vazio se ainda não existe)."""
+    if not os.path.exists(manifesto_path):
+        return pd.DataFrame(columns=COLUNAS_MANIFESTO)
+    return pd.read_csv(manifesto_path, dtype={'Arquivo': str, 'Hash': str})
+
+
+def gravar_manifesto(manifesto, manifesto_path):
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+    temporario = f'{manifesto_path}.tmp'
+    manifesto.to_csv(temporario, index=False)
+    os.replace(temporario, manifesto_path)
+
+
+def comparar_manifesto(tarefas, manifesto_anterior):
+    """
+    Compara os CSVs brutos atuais com o manifesto da última ingestão.
+
+    O hash só é recalculado quando tamanho ou data de modificação mudaram;
+    um arquivo apenas "tocado" (mesmo conteúdo) não é reprocessado.
+
+    Parameters:
+        tarefas (list[tuple[str, str]]): pares (estado, caminho) de `listar_arquivos`.
+        manifesto_anterior (pd.DataFrame): manifesto lido com `ler_manifesto`.
+
+    Returns:
+        tuple: (tarefas novas ou alteradas, ids de arquivos a substituir no
+        dataset — alterados ou removidos —, manifesto atual)
+    """
+    anterior = manifesto_anterior.set_index('Arquivo')
+    pendentes, substituir, linhas = [], [], []
+
+    for state, file_path in tarefas:
+        arquivo = id_arquivo(state, file_path)
+        info = os.stat(file_path)
+        tamanho, modificado = info.st_size, info.st_mtime_ns
+
+        if arquivo in anterior.index:
+            registro = anterior.loc[arquivo]
+            if registro['Tamanho'] == tamanho and registro['Modificado'] == modificado:
+                conteudo = registro['Hash']
+            else:
+                conteudo = hash_arquivo(file_path)
+            if conteudo != registro['Hash']:
+                pendentes.append((state, file_path))
+                substituir.append(arquivo)
+        else:
+            conteudo = hash_arquivo(file_path)
+            pendentes.append((state, file_path))
+
+        linhas.append((arquivo, tamanho, modificado, conteudo))
+
+    atuais = {linha[0] for linha in linhas}
+    substituir += [arquivo for arquivo in anterior.index if arquivo not in atuais]
+
+    return pendentes, substituir, pd.DataFrame(linhas, columns=COLUNAS_MANIFESTO)
+
+
+# Colunas esperadas nos CSVs brutos, na ordem em que saem de `ler_arquivo`
+COLUNAS_BRUTAS = ['Data', 'Hora', 'Estacao', 'Poluente', 'Valor', 'Unidade']
+CABECALHO_CANONICO = {coluna.lower(): coluna for coluna in COLUNAS_BRUTAS}
+
+
+def normalizar_cabecalho(coluna):
+    """
+    Nome canônico de uma coluna do CSV bruto.
+
+    Cabeçalhos UTF-8 lidos como latin1 (inclusive o BOM, que aparece como
+    'ï»¿') são decodificados de volta; depois o nome é comparado sem BOM,
+    espaços, acentos e caixa ('ï»¿Data', ' estação ' -> 'Data', 'Estacao').
+    Colunas desconhecidas mantêm o nome original.
+    """
+    nome = coluna
+    try:
+        nome = nome.encode('latin1').decode('utf-8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+    nome = nome.replace('\ufeff', '').strip()
+    sem_acento = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode().lower()
+    return CABECALHO_CANONICO.get(sem_acento, nome)
+
+
+def ler_arquivo(file_path, state):
+    """
+    Lê um CSV bruto como texto, com o cabeçalho normalizado.
+
+    Todo arquivo sai com as mesmas colunas (COLUNAS_BRUTAS, ausentes como
+    nulas; extras descartadas), mais Estado, Arquivo e Linha, de modo que a
+    concatenação de lotes nunca cria colunas esparsas.
+    """
+    df = pd.read_csv(file_path, sep=',', encoding='latin1', dtype=str)
+    df.columns = [normalizar_cabecalho(c) for c in df.columns]
+
+    # Mesma coluna repetida (ex.: 'Data' e 'ï»¿Data'): fica o primeiro valor não nulo
+    for nome in df.columns[df.columns.duplicated()].unique():
+        combinada = df.loc[:, nome].bfill(axis=1).iloc[:, 0]
+        df = df.drop(columns=nome)
+        df[nome] = combinada
+
+    df = df.reindex(columns=COLUNAS_BRUTAS)
+
+    # Adicionar coluna de estado imediatamente
+    df['Estado'] = state
+    # Origem de cada linha (arquivo e número da linha no CSV, contando o cabeçalho),
+    # usada pela quarentena e para substituir/remover as linhas de um arquivo na ingestão incremental
+    df['Arquivo'] = id_arquivo(state, file_path)
+    df['Linha'] = np.arange(2, len(df) + 2)
+
+    return df
+
+
+# Formatos de data aceitos, na ordem de prioridade, com a assinatura (regex) de cada um
+FORMATOS_DATA = [
+    (r'^\d{4}-\d{1,2}-\d{1,2}$', '%Y-%m-%d'),
+    (r'^\d{1,2}/\d{1,2}/\d{4}$', '%d/%m/%Y'),
+    (r'^\d{1,2}-\d{1,2}-\d{4}$', '%d-%m-%Y'),
+    (r'^\d{4}/\d{1,2}/\d{1,2}$', '%Y/%m/%d'),
+    (r'^[A-Za-z]+ \d{1,2}, \d{4}$', '%B %d, %Y'),
+    (r'^\d{1,2}-[A-Za-z]{3}-\d{4}$', '%d-%b-%Y'),
+    (r'^\d{1,2} [A-Za-z]+ \d{4}$', '%d %B %Y'),
+    (r'^\d{4}\.\d{1,2}\.\d{1,2}$', '%Y.%m.%d'),
+    (r'^\d{4} \d{1,2} \d{1,2}$', '%Y %m %d'),
+    (r'^\d{1,2}/\d{1,2}/\d{2}$', '%m/%d/%y'),
+    (r'^\d{4}-\d{1,2}-\d{1,2} \d{1,2}:\d{2}:\d{2}$', '%Y-%m-%d %H:%M:%S'),
+]
+
+# Número já limpo: sinal opcional, dígitos e no máximo um ponto
+NUMERO_LIMPO = r'^-?(\d+\.?\d*|\.\d+)$'
+
+
+# Versão linha a linha, mantida como referência de clean_numeric_vetorizado
+def clean_numeric(value):
+    if isinstance(value, str):
+        # Remover caracteres não numéricos exceto ponto, vírgula e sinal negativo
+        cleaned = ''.join(c for c in value if c in '0123456789.,-')
+        # Substituir vírgula por ponto
+        cleaned = cleaned.replace(',', '.')
+        # Remover múltiplos pontos (caso haja)
+        if cleaned.count('.') > 1:
+            parts = cleaned.split('.')
+            cleaned = parts[0] + '.' + ''.join(parts[1:])
+        return cleaned
+    return value
+
+
+def clean_numeric_vetorizado(valores):
+    """
+    Versão vetorizada (Arrow) de `clean_numeric` seguida de pd.to_numeric(errors='coerce').
+
+    Aplica as mesmas regras de uma vez na coluna inteira: remove caracteres fora
+    de '0123456789.,-', troca vírgula por ponto e mantém só o primeiro ponto.
+    Strings que não formam um número (ex.: '', '-', '1-2') viram NaN.
+
+    Parameters:
+        valores (pd.Series): coluna 'Valor' lida como texto.
+
+    Returns:
+        pd.Series: valores float64, com o mesmo índice de `valores`.
+    """
+    texto = pa.array(valores, type=pa.string(), from_pandas=True)
+
+    # A maioria das leituras já é um número válido; só o restante passa pela limpeza
+    sujo = pc.invert(pc.fill_null(pc.match_substring_regex(texto, NUMERO_LIMPO), True))
+    if pc.any(sujo).as_py():
+        limpo = pc.filter(texto, sujo)
+        limpo = pc.replace_substring_regex(limpo, r'[^0-9.,\-]', '')
+        limpo = pc.replace_substring(limpo, ',', '.')
+
+        # Separar no primeiro ponto e remover os pontos restantes
+        partes = pc.extract_regex(limpo, r'^(?P<inteiro>[^.]*)(?P<resto>\..*)?$')
+        resto = pc.struct_field(partes, 'resto')
+        limpo = pc.binary_join_element_wise(
+            pc.struct_field(partes, 'inteiro'),
+            pc.utf8_slice_codeunits(resto, 0, 1),
+            pc.replace_substring(resto, '.', ''),
+            ''
+        )
+
+        # Mesmo conjunto de strings aceito por pd.to_numeric após a limpeza
+        limpo = pc.if_else(pc.match_substring_regex(limpo, NUMERO_LIMPO), limpo, pa.scalar(None, pa.string()))
+        texto = pc.replace_with_mask(texto, sujo, limpo)
+
+    numeros = pc.cast(texto, pa.float64())
+
+    return pd.Series(numeros.to_numpy(zero_copy_only=False), index=valores.index, name=valores.name)
+
+
+def parse_datas(datas):
+    """
+    Converte uma coluna de datas em texto com formatos misturados para datetime64.
+
+    As strings são classificadas por assinatura só uma vez por valor único, e
+    cada grupo de formato é convertido com uma única chamada de pd.to_datetime.
+    Se uma data casar com a assinatura mas não for válida no formato (ex.:
+    '2020-13-01'), ela volta para os formatos seguintes, como na busca por
+    tentativa e erro. Datas não reconhecidas viram NaT.
+    """
+    codigos, unicas = pd.factorize(datas)
+    unicas = pd.Series(unicas, dtype=object).str.strip()
+
+    convertidas = pd.Series(pd.NaT, index=unicas.index, dtype='datetime64[ns]')
+    pendentes = pd.Series(True, index=unicas.index)
+    for assinatura, fmt in FORMATOS_DATA:
+        mask = pendentes & unicas.str.match(assinatura)
+        if not mask.any():
+            continue
+        grupo = pd.to_datetime(unicas[mask], format=fmt, errors='coerce')
+        convertidas[grupo.index] = grupo
+        pendentes &= ~(mask & grupo.reindex(unicas.index).notna())
+
+    # Código -1 (data nula) não existe no índice e vira NaT
+    resultado = convertidas.reindex(codigos).to_numpy()
+    return pd.Series(resultado, index=datas.index, name=datas.name)
+
+
+# 'H', 'HH:MM' ou 'HH:MM:SS'; horas de 0 a 24 ('24:00' é o fim do dia)
+HORA_VALIDA = r'^(\d{1,2})(?::(\d{2}))?(?::(\d{2}))?$'
+
+
+def montar_data_hora(datas, horas):
+    """
+    Combina 'Data' (datetime64) e 'Hora' (texto) em um timestamp com fuso.
+
+    A hora é convertida em duração (uma vez por valor único) e somada à data,
+    então '24:00:00' cai naturalmente às 00:00 do dia seguinte, sem máscara
+    nem concatenação de strings. Horas fora do padrão ou acima de 24h viram NaT.
+    """
+    codigos, unicas = pd.factorize(horas)
+    partes = pd.Series(unicas, dtype=object).str.strip().str.extract(HORA_VALIDA).astype(float)
+    segundos = partes[0] * 3600 + partes[1].fillna(0) * 60 + partes[2].fillna(0)
+    duracoes = pd.to_timedelta(segundos.where(segundos <= 24 * 3600), unit='s')
+
+    # Código -1 (hora nula) não existe no índice e vira NaT
+    deslocamentos = duracoes.reindex(codigos).to_numpy()
+    data_hora = pd.Series(datas.to_numpy() + deslocamentos, index=datas.index, name='Data_Hora')
+    return data_hora.dt.tz_localize(FUSO_HORARIO)
+
+
+def converter_unidades(data):
+    """
+    Converte 'Valor' para a unidade padrão do poluente usando FATORES_CONVERSAO.
+
+    Um único merge por (Poluente, Unidade) traz o fator de cada linha e a
+    conversão é uma multiplicação só. Poluentes fora da tabela usam as linhas '*'.
+
+    Returns:
+        tuple: (Valor_Padronizado, Unidade_Padronizada, Motivo), em que Motivo
+        diz por que a linha ficou sem valor padronizado ('unidade_sem_fator' ou
+        'valor_nulo') e é nulo nas linhas convertidas.
+    """
+    poluentes_tabela = FATORES_CONVERSAO['Poluente'].unique()
+    chave = pd.DataFrame({
+        'Poluente': data['Poluente'].where(data['Poluente'].isin(poluentes_tabela), '*'),
+        'Unidade': data['Unidade'],
+    })
+    fatores = chave.merge(FATORES_CONVERSAO, on=['Poluente', 'Unidade'], how='left', sort=False)
+    fator = fatores['Fator'].to_numpy()
+
+    valor = pd.Series(data['Valor'].to_numpy() * fator, index=data.index)
+    unidade = pd.Series(
+        fatores['Unidade_Padronizada'].to_numpy(), index=data.index
+    ).fillna(data['Poluente'].map(UNIDADE_PADRAO)).fillna('µg/m³')
+
+    sem_fator = np.isnan(fator)
+    motivo = pd.Series(np.select(
+        [sem_fator, data['Valor'].isna().to_numpy()],
+        ['unidade_sem_fator', 'valor_nulo'],
+        default=None
+    ), index=data.index)
+
+    return valor, unidade, motivo
+
+
+def padronizar(data, snapshots=None):
+    """
+    Unifica nomes de poluentes e unidades e calcula 'Valor_Padronizado'.
+
+    Se `snapshots` for um dict com as chaves 'antes' e 'depois', os objetos
+    Snapshot recebem o lote antes e depois da limpeza de 'Valor'.
+
+    A coluna 'Motivo' marca as linhas rejeitadas, que vão para a quarentena:
+    os motivos de `converter_unidades`, 'data_invalida' (Data_Hora nula) e
+    'poluente_nulo' (sem poluente não há partição nem unidade padrão; tem
+    precedência sobre os outros motivos).
+    """
+    # Datas em formatos misturados -> datetime64, e o timestamp canônico Data + Hora
+    data['Data'] = parse_datas(data['Data'])
+    data['Data_Hora'] = montar_data_hora(data['Data'], data['Hora'])
+
+    # Unificar PM10 e MP10
+    data['Poluente'] = data['Poluente'].replace({
+        'PM10': 'MP10',
+        'pm10': 'MP10',
+        'Pm10': 'MP10',
+        'MP2.5': 'MP2.5'
+    })
+
+    # Padronizar coluna de unidade
+    data['Unidade'] = data['Unidade'].map(unidades_corretas).fillna(data['Unidade'])
+
+    if snapshots:
+        snapshots['antes'].adicionar(data)
+
+    data['Valor'] = clean_numeric_vetorizado(data['Valor'])
+
+    if snapshots:
+        snapshots['depois'].adicionar(data)
+
+    data['Valor_Padronizado'], data['Unidade_Padronizada'], data['Motivo'] = converter_unidades(data)
+    data['Motivo'] = data['Motivo'].mask(data['Motivo'].isna() & data['Data_Hora'].isna(), 'data_invalida')
+    data['Motivo'] = data['Motivo'].mask(data['Poluente'].isna(), 'poluente_nulo')
+
+    return data
+
+
+def criar_snapshots(modo):
+    """Cria o par de snapshots 'antes'/'depois' da limpeza, ou None se modo for None."""
+    if modo is None:
+        return None
+    return {'antes': Snapshot(modo), 'depois': Snapshot(modo)}
+
+
+def processar_arquivo(state, file_path, parciais_path, indice, modo_snapshot=None):
+    """
+    Lê e padroniza um único CSV bruto e grava o resultado como Parquet parcial.
+
+    Executado dentro dos workers do pool; retorna o caminho do parcial gerado
+    e os snapshots do arquivo (ou None), que o processo principal combina.
+    O parcial leva o índice da tarefa e o nome completo do arquivo (com a
+    extensão), então 'x.csv' e 'x.CSV' ou 'x.txt' do mesmo estado não
+    gravam no mesmo parcial.
+    """
+    snapshots = criar_snapshots(modo_snapshot)
+    data = padronizar(ler_arquivo(file_path, state), snapshots)
+
+    state_dir = os.path.join(parciais_path, state)
+    os.makedirs(state_dir, exist_ok=True)
+    partial_path = os.path.join(state_dir, f'{indice:06d}_{os.path.basename(file_path)}.parquet')
+
+    data.to_parquet(partial_path, index=False)
+    return partial_path, snapshots
+
+
+class Snapshot:
+    """
+    Resumo leve de um estágio da ingestão, no lugar de uma cópia completa dos dados.
+
+    modo='amostra' guarda uma amostra uniforme de até `n_amostra` linhas (as
+    linhas com as menores chaves aleatórias, o que permite combinar amostras de
+    workers diferentes). modo='estatisticas' guarda contagens, nulos, mínimo,
+    máximo e soma de 'Valor' por (Estado, Poluente, Unidade).
+    """
+
+    CHAVES = ['Estado', 'Poluente', 'Unidade']
+
+    def __init__(self, modo='estatisticas', n_amostra=10_000, seed=None):
+        if modo not in ('amostra', 'estatisticas'):
+            raise ValueError(f"Unsupported snapshot mode: {modo}")
+        self.modo = modo
+        self.n_amostra = n_amostra
+        self.rng = np.random.default_rng(seed)
+        self.dados = None
+
+    def adicionar(self, df):
+        if self.modo == 'amostra':
+            lote = df.assign(_chave=self.rng.random(len(df))).nsmallest(self.n_amostra, '_chave')
+        else:
+            valor = pd.to_numeric(df['Valor'], errors='coerce')
+            lote = df[self.CHAVES].assign(
+                n_linhas=1,
+                n_valor_nulo=valor.isna().astype(int),
+                soma=valor,
+                minimo=valor,
+                maximo=valor,
+            )
+        self._combinar(lote)
+
+    def combinar(self, outro):
+        """Incorpora um snapshot do mesmo modo (por exemplo, vindo de um worker)."""
+        if outro is not None and outro.dados is not None:
+            self._combinar(outro.dados)
+
+    def _combinar(self, lote):
+        if self.dados is not None:
+            lote = pd.concat([self.dados, lote], ignore_index=True)
+
+        if self.modo == 'amostra':
+            self.dados = lote.nsmallest(self.n_amostra, '_chave')
+        else:
+            self.dados = (
+                lote.groupby(self.CHAVES, dropna=False)
+                .agg(n_linhas=('n_linhas', 'sum'), n_valor_nulo=('n_valor_nulo', 'sum'),
+                     soma=('soma', 'sum'), minimo=('minimo', 'min'), maximo=('maximo', 'max'))
+                .reset_index()
+            )
+
+    def resultado(self):
+        if self.dados is None:
+            return pd.DataFrame()
+        if self.modo == 'amostra':
+            return self.dados.drop(columns=['_chave']).reset_index(drop=True)
+        return self.dados
+
+
+class GravadorDataset:
+    """
+    Grava os lotes padronizados em um dataset Parquet particionado, com memória limitada.
+
+    O dataset segue o layout hive `Poluente=<pol>/Estado=<UF>/Ano=<aaaa>/`, de
+    modo que pl.scan_parquet / pyarrow.dataset descartam partições inteiras a
+    partir dos filtros. Os lotes ficam em buffers Arrow por poluente; quando o
+    total em buffer passa de `limite_memoria_mb`, o maior buffer é descarregado
+    como fragmentos nas partições. Em `fechar`, os fragmentos de cada partição
+    são compactados, em lotes de estações que também respeitam o limite, em
+    um único arquivo ordenado por Estacao e Data_Hora, com row groups de
+    `linhas_por_row_group` linhas: as estatísticas min/max de cada row group
+    ficam estreitas e os filtros por estação/período pulam os row groups que
+    não interessam.
+
+    As linhas rejeitadas (coluna 'Motivo' preenchida por `padronizar`) não
+    vão para o dataset: entram, na mesma passada, no Parquet de quarentena
+    `quarentena_path`, só com origem (Arquivo, Linha), motivo e os campos
+    lidos. O arquivo é montado em `<quarentena_path>.tmp` e só substitui o
+    anterior em `fechar`.
+
+    Na compactação, linhas repetidas de (Estacao, Data_Hora) são removidas
+    por `deduplicar` segundo `regra_duplicatas`, e o relatório mostra quantas
+    saíram de cada arquivo de origem. As linhas originais de cada chave
+    repetida ficam guardadas em `duplicatas_path` (mesmas partições, arquivo
+    duplicatas.parquet), fora do dataset lido pelas análises: quando uma
+    partição é compactada de novo, a deduplicação parte dessas linhas, e não
+    do resultado já deduplicado, então a linha que tinha perdido para a de um
+    arquivo substituído volta e a média de 'media' é refeita.
+
+    Com `recriar=False` (ingestão incremental), o dataset existente é mantido:
+    as linhas dos arquivos em `substituir` (alterados ou removidos desde a
+    última ingestão) são descartadas das partições em que aparecem e da
+    quarentena, e as linhas novas entram na compactação dessas partições.
+    Partições que não recebem nem perdem linhas não são tocadas.
+    """
+
+    def __init__(self, dataset_path, quarentena_path, limite_memoria_mb=512,
+                 linhas_por_row_group=100_000, recriar=True, substituir=(), regra_duplicatas='primeira',
+                 duplicatas_path=None):
+        if regra_duplicatas not in REGRAS_DUPLICATAS:
+            raise ValueError(f"Regra de duplicatas desconhecida: {regra_duplicatas!r} (use uma de {REGRAS_DUPLICATAS})")
+        self.dataset_path = dataset_path
+        self.quarentena_path = quarentena_path
+        self.duplicatas_path = duplicatas_path or f'{os.path.normpath(dataset_path)}_duplicatas'
+        self.limite_bytes = limite_memoria_mb * 1024 ** 2
+        self.linhas_por_row_group = linhas_por_row_group
+        self.buffers = {}
+        self.bytes_em_buffer = 0
+        self.n_descargas = 0
+        self.particoes = set()
+        self.substituir = set(substituir)
+        self.regra_duplicatas = regra_duplicatas
+        self.buffer_quarentena = []
+
+        # Contadores para o relatório final
+        self.total = 0
+        self.nulos_valor = 0
+        self.datas_invalidas = 0
+        self.nulos_padronizado = 0
+        self.contagens = {}  # poluente -> [antes, depois]
+        self.motivos = []
+        self.duplicatas = []  # linhas removidas por Arquivo, uma Series por partição
+        self.conflitos = 0
+
+        if recriar:
+            for pasta in (dataset_path, self.duplicatas_path):
+                if os.path.exists(pasta):
+                    shutil.rmtree(pasta)
+        if not recriar:
+            self.particoes.update(self._particoes_com_arquivos(self.substituir))
+        os.makedirs(dataset_path, exist_ok=True)
+
+        self.quarentena = pq.ParquetWriter(f'{quarentena_path}.tmp', SCHEMA_QUARENTENA)
+        if not recriar and os.path.exists(quarentena_path):
+            anterior = pq.read_table(quarentena_path, schema=SCHEMA_QUARENTENA)
+            origem = pc.dictionary_decode(anterior['Arquivo'])
+            self.quarentena.write_table(
+                anterior.filter(pc.invert(pc.is_in(origem, pa.array(sorted(self.substituir), pa.string()))))
+            )
+
+    def adicionar(self, data):
+        self.total += len(data)
+        self.nulos_valor += int(data['Valor'].isna().sum())
+        self.nulos_padronizado += int(data['Valor_Padronizado'].isna().sum())
+        self.datas_invalidas += int(data['Data_Hora'].isna().sum())
+
+        rejeitadas_mask = data['Motivo'].notna()
+        if rejeitadas_mask.any():
+            rejeitadas = data[rejeitadas_mask]
+            self.motivos.append(rejeitadas.groupby(['Poluente', 'Unidade', 'Motivo'], dropna=False).size())
+            self.buffer_quarentena.append(pa.Table.from_pandas(
+                rejeitadas[SCHEMA_QUARENTENA.names], schema=SCHEMA_QUARENTENA, preserve_index=False
+            ))
+            if sum(t.num_rows for t in self.buffer_quarentena) >= self.linhas_por_row_group:
+                self._descarregar_quarentena()
+
+        # dropna=False: linhas sem poluente (todas em quarentena) também entram na contagem
+        for poluente, grupo in data.groupby('Poluente', sort=False, dropna=False):
+            contagem = self.contagens.setdefault(poluente if pd.notna(poluente) else '(nulo)', [0, 0])
+            contagem[0] += len(grupo)
+            grupo = grupo[grupo['Motivo'].isna()]
+            contagem[1] += len(grupo)
+            if grupo.empty:
+                continue
+
+            tabela = pa.Table.from_pandas(grupo[SCHEMA_SAIDA.names], schema=SCHEMA_SAIDA, preserve_index=False)
+            # Ano da partição pelo Data_Hora local (calculado no pandas: o Arrow precisaria
+            # da base de fusos horários para extrair o ano de um timestamp com fuso)
+            tabela = tabela.append_column(
+                'Ano', pa.array(grupo['Data_Hora'].dt.year.to_numpy(), pa.int16())
+            )
+            self.buffers.setdefault(poluente, []).append(tabela)
+            self.bytes_em_buffer += tabela.nbytes
+
+        while self.bytes_em_buffer > self.limite_bytes:
+            maior = max(self.buffers, key=lambda p: sum(t.nbytes for t in self.buffers[p]))
+            self._descarregar(maior)
+
+    def _descarregar(self, poluente):
+        tabelas = self.buffers.pop(poluente, [])
+        if not tabelas:
+            return
+        tabela = pa.concat_tables(tabelas)
+
+        ds.write_dataset(
+            tabela,
+            self.dataset_path,
+            format='parquet',
+            partitioning=COLUNAS_PARTICAO,
+            partitioning_flavor='hive',
+            basename_template=f'fragmento-{self.n_descargas:05d}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+            file_visitor=lambda arquivo: self.particoes.add(os.path.dirname(arquivo.path))
+        )
+        self.n_descargas += 1
+        self.bytes_em_buffer -= sum(t.nbytes for t in tabelas)
+
+    def _descarregar_quarentena(self):
+        if self.buffer_quarentena:
+            self.quarentena.write_table(pa.concat_tables(self.buffer_quarentena))
+            self.buffer_quarentena = []
+
+    def _caminho_duplicatas(self, particao):
+        """duplicatas.parquet da partição, na mesma pasta relativa sob `duplicatas_path`."""
+        relativa = os.path.relpath(particao, self.dataset_path)
+        return os.path.join(self.duplicatas_path, relativa, 'duplicatas.parquet')
+
+    def _particoes_com_arquivos(self, arquivos):
+        """
+        Partições do dataset existente que têm linhas de algum dos `arquivos`,
+        inclusive linhas que perderam na deduplicação.
+        """
+        if not arquivos:
+            return []
+        particoes = []
+        for pasta, _, nomes in os.walk(self.dataset_path):
+            if 'dados.parquet' not in nomes:
+                continue
+            for arquivo in (os.path.join(pasta, 'dados.parquet'), self._caminho_duplicatas(pasta)):
+                if not os.path.exists(arquivo):
+                    continue
+                # Só a coluna Arquivo (dictionary encoded) é lida
+                origem = pq.read_table(arquivo, columns=['Arquivo'])['Arquivo']
+                if pc.any(pc.is_in(pc.dictionary_decode(origem), pa.array(sorted(arquivos)))).as_py():
+                    particoes.append(pasta)
+                    break
+        return particoes
+
+    def _lotes_de_estacoes(self, arquivos):
+        """
+        Divide as estações de uma partição em lotes consecutivos (na ordem de
+        Estacao) cujo tamanho estimado em memória cabe em `limite_memoria_mb`.
+
+        Só a coluna Estacao é lida; o tamanho de uma linha vem dos metadados
+        Parquet (total_byte_size, descomprimido) do arquivo mais "largo".
+
+        Returns:
+            list[list[str]]: estações de cada lote (vazia se não há linhas)
+        """
+        linhas = pd.Series(dtype='int64')
+        bytes_por_linha = 0.0
+        for arquivo in arquivos:
+            metadados = pq.read_metadata(arquivo)
+            if metadados.num_rows == 0:
+                continue
+            total = sum(metadados.row_group(i).total_byte_size for i in range(metadados.num_row_groups))
+            bytes_por_linha = max(bytes_por_linha, total / metadados.num_rows)
+            estacao = pq.read_table(arquivo, columns=['Estacao'])['Estacao']
+            if pa.types.is_dictionary(estacao.type):
+                estacao = pc.dictionary_decode(estacao)
+            contagem = pc.value_counts(estacao.combine_chunks())
+            linhas = linhas.add(
+                pd.Series(contagem.field('counts').to_numpy(), index=contagem.field('values').to_pylist()),
+                fill_value=0
+            )
+
+        lotes, tamanho = [], self.limite_bytes
+        for estacao, n in sorted(linhas.items()):
+            if tamanho + n * bytes_por_linha > self.limite_bytes:
+                lotes.append([])
+                tamanho = 0
+            lotes[-1].append(estacao)
+            tamanho += n * bytes_por_linha
+        return lotes
+
+    def _compactar(self, particao):
+        """
+        Junta os fragmentos novos de uma partição e as linhas já gravadas que
+        continuam válidas em um único Parquet ordenado.
+
+        As linhas já gravadas são as do dados.parquet de chaves sem repetição
+        mais as linhas originais das chaves repetidas (duplicatas.parquet), ou
+        seja, as linhas padronizadas de todos os arquivos da partição antes da
+        deduplicação. A partição inteira é deduplicada de novo a partir delas.
+
+        A chave da deduplicação inclui Estacao, então a partição é processada
+        em lotes de estações (`_lotes_de_estacoes`), na ordem de Estacao: cada
+        lote é lido com filtro, ordenado, deduplicado e anexado ao arquivo de
+        saída, e a memória fica na ordem de `limite_memoria_mb` mesmo em
+        partições (Poluente, Estado, Ano) maiores que isso.
+        """
+        fragmentos = sorted(
+            os.path.join(particao, f) for f in os.listdir(particao) if f.startswith('fragmento-')
+        )
+        destino = os.path.join(particao, 'dados.parquet')
+        destino_duplicatas = self._caminho_duplicatas(particao)
+        existe = os.path.exists(destino)
+        if existe:
+            if not os.path.exists(destino_duplicatas):
+                raise FileNotFoundError(
+                    f"{destino_duplicatas} não existe: o dataset foi gravado antes de as linhas repetidas "
+                    f"serem guardadas. Rode 1_extracao_padronizacao.py com reprocessar_tudo = True."
+                )
+            validar_parquet(destino, 'horario_dataset')
+
+        # Saídas em arquivos temporários: o dados.parquet atual é lido lote a lote enquanto isso
+        os.makedirs(os.path.dirname(destino_duplicatas), exist_ok=True)
+        temporarios = (f'{destino}.tmp', f'{destino_duplicatas}.tmp')
+        escritor = escritor_duplicatas = None
+        n_linhas = 0
+        for estacoes in self._lotes_de_estacoes(fragmentos + ([destino, destino_duplicatas] if existe else [])):
+            filtro = [('Estacao', 'in', estacoes)]
+            tabelas = [pq.read_table(f, filters=filtro) for f in fragmentos]
+            if existe:
+                existente = pq.read_table(destino, filters=filtro)
+                repetidas = pq.read_table(destino_duplicatas, filters=filtro, schema=existente.schema)
+                # As linhas das chaves repetidas no dados.parquet são resultado da deduplicação: saem e
+                # entram as originais
+                existente = existente.filter(pc.invert(pa.array(_chaves_em(existente, repetidas))))
+                existente = pa.concat_tables([existente, repetidas])
+                if self.substituir:
+                    origem = pc.dictionary_decode(existente['Arquivo'])
+                    existente = existente.filter(
+                        pc.invert(pc.is_in(origem, pa.array(sorted(self.substituir))))
+                    )
+                tabelas.insert(0, existente)
+
+            tabela = pa.concat_tables(tabelas)
+            if tabela.num_rows == 0:
+                continue
+
+            # Arquivo desempata a ordem: 'primeira'/'ultima' não dependem da ordem de ingestão
+            tabela = ordenar_tabela(tabela, ORDEM_LINHAS + ['Arquivo'])
+            tabela, removidas, conflitos, repetidas = deduplicar(tabela, self.regra_duplicatas)
+            if not removidas.empty:
+                self.duplicatas.append(removidas)
+            self.conflitos += conflitos
+
+            if escritor is None:
+                escritor = pq.ParquetWriter(
+                    temporarios[0],
+                    tabela.schema,
+                    write_statistics=True,
+                    sorting_columns=pq.SortingColumn.from_ordering(
+                        tabela.schema, [(col, 'ascending') for col in ORDEM_LINHAS]
+                    )
+                )
+                escritor_duplicatas = pq.ParquetWriter(temporarios[1], tabela.schema)
+            escritor.write_table(tabela, row_group_size=self.linhas_por_row_group)
+            escritor_duplicatas.write_table(repetidas)
+            n_linhas += tabela.num_rows + repetidas.num_rows
+
+        if escritor is not None:
+            escritor.close()
+            escritor_duplicatas.close()
+        if n_linhas == 0:
+            # Todas as linhas vinham de arquivos removidos: apaga a partição e as pastas que ficarem vazias
+            for raiz, pasta in ((self.dataset_path, particao), (self.duplicatas_path, os.path.dirname(destino_duplicatas))):
+                if os.path.exists(pasta):
+                    shutil.rmtree(pasta)
+                pasta = os.path.dirname(pasta)
+                while os.path.normpath(pasta) != os.path.normpath(raiz) and os.path.isdir(pasta) and not os.listdir(pasta):
+                    os.rmdir(pasta)
+                    pasta = os.path.dirname(pasta)
+            return
+
+        os.replace(temporarios[0], destino)
+        os.replace(temporarios[1], destino_duplicatas)
+        validar_parquet(destino, 'horario_dataset')
+        for f in fragmentos:
+            os.remove(f)
+
+    def fechar(self):
+        for poluente in list(self.buffers):
+            self._descarregar(poluente)
+        for particao in sorted(self.particoes):
+            self._compactar(particao)
+        self.particoes = set()
+
+        self._descarregar_quarentena()
+        self.quarentena.close()
+        os.replace(f'{self.quarentena_path}.tmp', self.quarentena_path)
+
+    def relatorio(self):
+        print("\nRelatório de valores nulos:")
+        print(f"Total de registros: {self.total}")
+        print(f"Valores nulos em 'Valor': {self.nulos_valor}")
+        print(f"Valores nulos em 'Valor_Padronizado': {self.nulos_padronizado}")
+        print(f"Data/hora nula ou em formato não reconhecido: {self.datas_invalidas}")
+
+        motivos = pd.concat(self.motivos) if self.motivos else pd.Series(dtype=int)
+        if not motivos.empty:
+            motivos = motivos.groupby(level=[0, 1, 2], dropna=False).sum()
+            print(f"\nMotivos das linhas em quarentena ({self.quarentena_path}):")
+            print(motivos.reset_index(name='count'))
+
+        if self.duplicatas:
+            duplicatas = pd.concat(self.duplicatas).groupby(level=0).sum().sort_values(ascending=False)
+            print(f"\nLinhas repetidas de (Estacao, Poluente, Data_Hora) removidas: {duplicatas.sum()} "
+                  f"({self.conflitos} chaves com valores conflitantes, regra '{self.regra_duplicatas}')")
+            print(duplicatas.rename_axis('Arquivo').reset_index(name='removidas').to_string(index=False))
+
+        for poluente, (antes, depois) in self.contagens.items():
+            print(f"\nPoluente: {poluente}")
+            print(f"  Registros antes: {antes}")
+            print(f"  Registros após a quarentena: {depois}")
+            print(f"  Registros perdidos: {antes - depois}")
@@ -1,38 +1,18 @@
-import pandas as pd
+from esquemas import validar_parquet
+from funcionamento import calcular_periodos
 
-# Load data in chunks if memory is tight (optional)
-file_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data.csv'
-data = pd.read_csv(file_path)
+# Dataset horário particionado (Poluente=/Estado=/Ano=); o scan lazy lê só as chaves e Data_Hora
+dataset_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\dados_horarios'
 
-# Convert date column first
-data['Data'] = pd.to_datetime(data['Data'], format='%Y-%m-%d')
+# Data_Hora já vem tipada e com fuso da ingestão (24:00:00 já está no dia seguinte),
+# então não há conversão de datas aqui
+data_grouped = calcular_periodos(dataset_path)
 
-# Process time column with vectorized operations
-# Convert to string and clean time data
-data['Hora'] = data['Hora'].astype(str)
+# Save results: Parquet para o IndicePeriodos (funcionamento.py), CSV para consulta
+periodos_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data_funcionamento.parquet'
+data_grouped.to_parquet(periodos_path, index=False)
+validar_parquet(periodos_path, 'funcionamento')
 
-# Add seconds to incomplete times
-data['Hora'] = data['Hora'].str.replace(r'(\d+:\d{2})(?::\d{2})?$', r'\1:00', regex=True)
-
-# Handle 24:00:00 cases
-is_24h = data['Hora'].str.contains('24:00:00')
-data['Hora'] = data['Hora'].str.replace('24:00:00', '00:00:00')
-
-# Increment date where we had 24:00:00
-data.loc[is_24h, 'Data'] += pd.DateOffset(days=1)
-
-# Create datetime column using vectorized operation
-data['Data_Hora'] = pd.to_datetime(
-    data['Data'].dt.strftime('%Y-%m-%d') + ' ' + data['Hora'],
-    format='%Y-%m-%d %H:%M:%S'
-)
-
-# Group and aggregate
-data_grouped = data.groupby(['Estacao', 'Poluente'], as_index=False).agg(
-    Data_Hora_Inicio=('Data_Hora', 'min'),
-    Data_Hora_Fim=('Data_Hora', 'max')
-)
-
-# Save results
 output_path = r'C:\Users\pedro\Desktop\UFSC\TCC\TCC-qualidade-ar\proccessed_data\data_funcionamento.csv'
-data_grouped.to_csv(output_path, index=False)
\ No newline at end of file
+data_grouped.to_csv(output_path, index=False)
+print(f'{len(data_grouped)} períodos de funcionamento -> {periodos_path}')